@@ -1,7 +1,7 @@
 # backend/api/v1/comments.py
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.session import get_db
@@ -9,6 +9,7 @@ from backend.crud import comment_crud, graph_crud
 from backend.schemas import comment_schema
 from backend.models.user_model import User
 from backend.core.security import get_current_user
+from backend.core.pagination import InvalidCursorError
 
 router = APIRouter()
 
@@ -28,8 +29,7 @@ async def create_comment(
     Добавляет комментарий к графу. Требуется аутентификация.
     """
     # Проверяем, существует ли граф
-    db_graph = await graph_crud.get_graph_by_id(db, graph_id=graph_id)
-    if db_graph is None:
+    if await graph_crud.get_graph_owner(db, graph_id=graph_id) is None:
         raise HTTPException(status_code=404, detail="Graph not found")
         
     return await comment_crud.create_comment_for_graph(
@@ -43,12 +43,23 @@ async def create_comment(
 )
 async def read_comments(
     graph_id: uuid.UUID,
+    response: Response,
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Получает комментарии для графа с пагинацией.
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor;
+    передача его в параметре cursor избавляет от OFFSET на глубоких страницах.
     """
-    comments = await comment_crud.get_comments_for_graph(db, graph_id=graph_id, skip=skip, limit=limit)
+    try:
+        comments, next_cursor = await comment_crud.get_comments_for_graph(
+            db, graph_id=graph_id, skip=skip, limit=limit, cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     return comments
\ No newline at end of file
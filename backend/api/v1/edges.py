@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.session import get_db
-from backend.crud import edge_crud
+from backend.crud import edge_crud, graph_crud
 from backend.models.user_model import User
 from backend.core.security import get_current_user
 
@@ -21,7 +21,7 @@ async def delete_edge(
     if not db_edge:
         return
 
-    if db_edge.graph.owner_id != current_user.id:
+    if await graph_crud.get_graph_owner(db, graph_id=db_edge.graph_id) != current_user.id: # type: ignore
         raise HTTPException(status_code=403, detail="Not enough permissions")
         
     await edge_crud.delete_edge(db=db, db_edge=db_edge)
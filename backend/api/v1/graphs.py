@@ -1,21 +1,35 @@
 # backend/api/v1/graphs.py
+import asyncio
 import uuid
-import logging
 from typing import List, Optional  # noqa: F401
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.db.session import get_db
-from backend.crud import graph_crud, progress_crud, rating_crud
+from backend.db.session import get_db, AsyncSessionLocal
+from backend.crud import (
+    graph_crud, progress_crud, rating_crud, batch_crud, analysis_crud, transfer_crud, change_crud
+)
 from backend.schemas import graph_schema
+from backend.schemas.graph_base_schemas import graph_in_list_dict
 from backend.models.user_model import User
-from backend.core.security import get_current_user
+from backend.core.security import get_current_user, get_current_user_read_only
+from backend.core.graph_cache import graph_cache, encode_graph_elements, render_graph_detail
+from backend.core.metrics import phase
+from backend.core.graph_io import GraphFormatError
+from backend.core.pagination import InvalidCursorError
+from backend.core.layout import layout_pool, FORCE_LAYOUT_AVAILABLE
+from backend.core.position_buffer import position_buffer
+from backend.core.config import LAYOUT_FORCE_MAX_NODES
+from backend.core import json_codec, live
+from backend.core.etag import make_etag, etag_matches, not_modified, cache_headers, json_response_with_etag
 
-# Настраиваем логгер для этого модуля
-logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Сколько раз create_edge перепроверяет цикл, если граф меняется параллельно
+EDGE_CREATE_ATTEMPTS = 3
+
 # --- ЗАВИСИМОСТЬ для опционального пользователя ---
 async def get_optional_current_user(request: Request, db: AsyncSession = Depends(get_db)) -> Optional[User]:
     """
@@ -29,30 +43,55 @@ async def get_optional_current_user(request: Request, db: AsyncSession = Depends
     
     token = auth_header.split(" ")[1]
     try:
-        user = await get_current_user(token=token, db=db)
+        # Эндпоинты с опциональным пользователем только читают данные
+        user = await get_current_user_read_only(token=token, db=db)
         return user
     except HTTPException:
         return None
 
+async def _require_graph_owner(db: AsyncSession, graph_id: uuid.UUID, current_user: User) -> None:
+    """404, если графа нет, и 403, если текущий пользователь не владелец (без загрузки графа)."""
+    owner_id = await graph_crud.get_graph_owner(db, graph_id=graph_id)
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    if owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
 # --- Эндпоинты ---
 
 
 @router.get("/", response_model=graph_schema.PaginatedGraphs)
 async def read_graphs(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 10,
-    sort_by: str = Query("date_desc", enum=["date_desc", "rating_desc"]),
-    search: Optional[str] = Query(None, min_length=3, max_length=50)
+    sort_by: str = Query("date_desc", enum=["date_desc", "rating_desc", "relevance"]),
+    search: Optional[str] = Query(None, min_length=3, max_length=50),
+    cursor: Optional[str] = None
 ):
     """
     Получает список графов с пагинацией, сортировкой и поиском.
-    - sort_by: 'date_desc' (по умолчанию), 'rating_desc'
+    - cursor: значение next_cursor предыдущей страницы (вместо skip; не для 'relevance')
+    - sort_by: 'date_desc' (по умолчанию), 'rating_desc', 'relevance' (при поиске)
+    - search: полнотекстовый поиск по названию и описанию, слова ищутся по префиксу
+    Ответ снабжается ETag по содержимому: повторный запрос с If-None-Match получает 304.
     """
-    paginated_data = await graph_crud.get_graphs(
-        db, skip=skip, limit=limit, sort_by=sort_by, search_query=search
-    )
-    return paginated_data
+    try:
+        paginated_data = await graph_crud.get_graphs(
+            db, skip=skip, limit=limit, sort_by=sort_by, search_query=search, cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if json_codec.FAST_JSON:
+        body = json_codec.dumps({
+            "total": paginated_data["total"],
+            "graphs": [graph_in_list_dict(graph) for graph in paginated_data["graphs"]],
+            "next_cursor": paginated_data["next_cursor"],
+        })
+    else:
+        body = graph_schema.PaginatedGraphs.model_validate(paginated_data).model_dump_json().encode("utf-8")
+    return json_response_with_etag(request, body)
 
 @router.post("/", response_model=graph_schema.GraphInList, status_code=status.HTTP_201_CREATED)
 async def create_graph(
@@ -62,45 +101,167 @@ async def create_graph(
 ):
     return await graph_crud.create_graph(db=db, graph=graph_in, owner_id=current_user.id) # type: ignore
 
+@router.post("/import", response_model=graph_schema.GraphInList, status_code=status.HTTP_201_CREATED)
+async def import_graph(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Создает граф из файла экспорта (JSON Lines или бинарный формат, тело запроса
+    как есть). Тело разбирается по мере поступления, узлы и ребра вставляются пачками.
+    """
+    try:
+        return await transfer_crud.import_graph(db, owner_id=current_user.id, chunks=request.stream())
+    except GraphFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{graph_id}/export")
+async def export_graph(
+    graph_id: uuid.UUID,
+    format: str = Query("jsonl", enum=list(transfer_crud.EXPORT_FORMATS)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Выгружает граф целиком потоком: JSON Lines или компактный бинарный формат."""
+    await position_buffer.flush_graph(graph_id)
+    header = await graph_crud.get_graph_header(db, graph_id=graph_id)
+    if header is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    await db.rollback()
+
+    async def body():
+        # Поток читается уже после выхода из обработчика, поэтому у него своя сессия
+        async with AsyncSessionLocal() as export_db:
+            async for chunk in transfer_crud.export_graph(export_db, header, format):
+                yield chunk
+
+    binary = format == "binary"
+    return StreamingResponse(
+        body(),
+        media_type="application/octet-stream" if binary else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="graph-{graph_id}.{"tdg" if binary else "jsonl"}"'},
+    )
+
 @router.get("/{graph_id}", response_model=graph_schema.GraphDetail)
 async def read_graph(
     graph_id: uuid.UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_current_user) # <-- Теперь эта зависимость работает правильно
 ):
-    logger.info(f"\n--- [API] Запрос на read_graph для ID: {graph_id} ---")
-    
-    # ... (вся остальная логика функции остается такой же, как в моем предыдущем полном ответе)
-    db_graph = await graph_crud.get_graph_by_id(db, graph_id=graph_id)
-    if db_graph is None:
+    # Отложенные позиции узлов графа должны попасть в ревизию, которую мы отдадим
+    await position_buffer.flush_graph(graph_id)
+    # "Шапка" графа, ревизия и голос пользователя одним запросом, без узлов и ребер
+    header = await graph_crud.get_graph_header(
+        db, graph_id=graph_id, viewer_id=current_user.id if current_user else None # type: ignore
+    )
+    if header is None:
         raise HTTPException(status_code=404, detail="Graph not found")
-
-    elements = []
-    for node in db_graph.nodes:
-        elements.append({"group": "nodes", "data": {"id": str(node.id), "label": node.name}, "position": {"x": node.position_x, "y": node.position_y}})
-    for edge in db_graph.edges:
-        elements.append({"group": "edges", "data": {"id": str(edge.id), "source": str(edge.source_node_id), "target": str(edge.target_node_id)}})
     
-    learned_ids = []
-    ratings = await rating_crud.get_graph_ratings(db, graph_id=graph_id)
-    my_vote = 0
+    ordinals = None
+    progress_bitmap = b""
+    my_vote = header.my_vote
+    elements_blob = graph_cache.get(header.id, header.revision)
+    node_rows = None
     
     if current_user:
-        logger.info(f"[API] Пользователь аутентифицирован: {current_user.username} (ID: {current_user.id})")
-        learned_ids = await progress_crud.get_learned_nodes_for_graph(db, user_id=current_user.id, graph_id=graph_id) # type: ignore
-        vote = await rating_crud.get_user_vote_for_graph(db, user_id=current_user.id, graph_id=graph_id) # type: ignore
-        my_vote = vote if vote is not None else 0
-    else:
-        logger.info("[API] Пользователь НЕ аутентифицирован (гость).")
+        if elements_blob is None:
+            # Узлы все равно понадобятся: читаем их сразу вместе с прогрессом
+            ordinals, progress_bitmap, node_rows = await progress_crud.get_progress_with_nodes(
+                db, user_id=current_user.id, graph_id=graph_id, revision=header.revision # type: ignore
+            )
+        else:
+            ordinals, progress_bitmap = await progress_crud.get_progress_bitmap(
+                db, user_id=current_user.id, graph_id=graph_id, revision=header.revision # type: ignore
+            )
     
-    response_data = {
-        "id": db_graph.id, "name": db_graph.name, "description": db_graph.description,
-        "created_at": db_graph.created_at, "owner": db_graph.owner,
-        "elements": elements, "learned_node_ids": learned_ids,
-        "likes": ratings["likes"], "dislikes": ratings["dislikes"], "my_vote": my_vote
-    }
-    logger.info(f"[API] Финальный ответ: {response_data}")
-    return response_data
+    # ETag покрывает и структуру (ревизию), и пользовательские данные,
+    # поэтому при совпадении отвечаем 304, не трогая узлы и ребра.
+    etag = make_etag(
+        "graph", header.id, header.revision, header.likes, header.dislikes,
+        my_vote, progress_bitmap.hex()
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, vary="Authorization")
+
+    if elements_blob is None:
+        nodes, edges = await graph_crud.get_graph_elements(db, graph_id=graph_id, nodes=node_rows)
+        with phase("serialize"):
+            elements_blob = encode_graph_elements(nodes, edges)
+        graph_cache.put(header.id, header.revision, elements_blob)
+    
+    learned_ids = ordinals.decode(progress_bitmap) if ordinals is not None else []
+
+    # Элементы уже сериализованы, поэтому собираем ответ сами, минуя повторную
+    # валидацию GraphDetail; response_model остается для документации.
+    with phase("serialize"):
+        content = render_graph_detail({
+            "id": header.id, "name": header.name, "description": header.description,
+            "created_at": header.created_at,
+            "owner": {"id": header.owner_id, "username": header.owner_username},
+            "learned_node_ids": learned_ids,
+            "likes": header.likes, "dislikes": header.dislikes, "my_vote": my_vote,
+            "revision": header.revision,
+        }, elements_blob)
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers=cache_headers(etag, vary="Authorization"),
+    )
+
+@router.get("/{graph_id}/changes", response_model=graph_schema.GraphChanges)
+async def read_graph_changes(
+    graph_id: uuid.UUID,
+    request: Request,
+    since: int = Query(..., ge=0, description="Ревизия графа, которая уже есть у клиента"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Элементы графа, созданные, измененные или удаленные после ревизии since
+    (ревизию отдает GET /graphs/{graph_id} и каждый ответ этого эндпоинта).
+    Если журнал изменений уже сжат дальше since, возвращает full_resync=true:
+    граф нужно загрузить заново целиком.
+    """
+    await position_buffer.flush_graph(graph_id)
+    delta = await change_crud.get_changes_since(db, graph_id=graph_id, since=since)
+    if delta is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    etag = make_etag("changes", graph_id, since, delta["revision"], delta["full_resync"])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    with phase("serialize"):
+        content = render_graph_detail({
+            "revision": delta["revision"], "since": since, "full_resync": delta["full_resync"],
+            "removed_node_ids": delta["removed_node_ids"], "removed_edge_ids": delta["removed_edge_ids"],
+        }, encode_graph_elements(delta["nodes"], delta["edges"]))
+    return Response(content=content, media_type="application/json", headers=cache_headers(etag))
+
+@router.websocket("/{graph_id}/live")
+async def graph_live(websocket: WebSocket, graph_id: uuid.UUID):
+    """
+    Живой канал графа: сообщение hello с текущей ревизией, затем дельты правок
+    узлов и ребер (формат и доставка - в core/live.py). Клиент ничего не отправляет.
+    """
+    # Подписываемся до чтения ревизии, чтобы не потерять правку между ними
+    subscriber = live.live_hub.subscribe(graph_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            revision = await graph_crud.get_graph_revision(db, graph_id=graph_id)
+        if revision is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Graph not found")
+            return
+        live.live_broker.watch(graph_id, revision)
+        await websocket.accept()
+        await websocket.send_text(json_codec.dumps({"type": "hello", "revision": revision}).decode("utf-8"))
+        sender = asyncio.create_task(subscriber.run(websocket.send_text))
+        try:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+    finally:
+        live.live_hub.unsubscribe(graph_id, subscriber)
 
 @router.post("/{graph_id}/nodes", response_model=graph_schema.NodeOut, status_code=status.HTTP_201_CREATED)
 async def create_node(
@@ -109,11 +270,7 @@ async def create_node(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_graph = await graph_crud.get_graph_by_id(db, graph_id=graph_id)
-    if db_graph is None:
-        raise HTTPException(status_code=404, detail="Graph not found")
-    if db_graph.owner_id != current_user.id: # type: ignore
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+    await _require_graph_owner(db, graph_id, current_user)
     return await graph_crud.create_node_for_graph(db=db, node=node_in, graph_id=graph_id)
 
 @router.post("/{graph_id}/edges", response_model=graph_schema.EdgeOut, status_code=status.HTTP_201_CREATED)
@@ -123,12 +280,192 @@ async def create_edge(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_graph = await graph_crud.get_graph_by_id(db, graph_id=graph_id)
-    if db_graph is None:
+    await _require_graph_owner(db, graph_id, current_user)
+
+    # Ребро - отношение "source - пререквизит target": оно не должно замыкать цикл.
+    # Вставка проходит, только если граф все еще в проверенной ревизии; если его
+    # успели изменить (например, встречным ребром), проверка повторяется.
+    for _ in range(EDGE_CREATE_ATTEMPTS):
+        revision = await _get_revision_or_404(db, graph_id)
+        creates_cycle = await analysis_crud.would_create_cycle(
+            db, graph_id=graph_id, revision=revision,
+            source_id=edge_in.source_node_id, target_id=edge_in.target_node_id
+        )
+        if creates_cycle is None:
+            raise HTTPException(status_code=400, detail="Both nodes must belong to this graph")
+        if creates_cycle:
+            raise HTTPException(status_code=409, detail="Edge would create a prerequisite cycle")
+        db_edge = await graph_crud.create_edge_for_graph(
+            db=db, edge=edge_in, graph_id=graph_id, expected_revision=revision
+        )
+        if db_edge is not None:
+            return db_edge
+    raise HTTPException(status_code=409, detail="Graph is being modified concurrently, please retry")
+
+@router.post("/{graph_id}/batch", response_model=graph_schema.GraphBatchResult)
+async def apply_batch(
+    graph_id: uuid.UUID,
+    batch_in: graph_schema.GraphBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Применяет пачку операций над узлами и ребрами (create/update/delete) одной
+    транзакцией. Новые узлы получают временные ref, на которые могут ссылаться
+    ребра из этой же пачки. Возвращает выданные id и новую ревизию графа.
+    """
+    await _require_graph_owner(db, graph_id, current_user)
+    # Отложенные позиции записываются раньше пачки, чтобы не перезаписать ее правки
+    await position_buffer.flush_graph(graph_id)
+    try:
+        return await batch_crud.apply_graph_batch(db, graph_id=graph_id, batch=batch_in)
+    except batch_crud.BatchValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{graph_id}/layout", response_model=graph_schema.LayoutResult)
+async def layout_graph(
+    graph_id: uuid.UUID,
+    layout_in: graph_schema.LayoutRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Рассчитывает расстановку узлов на сервере (в пуле процессов) и сохраняет
+    позиции одним групповым UPDATE. Если граф изменился во время расчета - 409.
+    """
+    await _require_graph_owner(db, graph_id, current_user)
+    await position_buffer.flush_graph(graph_id)
+    revision = await _get_revision_or_404(db, graph_id)
+
+    topology = await analysis_crud.get_graph_topology(db, graph_id=graph_id, revision=revision)
+    node_count = len(topology)
+    sources, targets = topology.edge_list()
+    options = {}
+    if layout_in.algorithm == "force":
+        if not FORCE_LAYOUT_AVAILABLE:
+            raise HTTPException(status_code=501, detail="Force-directed layout requires numpy (install backend[layout])")
+        if node_count > LAYOUT_FORCE_MAX_NODES:
+            raise HTTPException(status_code=422, detail=f"Force-directed layout is limited to {LAYOUT_FORCE_MAX_NODES} nodes")
+        # Стартуем с текущих позиций, чтобы повторный запуск лишь "доводил" раскладку
+        xs, ys = [0.0] * node_count, [0.0] * node_count
+        for row in await graph_crud.get_node_positions(db, graph_id=graph_id):
+            ordinal = topology.ordinals.index_of(row.id)
+            if ordinal is not None:
+                xs[ordinal], ys[ordinal] = row.position_x or 0.0, row.position_y or 0.0
+        options = {"initial": (xs, ys), "iterations": layout_in.iterations}
+    # Сессия не должна держать соединение, пока идет расчет
+    await db.rollback()
+
+    xs, ys = await layout_pool.run(layout_in.algorithm, node_count, sources, targets, **options)
+    positions = [
+        {"id": node_id, "position_x": x, "position_y": y}
+        for node_id, x, y in zip(topology.ordinals.node_ids, xs, ys)
+    ]
+    revision = await graph_crud.set_node_positions(
+        db, graph_id=graph_id, expected_revision=revision, positions=positions
+    )
+    if revision is None:
+        raise HTTPException(status_code=409, detail="Graph was modified during layout, please retry")
+    return {
+        "revision": revision,
+        "positions": [{"id": p["id"], "x": p["position_x"], "y": p["position_y"]} for p in positions],
+    }
+
+# --- АНАЛИЗ ПРЕРЕКВИЗИТОВ ---
+
+def _analysis_response(request: Request, etag: str, payload, vary: Optional[str] = None) -> Response:
+    if etag_matches(request, etag):
+        return not_modified(etag, vary=vary)
+    return Response(
+        content=payload.model_dump_json(),
+        media_type="application/json",
+        headers=cache_headers(etag, vary=vary),
+    )
+
+async def _get_revision_or_404(db: AsyncSession, graph_id: uuid.UUID) -> int:
+    revision = await graph_crud.get_graph_revision(db, graph_id=graph_id)
+    if revision is None:
         raise HTTPException(status_code=404, detail="Graph not found")
-    if db_graph.owner_id != current_user.id: # type: ignore
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return await graph_crud.create_edge_for_graph(db=db, edge=edge_in, graph_id=graph_id)
+    return revision
+
+async def _get_topology_or_404(db: AsyncSession, graph_id: uuid.UUID):
+    revision = await _get_revision_or_404(db, graph_id)
+    return revision, await analysis_crud.get_graph_topology(db, graph_id=graph_id, revision=revision)
+
+@router.get("/{graph_id}/learning-path", response_model=graph_schema.NodeIdList)
+async def read_learning_path(graph_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db)):
+    """Все узлы графа в порядке изучения: каждый узел идет после всех своих пререквизитов."""
+    revision, topology = await _get_topology_or_404(db, graph_id)
+    order = topology.topological_order()
+    if order is None:
+        raise HTTPException(status_code=409, detail="Graph contains a prerequisite cycle")
+    etag = make_etag("learning-path", graph_id, revision)
+    return _analysis_response(request, etag, graph_schema.NodeIdList(node_ids=topology.node_ids(order)))
+
+async def _node_closure_response(
+    request: Request, db: AsyncSession, graph_id: uuid.UUID, node_id: uuid.UUID, ancestors: bool
+) -> Response:
+    revision = await _get_revision_or_404(db, graph_id)
+    etag = make_etag("closure", graph_id, revision, node_id, ancestors)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    node_ids = await analysis_crud.get_related_nodes(
+        db, graph_id=graph_id, revision=revision, node_id=node_id, ancestors=ancestors
+    )
+    if node_ids is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return _analysis_response(request, etag, graph_schema.NodeClosure(node_ids=node_ids, count=len(node_ids)))
+
+@router.get("/{graph_id}/nodes/{node_id}/prerequisites", response_model=graph_schema.NodeClosure)
+async def read_node_prerequisites(
+    graph_id: uuid.UUID, node_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db)
+):
+    """Все транзитивные пререквизиты узла (предки) в порядке изучения."""
+    return await _node_closure_response(request, db, graph_id, node_id, ancestors=True)
+
+@router.get("/{graph_id}/nodes/{node_id}/dependents", response_model=graph_schema.NodeClosure)
+async def read_node_dependents(
+    graph_id: uuid.UUID, node_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db)
+):
+    """Все узлы, которые транзитивно зависят от данного (потомки): что открывает его изучение."""
+    return await _node_closure_response(request, db, graph_id, node_id, ancestors=False)
+
+@router.get("/{graph_id}/reachability", response_model=graph_schema.Reachability)
+async def read_reachability(
+    graph_id: uuid.UUID,
+    source: uuid.UUID,
+    target: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Является ли узел source транзитивным пререквизитом узла target."""
+    revision = await _get_revision_or_404(db, graph_id)
+    reachable = await analysis_crud.is_reachable(
+        db, graph_id=graph_id, revision=revision, source_id=source, target_id=target
+    )
+    if reachable is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return {"source_node_id": source, "target_node_id": target, "reachable": reachable}
+
+@router.get("/{graph_id}/next", response_model=graph_schema.NodeIdList)
+async def read_next_nodes(
+    graph_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_current_user)
+):
+    """
+    Что изучать дальше: неизученные узлы, все прямые пререквизиты которых
+    текущий пользователь уже изучил. Для гостя - узлы без пререквизитов.
+    """
+    revision, topology = await _get_topology_or_404(db, graph_id)
+    progress_bitmap = b""
+    if current_user:
+        _, progress_bitmap = await progress_crud.get_progress_bitmap(
+            db, user_id=current_user.id, graph_id=graph_id, revision=revision # type: ignore
+        )
+    etag = make_etag("next", graph_id, revision, progress_bitmap.hex())
+    node_ids = topology.node_ids(topology.next_unlockable(progress_bitmap))
+    return _analysis_response(request, etag, graph_schema.NodeIdList(node_ids=node_ids), vary="Authorization")
 
 # --- НОВЫЙ ЭНДПОИНТ ДЛЯ ГОЛОСОВАНИЯ ---
 @router.post("/{graph_id}/rate", status_code=status.HTTP_204_NO_CONTENT)
@@ -144,12 +481,12 @@ async def rate_graph(
     Повторная отправка того же значения убирает голос.
     """
     # Проверяем, что граф существует (опционально, но хорошая практика)
-    db_graph = await graph_crud.get_graph_by_id(db, graph_id=graph_id)
-    if db_graph is None:
+    owner_id = await graph_crud.get_graph_owner(db, graph_id=graph_id)
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="Graph not found")
     
     # Нельзя голосовать за свой собственный граф
-    if db_graph.owner_id == current_user.id: # type: ignore
+    if owner_id == current_user.id: # type: ignore
         raise HTTPException(status_code=403, detail="Cannot rate your own graph")
     
     await rating_crud.set_graph_rating(
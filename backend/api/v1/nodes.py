@@ -1,45 +1,86 @@
 # backend/api/v1/nodes.py
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.session import get_db
-from backend.crud import node_crud, progress_crud
-from backend.schemas.graph_schema import NodeOut, NodeUpdate
+from backend.crud import graph_crud, node_crud, progress_crud, search_crud
+from backend.schemas.graph_schema import NodeOut, NodeUpdate, NodeSearchHit
 from backend.models.user_model import User
 from backend.core.security import get_current_user
+from backend.core.etag import make_etag, etag_matches, not_modified, cache_headers
+from backend.core.position_buffer import position_buffer, POSITION_FIELDS
 
 router = APIRouter()
 
+@router.get("/search", response_model=List[NodeSearchHit])
+async def search_nodes(
+    q: str = Query(..., min_length=2, max_length=100),
+    graph_id: Optional[uuid.UUID] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Полнотекстовый поиск по названию и содержимому узлов во всех графах
+    (или в одном, если передан graph_id). Результаты отсортированы по релевантности.
+    """
+    return await search_crud.search_nodes(db, query=q, limit=limit, graph_id=graph_id)
+
 @router.get("/{node_id}", response_model=NodeOut)
 async def read_node(
     node_id: uuid.UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db)
     # Защита не нужна, так как просмотр контента может быть публичным.
     # Если нужна защита, нужно добавить current_user и проверку.
 ):
-    """Получает данные одного узла по его ID."""
+    """
+    Получает данные одного узла по его ID.
+    ETag строится по ревизии графа: при совпадении отвечаем 304, не загружая узел.
+    """
+    await position_buffer.flush_node(node_id)
+    revision = await node_crud.get_node_revision(db, node_id=node_id)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+    etag = make_etag("node", node_id, revision)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     db_node = await node_crud.get_node_by_id(db, node_id=node_id)
     if not db_node:
         raise HTTPException(status_code=404, detail="Node not found")
-    return db_node
+    body = NodeOut.model_validate(db_node).model_dump_json().encode("utf-8")
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag))
 
-@router.patch("/{node_id}", response_model=NodeOut)
+@router.patch("/{node_id}", response_model=NodeOut, responses={202: {"description": "Position update accepted, written shortly"}})
 async def update_node(
     node_id: uuid.UUID,
     node_in: NodeUpdate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Обновляет узел. Доступно только владельцу графа."""
+    """
+    Обновляет узел. Доступно только владельцу графа.
+    Правка одних координат уходит в буфер позиций (core/position_buffer.py):
+    ответ 202 с узлом в новой позиции, запись в БД - чуть позже одной пачкой.
+    """
     db_node = await node_crud.get_node_by_id(db, node_id=node_id)
     if not db_node:
         raise HTTPException(status_code=404, detail="Node not found")
     
-    # db_node.graph был загружен в get_node_by_id
-    if db_node.graph.owner_id != current_user.id:
+    if await graph_crud.get_graph_owner(db, graph_id=db_node.graph_id) != current_user.id: # type: ignore
         raise HTTPException(status_code=403, detail="Not enough permissions")
-        
+
+    update_data = node_in.model_dump(exclude_unset=True)
+    if position_buffer.running and update_data and update_data.keys() <= POSITION_FIELDS:
+        position_buffer.add(db_node.graph_id, node_id, update_data) # type: ignore
+        response.status_code = status.HTTP_202_ACCEPTED
+        return NodeOut.model_validate(db_node).model_copy(update=position_buffer.get(node_id))
+
+    # Отложенная позиция этого узла не должна записаться поверх новой правки
+    await position_buffer.flush_node(node_id)
     return await node_crud.update_node(db=db, db_node=db_node, node_in=node_in)
 
 @router.delete("/{node_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -49,12 +90,13 @@ async def delete_node(
     current_user: User = Depends(get_current_user)
 ):
     """Удаляет узел. Доступно только владельцу графа."""
+    await position_buffer.flush_node(node_id)
     db_node = await node_crud.get_node_by_id(db, node_id=node_id)
     if not db_node:
         # Если узел не найден, можно вернуть 204, чтобы избежать утечки информации
         return
     
-    if db_node.graph.owner_id != current_user.id:
+    if await graph_crud.get_graph_owner(db, graph_id=db_node.graph_id) != current_user.id: # type: ignore
         raise HTTPException(status_code=403, detail="Not enough permissions")
         
     await node_crud.delete_node(db=db, db_node=db_node)
@@ -69,12 +111,14 @@ async def mark_progress(
     current_user: User = Depends(get_current_user)
 ):
     """Отмечает узел как изученный для текущего пользователя."""
-    # Проверяем, существует ли узел (опционально, но хорошая практика)
-    db_node = await node_crud.get_node_by_id(db, node_id=node_id)
-    if not db_node:
+    # Проверяем, существует ли узел: нужен только его graph_id
+    graph_id = await node_crud.get_node_graph_id(db, node_id=node_id)
+    if graph_id is None:
         raise HTTPException(status_code=404, detail="Node not found")
     
-    await progress_crud.mark_node_as_learned(db, user_id= uuid.UUID(str(current_user.id)), node_id=node_id)
+    await progress_crud.mark_node_as_learned(
+        db, user_id=uuid.UUID(str(current_user.id)), node_id=node_id, graph_id=graph_id
+    )
     return
 
 @router.delete("/{node_id}/progress", status_code=status.HTTP_204_NO_CONTENT)
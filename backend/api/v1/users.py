@@ -1,15 +1,17 @@
 # backend/api/v1/users.py
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.crud import user_crud
 from backend.schemas import user_schema
+from backend.schemas.graph_base_schemas import graph_in_list_dict
 from backend.core import security
 from backend.core.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.core import json_codec
 from backend.db.session import get_db
-from backend.core.security import get_current_user
+from backend.core.security import get_current_user_read_only
 from backend.models.user_model import User
 
 router = APIRouter()
@@ -35,12 +37,17 @@ async def login_for_access_token(db: AsyncSession = Depends(get_db), form_data:
         )
         
     # 2. Теперь, когда Pylance знает, что 'user' не None, проверяем пароль
-    if not security.verify_password(form_data.password, str(user.password_hash)):
+    # (в пуле хэширования; при перегрузке пула отвечаем 429)
+    is_valid, new_hash = await security.verify_and_update_password(form_data.password, str(user.password_hash))
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # Хэш создан с устаревшим cost factor - прозрачно пересчитываем его
+    if new_hash is not None:
+        await user_crud.update_password_hash(db, user, new_hash)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
@@ -51,7 +58,7 @@ async def login_for_access_token(db: AsyncSession = Depends(get_db), form_data:
 
 @router.get("/me/profile", response_model=user_schema.UserProfile)
 async def read_user_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_read_only),
     db: AsyncSession = Depends(get_db)
 ):
     """Получает профиль текущего аутентифицированного пользователя."""
@@ -68,5 +75,10 @@ async def read_user_profile(
         "owned_graphs": owned_graphs,
         "learning_graphs": learning_graphs
     }
+    if json_codec.FAST_JSON:
+        # Графы кодируются напрямую, минуя валидацию UserProfile
+        profile_data["owned_graphs"] = [graph_in_list_dict(graph) for graph in owned_graphs]
+        profile_data["learning_graphs"] = [graph_in_list_dict(graph) for graph in learning_graphs]
+        return Response(content=json_codec.dumps(profile_data), media_type="application/json")
     
     return profile_data
\ No newline at end of file
@@ -0,0 +1,16 @@
+# backend/benchmarks/__init__.py
+"""
+Воспроизводимые бенчмарки основных путей API.
+
+    python -m backend.benchmarks seed --database-url sqlite+aiosqlite:///./bench.db
+    python -m backend.benchmarks run --database-url sqlite+aiosqlite:///./bench.db -o run.json
+    python -m backend.benchmarks compare base.json run.json
+    python -m backend.benchmarks serialization -o serialization.json
+
+seed заполняет отдельную БД синтетическими данными (seed.py), run прогоняет
+сценарии (scenarios.py) через ASGI-клиент в процессе или по сети (--base-url)
+и пишет p50/p95/p99 и пропускную способность в JSON, compare сравнивает два
+таких отчета. serialization (serialization.py) меряет только сериализацию
+ответов, а доля сериализации в задержке запросов попадает в отчет run при
+SERVER_TIMING_ENABLED=true.
+"""
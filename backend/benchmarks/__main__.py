@@ -0,0 +1,175 @@
+# backend/benchmarks/__main__.py
+"""
+Запуск из корня репозитория: python -m backend.benchmarks <команда>
+(подробности в backend/benchmarks/__init__.py).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+_DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///./bench.db"
+_DEFAULT_MANIFEST = "bench-manifest.json"
+
+
+def _sizes(value: str):
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+async def _seed(args) -> None:
+    from backend.benchmarks.seed import seed_database
+
+    manifest = await seed_database(
+        users=args.users, sizes=args.sizes, catalog_graphs=args.catalog_graphs,
+        editor_graph_nodes=args.editor_nodes, ratings_per_graph=args.ratings_per_graph,
+        comments_per_graph=args.comments_per_graph, progress_users=args.progress_users,
+        progress_fraction=args.progress_fraction, random_seed=args.random_seed,
+    )
+    with open(args.manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"БД заполнена, манифест записан в {args.manifest}.", file=sys.stderr)
+
+
+async def _run(args) -> None:
+    import httpx
+    from backend.benchmarks import runner, scenarios
+
+    with open(args.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    def report_progress(name: str, result: dict) -> None:
+        print(
+            f"{name:<36} p50={result['p50_ms']:>9.2f}ms p95={result['p95_ms']:>9.2f}ms "
+            f"p99={result['p99_ms']:>9.2f}ms {result['throughput_rps']:>8.1f} rps errors={result['errors']}",
+            file=sys.stderr,
+        )
+
+    async def run_with(client: httpx.AsyncClient) -> dict:
+        sessions = await scenarios.open_sessions(client, manifest)
+        selected = scenarios.build_scenarios(
+            manifest, sessions, requests=args.requests, concurrency=args.concurrency,
+            login_requests=args.login_requests, warmup=args.warmup, only=args.only,
+        )
+        return await runner.run_scenarios(client, selected, progress=report_progress)
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+            results = await run_with(client)
+        target, database = args.base_url, "remote"
+    else:
+        from backend.main import app, lifespan
+        from backend.db.session import engine
+
+        # Lifespan приложения: миграции, поток логов, остановка пулов в конце
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                results = await run_with(client)
+        target, database = "asgi", engine.dialect.name
+
+    params = {
+        "requests": args.requests, "concurrency": args.concurrency, "login_requests": args.login_requests,
+        "warmup": args.warmup, "only": args.only, "seed": manifest.get("params"),
+    }
+    report = runner.build_report(results, target=target, database=database, params=params)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Отчет записан в {args.output}.", file=sys.stderr)
+
+
+def _serialization(args) -> None:
+    from backend.benchmarks.serialization import run_serialization_benchmark
+    from backend.core import json_codec
+
+    results = run_serialization_benchmark(args.sizes, args.repeat)
+    report = {"meta": {"orjson_available": json_codec.ORJSON_AVAILABLE, "repeat": args.repeat}, "results": results}
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Отчет записан в {args.output}.", file=sys.stderr)
+
+
+def _compare(args) -> None:
+    from backend.benchmarks.runner import compare_reports
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    lines, regressions = compare_reports(base, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        sys.exit(f"Регрессии (порог {args.threshold:.0%}): {', '.join(regressions)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks", description="Taideteos API benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = subparsers.add_parser("seed", help="Заполнить пустую БД синтетическими данными")
+    seed_parser.add_argument("--database-url", default=_DEFAULT_DATABASE_URL)
+    seed_parser.add_argument("--manifest", default=_DEFAULT_MANIFEST, help="Куда записать манифест")
+    seed_parser.add_argument("--users", type=int, default=200)
+    seed_parser.add_argument("--sizes", type=_sizes, default=[100, 1000, 10000, 50000],
+                             help="Размеры графов в узлах через запятую")
+    seed_parser.add_argument("--catalog-graphs", type=int, default=500)
+    seed_parser.add_argument("--editor-nodes", type=int, default=200)
+    seed_parser.add_argument("--ratings-per-graph", type=int, default=20)
+    seed_parser.add_argument("--comments-per-graph", type=int, default=5)
+    seed_parser.add_argument("--progress-users", type=int, default=20)
+    seed_parser.add_argument("--progress-fraction", type=float, default=0.3)
+    seed_parser.add_argument("--random-seed", type=int, default=1)
+
+    run_parser = subparsers.add_parser("run", help="Прогнать сценарии и записать отчет в JSON")
+    run_parser.add_argument("--database-url", default=_DEFAULT_DATABASE_URL)
+    run_parser.add_argument("--manifest", default=_DEFAULT_MANIFEST)
+    run_parser.add_argument("--base-url", help="Нагружать запущенный сервер вместо приложения в процессе")
+    run_parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий")
+    run_parser.add_argument("--concurrency", type=int, default=10)
+    run_parser.add_argument("--login-requests", type=int, default=40)
+    run_parser.add_argument("--warmup", type=int, default=5, help="Неизмеряемых запросов перед сценарием чтения")
+    run_parser.add_argument("--only", help="Регулярное выражение для имен сценариев")
+    run_parser.add_argument("--timeout", type=float, default=60.0)
+    run_parser.add_argument("-o", "--output", default="-", help="Путь к отчету ('-' - стандартный вывод)")
+
+    serialization_parser = subparsers.add_parser(
+        "serialization", help="Сравнить сериализацию ответов: Pydantic, stdlib json, orjson (без БД)"
+    )
+    serialization_parser.add_argument("--sizes", type=_sizes, default=[100, 1000, 10000, 50000])
+    serialization_parser.add_argument("--repeat", type=int, default=5)
+    serialization_parser.add_argument("-o", "--output", default="-")
+
+    compare_parser = subparsers.add_parser("compare", help="Сравнить два отчета (код 1 при регрессии)")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Допустимое ухудшение p95 и rps")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        _compare(args)
+        return
+    if args.command == "serialization":
+        os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+        _serialization(args)
+        return
+
+    # Движок создается при импорте backend.db.session, поэтому URL задаем до импорта
+    os.environ["DATABASE_URL"] = args.database_url
+    # Токены бенчмарка живут только внутри прогона
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    if args.command == "seed":
+        asyncio.run(_seed(args))
+    elif args.command == "run":
+        asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
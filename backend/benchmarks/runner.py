@@ -0,0 +1,172 @@
+# backend/benchmarks/runner.py
+"""
+Генератор нагрузки и отчеты. Сценарий выполняется concurrency параллельными
+воркерами, которые разбирают общий счетчик запросов; задержка каждого
+запроса меряется на клиенте. В отчет попадают p50/p95/p99, среднее,
+максимум, пропускная способность и распределение статусов ответов, а если
+сервер отдает Server-Timing (SERVER_TIMING_ENABLED=true) - среднее время
+фаз на сервере и доля сериализации в нем.
+
+В режиме ASGI клиент и приложение делят один event loop, поэтому
+абсолютные числа включают работу клиента: сравнивать стоит прогоны одного
+режима между собой, а не с продакшеном.
+"""
+import asyncio
+import itertools
+import math
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+# call(client, i) выполняет i-й запрос сценария
+RequestCall = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class Scenario:
+    def __init__(self, name: str, call: RequestCall, requests: int, concurrency: int,
+                 expected: Sequence[int] = (200,), warmup: int = 0):
+        self.name = name
+        self.call = call
+        self.requests = requests
+        self.concurrency = concurrency
+        self.expected = tuple(expected)
+        self.warmup = warmup
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Перцентиль по методу ближайшего ранга (значения уже отсортированы)."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'auth;dur=0.31, db;dur=0.66;desc="4 queries"' -> {"auth": 0.31, "db": 0.66} (мс)."""
+    phases = {}
+    for item in header.split(","):
+        name, *params = item.strip().split(";")
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "dur":
+                phases[name.strip()] = float(value)
+    return phases
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], errors: int, wall_seconds: float,
+              concurrency: int, server_timing: Optional[Dict[str, float]] = None) -> dict:
+    latencies = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_s": round(wall_seconds, 3),
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "p50_ms": to_ms(percentile(latencies, 0.50)),
+        "p95_ms": to_ms(percentile(latencies, 0.95)),
+        "p99_ms": to_ms(percentile(latencies, 0.99)),
+        "mean_ms": to_ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "max_ms": to_ms(latencies[-1]) if latencies else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+    if server_timing and latencies:
+        means = {name: round(total / len(latencies), 3) for name, total in server_timing.items()}
+        summary["server_timing_ms"] = means
+        if means.get("total"):
+            summary["serialize_share"] = round(means.get("serialize", 0.0) / means["total"], 4)
+    return summary
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario) -> dict:
+    for i in range(scenario.warmup):
+        await scenario.call(client, i)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    server_timing: Dict[str, float] = {}
+    errors = 0
+    counter = itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors
+        while (i := next(counter)) < scenario.requests:
+            started = time.perf_counter()
+            try:
+                response = await scenario.call(client, i)
+                status_key = str(response.status_code)
+                ok = response.status_code in scenario.expected
+                for name, duration in parse_server_timing(response.headers.get("server-timing", "")).items():
+                    server_timing[name] = server_timing.get(name, 0.0) + duration
+            except httpx.HTTPError as e:
+                status_key, ok = type(e).__name__, False
+            latencies.append(time.perf_counter() - started)
+            statuses[status_key] = statuses.get(status_key, 0) + 1
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(scenario.concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - started, scenario.concurrency, server_timing)
+
+
+async def run_scenarios(client: httpx.AsyncClient, scenarios: Sequence[Scenario],
+                        progress: Optional[Callable[[str, dict], None]] = None) -> Dict[str, dict]:
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = await run_scenario(client, scenario)
+        if progress is not None:
+            progress(scenario.name, results[scenario.name])
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results: Dict[str, dict], target: str, database: str, params: dict) -> dict:
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": target,
+            "database": database,
+            "params": params,
+        },
+        "scenarios": results,
+    }
+
+
+def compare_reports(base: dict, current: dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Сравнивает два отчета по общим сценариям. Возвращает строки таблицы и
+    список регрессий: p95 выросла или пропускная способность упала больше
+    чем на долю threshold.
+    """
+    lines = [f"{'scenario':<36} {'p95 base':>10} {'p95 now':>10} {'change':>8} {'rps base':>10} {'rps now':>10} {'change':>8}"]
+    regressions = []
+    for name, before in base["scenarios"].items():
+        after = current["scenarios"].get(name)
+        if after is None:
+            continue
+        p95_change = after["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps_change = after["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        lines.append(
+            f"{name:<36} {before['p95_ms']:>10.2f} {after['p95_ms']:>10.2f} {p95_change:>+8.1%} "
+            f"{before['throughput_rps']:>10.1f} {after['throughput_rps']:>10.1f} {rps_change:>+8.1%}"
+        )
+        if p95_change > threshold or rps_change < -threshold:
+            regressions.append(name)
+    return lines, regressions
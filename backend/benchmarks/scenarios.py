@@ -0,0 +1,121 @@
+# backend/benchmarks/scenarios.py
+"""
+Сценарии бенчмарка по манифесту seed.py: каталог во всех режимах сортировки
+и поиска, чтение графа каждого размера гостем и пользователем с прогрессом,
+повторная проверка по ETag, профиль, серия правок редактора и дельта
+после нее (GET /changes), отметки прогресса и шквал входов (bcrypt в пуле
+хэширования).
+"""
+import re
+from typing import Dict, List, Optional
+
+import httpx
+
+from backend.benchmarks.runner import Scenario
+
+API = "/api/v1"
+
+# Столько читателей из манифеста входят заранее и чередуются в авторизованных сценариях
+_READER_SESSIONS = 5
+# Сколько последних ревизий графа редактора охватывает сценарий дельты
+_CHANGES_WINDOW = 50
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> Dict[str, str]:
+    response = await client.post(f"{API}/users/login/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def open_sessions(client: httpx.AsyncClient, manifest: dict) -> Dict[str, List[Dict[str, str]]]:
+    """Заголовки авторизации редактора и нескольких читателей (вне замеров)."""
+    password = manifest["password"]
+    return {
+        "editor": [await login(client, manifest["editor"], password)],
+        "readers": [await login(client, name, password) for name in manifest["readers"][:_READER_SESSIONS]],
+    }
+
+
+def build_scenarios(manifest: dict, sessions: Dict[str, List[Dict[str, str]]], requests: int,
+                    concurrency: int, login_requests: int, warmup: int = 5,
+                    only: Optional[str] = None) -> List[Scenario]:
+    editor = sessions["editor"][0]
+    readers = sessions["readers"]
+    terms = manifest["search_terms"]
+    scenarios: List[Scenario] = []
+
+    def add(name: str, call, count: int = requests, expected=(200,), warm: int = warmup) -> None:
+        if only is None or re.search(only, name):
+            scenarios.append(Scenario(name, call, count, concurrency, expected, warm))
+
+    # --- Каталог: первые 10 страниц, чтобы не мерить один и тот же ответ ---
+    for sort_by in ("date_desc", "rating_desc"):
+        add(f"catalog_{sort_by}", lambda client, i, sort_by=sort_by: client.get(
+            f"{API}/graphs/", params={"sort_by": sort_by, "skip": (i % 10) * 10}))
+    for sort_by in ("relevance", "date_desc", "rating_desc"):
+        add(f"catalog_search_{sort_by}", lambda client, i, sort_by=sort_by: client.get(
+            f"{API}/graphs/", params={"sort_by": sort_by, "search": terms[i % len(terms)]}))
+
+    # --- Граф целиком: гость и пользователь с прогрессом и голосом ---
+    for size, graph_id in manifest["graphs"].items():
+        url = f"{API}/graphs/{graph_id}"
+        add(f"read_graph_guest_{size}", lambda client, i, url=url: client.get(url))
+        add(f"read_graph_auth_{size}", lambda client, i, url=url: client.get(url, headers=readers[i % len(readers)]))
+
+    # --- Повторная загрузка самого большого графа с If-None-Match ---
+    if manifest["graphs"]:
+        largest = max(manifest["graphs"], key=int)
+        url = f"{API}/graphs/{manifest['graphs'][largest]}"
+        etags: Dict[int, str] = {}
+
+        async def revalidate(client: httpx.AsyncClient, i: int, url: str = url) -> httpx.Response:
+            reader = i % len(readers)
+            if reader not in etags:
+                etags[reader] = (await client.get(url, headers=readers[reader])).headers["ETag"]
+            return await client.get(url, headers={**readers[reader], "If-None-Match": etags[reader]})
+
+        add(f"read_graph_not_modified_{largest}", revalidate, expected=(304,), warm=len(readers))
+
+    add("read_user_profile", lambda client, i: client.get(
+        f"{API}/users/me/profile", headers=readers[i % len(readers)]))
+
+    # --- Записи: серия правок редактора и отметки прогресса ---
+    editor_nodes = manifest["editor_nodes"]
+
+    def edit_node(client: httpx.AsyncClient, i: int):
+        node_id = editor_nodes[i % len(editor_nodes)]
+        if i % 4 == 3:
+            body = {"name": f"Edited {i}"}
+        else:
+            body = {"position_x": float(i % 1000), "position_y": float(i // 1000)}
+        return client.patch(f"{API}/nodes/{node_id}", json=body, headers=editor)
+
+    # Правки одних координат принимает буфер позиций (202), переименования пишутся сразу (200)
+    add("editor_burst", edit_node, expected=(200, 202), warm=0)
+
+    # --- Дельта после серии правок против полной перезагрузки того же графа ---
+    editor_graph = f"{API}/graphs/{manifest['editor_graph']}"
+    baseline: Dict[str, int] = {}
+
+    async def read_changes(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        if "since" not in baseline:
+            revision = (await client.get(editor_graph)).json()["revision"]
+            baseline["since"] = max(0, revision - _CHANGES_WINDOW)
+        return await client.get(f"{editor_graph}/changes", params={"since": baseline["since"]})
+
+    add("graph_changes_after_edits", read_changes, warm=1)
+    add("read_graph_editor", lambda client, i: client.get(editor_graph))
+
+    def toggle_progress(client: httpx.AsyncClient, i: int):
+        url = f"{API}/nodes/{editor_nodes[(i // 2) % len(editor_nodes)]}/progress"
+        headers = readers[i % len(readers)]
+        return client.post(url, headers=headers) if i % 2 == 0 else client.delete(url, headers=headers)
+
+    add("progress_toggle", toggle_progress, expected=(204,), warm=0)
+
+    # --- Шквал входов: 429 - ожидаемая реакция переполненного пула хэширования ---
+    users = manifest["users"]
+    add("login_storm", lambda client, i: client.post(
+        f"{API}/users/login/token", data={"username": users[i % len(users)], "password": manifest["password"]}),
+        count=login_requests, expected=(200, 429), warm=0)
+    return scenarios
@@ -0,0 +1,207 @@
+# backend/benchmarks/seed.py
+"""
+Заполнение БД синтетическими данными для бенчмарков: пользователи, мелкие
+графы для каталога, графы заданных размеров (100 ... 50 000 узлов), граф
+для сценария редактирования, оценки, комментарии и прогресс. Данные
+полностью определяются random_seed, поэтому прогоны на разных машинах и
+ветках сравнимы. Результат - манифест (id графов, имена пользователей,
+поисковые слова), по которому scenarios.py строит запросы.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.core.config import GRAPH_IMPORT_BATCH_SIZE
+from backend.core.security import get_password_hash
+from backend.crud import node_crud, rating_crud, search_crud
+from backend.db.migrations import run_migrations
+from backend.db.session import AsyncSessionLocal, engine
+from backend.models.graph_model import Graph, Node, Edge, UserProgress, GraphRating, Comment
+from backend.models.user_model import User
+
+BENCH_PASSWORD = "bench-password"
+USERNAME_PREFIX = "bench_user_"
+
+# Словарь для названий и текстов: слова повторяются, поэтому поиск находит много совпадений
+_WORDS = (
+    "algebra", "geometry", "calculus", "statistics", "physics", "chemistry", "biology", "history",
+    "grammar", "music", "python", "network", "database", "compiler", "graphs", "probability",
+    "optics", "genetics", "economics", "logic", "topology", "mechanics", "ecology", "poetry",
+)
+SEARCH_TERMS = ("algebra", "graphs", "python", "statistics")
+
+# Сколько предшествующих узлов рассматривается как предпосылки нового узла
+_PREREQUISITE_WINDOW = 50
+
+
+def _new_id(rng: random.Random) -> uuid.UUID:
+    """
+    Детерминированный UUID4. Колонка UUID в SQLite получает NUMERIC affinity,
+    и hex из одних цифр (с одной 'e') сохранился бы как число, поэтому такие
+    значения пропускаются.
+    """
+    while True:
+        value = uuid.UUID(int=rng.getrandbits(128), version=4)
+        try:
+            float(value.hex)
+        except ValueError:
+            return value
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+class _Seeder:
+    def __init__(self, db: AsyncSession, rng: random.Random):
+        self.db = db
+        self.rng = rng
+        self.graph_docs: List[dict] = []
+
+    async def insert_batched(self, model, rows: Sequence[dict]) -> None:
+        for start in range(0, len(rows), GRAPH_IMPORT_BATCH_SIZE):
+            await self.db.execute(insert(model), rows[start:start + GRAPH_IMPORT_BATCH_SIZE])
+
+    async def create_graph(
+        self, owner_id: uuid.UUID, node_count: int, created_at: datetime, name: str
+    ) -> Tuple[uuid.UUID, List[uuid.UUID]]:
+        """Граф-DAG из node_count узлов: у каждого узла 1-2 предпосылки среди недавних узлов."""
+        rng = self.rng
+        graph_id = _new_id(rng)
+        description = _text(rng, 12)
+        await self.db.execute(insert(Graph), [{
+            "id": graph_id, "name": name, "description": description,
+            "owner_id": owner_id, "created_at": created_at,
+        }])
+        self.graph_docs.append({
+            "kind": "graph", "entity_id": graph_id, "graph_id": graph_id, "title": name, "body": description,
+        })
+
+        node_ids = [_new_id(rng) for _ in range(node_count)]
+        columns = max(1, int(node_count ** 0.5))
+        nodes = [{
+            "id": node_id, "graph_id": graph_id, "name": f"{rng.choice(_WORDS).title()} {index}",
+            "content": _text(rng, 20),
+            "position_x": float(index % columns) * 120.0, "position_y": float(index // columns) * 80.0,
+        } for index, node_id in enumerate(node_ids)]
+        for start in range(0, len(nodes), GRAPH_IMPORT_BATCH_SIZE):
+            batch = nodes[start:start + GRAPH_IMPORT_BATCH_SIZE]
+            await node_crud.insert_nodes(self.db, batch)
+            await search_crud.index_new_nodes(self.db, batch)
+
+        edges = []
+        for index in range(1, node_count):
+            window = range(max(0, index - _PREREQUISITE_WINDOW), index)
+            for source in rng.sample(window, min(len(window), rng.randint(1, 2))):
+                edges.append({
+                    "id": _new_id(rng), "graph_id": graph_id,
+                    "source_node_id": node_ids[source], "target_node_id": node_ids[index],
+                })
+        await self.insert_batched(Edge, edges)
+        return graph_id, node_ids
+
+
+async def seed_database(
+    users: int = 200,
+    sizes: Sequence[int] = (100, 1000, 10000, 50000),
+    catalog_graphs: int = 500,
+    editor_graph_nodes: int = 200,
+    ratings_per_graph: int = 20,
+    comments_per_graph: int = 5,
+    progress_users: int = 20,
+    progress_fraction: float = 0.3,
+    random_seed: int = 1,
+) -> Dict:
+    """
+    Создает схему и заполняет пустую БД. Графы размеров sizes и граф
+    редактора принадлежат первому пользователю, прогресс по ним отмечают
+    следующие progress_users пользователей. Возвращает манифест.
+    """
+    if users < progress_users + 2:
+        raise ValueError("users must exceed progress_users by at least 2")
+    rng = random.Random(random_seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(run_migrations)
+
+    async with AsyncSessionLocal() as db:
+        existing = await db.execute(select(User.id).where(User.username == f"{USERNAME_PREFIX}0"))
+        if existing.first() is not None:
+            raise ValueError("The database is already seeded; use a fresh database")
+        seeder = _Seeder(db, rng)
+
+        # Хэш один на всех: bcrypt для тысяч пользователей занял бы минуты
+        password_hash = get_password_hash(BENCH_PASSWORD)
+        usernames = [f"{USERNAME_PREFIX}{i}" for i in range(users)]
+        user_ids = [_new_id(rng) for _ in range(users)]
+        await seeder.insert_batched(User, [
+            {"id": user_id, "username": username, "password_hash": password_hash}
+            for user_id, username in zip(user_ids, usernames)
+        ])
+
+        now = datetime.utcnow()
+        graph_owners: Dict[uuid.UUID, uuid.UUID] = {}
+        for i in range(catalog_graphs):
+            owner_id = rng.choice(user_ids)
+            name = f"{_text(rng, 2).title()} {i}"
+            graph_id, _ = await seeder.create_graph(owner_id, rng.randint(5, 30), now - timedelta(minutes=i + 1), name)
+            graph_owners[graph_id] = owner_id
+
+        editor_id = user_ids[0]
+        sized_graphs: Dict[str, str] = {}
+        sized_nodes: Dict[uuid.UUID, List[uuid.UUID]] = {}
+        for size in sizes:
+            graph_id, node_ids = await seeder.create_graph(editor_id, size, now, f"Benchmark {size} nodes")
+            sized_graphs[str(size)] = str(graph_id)
+            sized_nodes[graph_id] = node_ids
+            graph_owners[graph_id] = editor_id
+        editor_graph_id, editor_nodes = await seeder.create_graph(editor_id, editor_graph_nodes, now, "Benchmark editor")
+        graph_owners[editor_graph_id] = editor_id
+        await search_crud.get_backend(db).upsert_documents(db, seeder.graph_docs)
+
+        ratings, comments = [], []
+        for graph_id, owner_id in graph_owners.items():
+            voters = rng.sample(user_ids[1:], min(ratings_per_graph, users - 1))
+            ratings.extend(
+                {"user_id": voter, "graph_id": graph_id, "value": 1 if rng.random() < 0.75 else -1}
+                for voter in voters if voter != owner_id
+            )
+            comments.extend({
+                "id": _new_id(rng), "graph_id": graph_id, "owner_id": rng.choice(user_ids),
+                "content": _text(rng, 15), "created_at": now - timedelta(seconds=rng.randint(0, 86400)),
+            } for _ in range(comments_per_graph))
+        await seeder.insert_batched(GraphRating, ratings)
+        await seeder.insert_batched(Comment, comments)
+
+        progress = []
+        for graph_id, node_ids in sized_nodes.items():
+            for user_id in user_ids[1:progress_users + 1]:
+                progress.extend(
+                    {"user_id": user_id, "node_id": node_id, "graph_id": graph_id}
+                    for node_id in rng.sample(node_ids, int(len(node_ids) * progress_fraction))
+                )
+        await seeder.insert_batched(UserProgress, progress)
+        await db.commit()
+        # Счетчики likes/dislikes/score графов выводятся из вставленных голосов
+        await rating_crud.reconcile_graph_ratings(db)
+
+    return {
+        "password": BENCH_PASSWORD,
+        "editor": usernames[0],
+        "readers": usernames[1:progress_users + 1],
+        "users": usernames,
+        "graphs": sized_graphs,
+        "editor_graph": str(editor_graph_id),
+        "editor_nodes": [str(node_id) for node_id in editor_nodes],
+        "search_terms": list(SEARCH_TERMS),
+        "params": {
+            "users": users, "sizes": list(sizes), "catalog_graphs": catalog_graphs,
+            "editor_graph_nodes": editor_graph_nodes, "ratings_per_graph": ratings_per_graph,
+            "comments_per_graph": comments_per_graph, "progress_users": progress_users,
+            "progress_fraction": progress_fraction, "random_seed": random_seed,
+        },
+    }
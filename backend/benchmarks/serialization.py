@@ -0,0 +1,112 @@
+# backend/benchmarks/serialization.py
+"""
+Микробенчмарк сериализации без БД и HTTP: ответ read_graph для графов
+разных размеров и страница каталога, собранные тремя способами:
+  pydantic      - валидация схемой ответа и model_dump_json (путь response_model);
+  direct_stdlib - прямое кодирование строк в формат Cytoscape через stdlib json;
+  direct_orjson - то же через orjson (если установлен).
+Время - медиана repeat прогонов в миллисекундах.
+"""
+import statistics
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, Sequence
+
+from backend.core import json_codec
+from backend.core.graph_cache import encode_graph_elements
+from backend.schemas.graph_base_schemas import PaginatedGraphs, graph_in_list_dict
+from backend.schemas.graph_schema import GraphDetail
+
+
+def _median_ms(func: Callable[[], bytes], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def _graph_rows(size: int):
+    nodes = [
+        SimpleNamespace(id=uuid.uuid4(), name=f"Узел {i}", position_x=float(i % 200) * 120.0,
+                        position_y=float(i // 200) * 80.0)
+        for i in range(size)
+    ]
+    edges = [
+        SimpleNamespace(id=uuid.uuid4(), source_node_id=nodes[i - 1].id, target_node_id=nodes[i].id)
+        for i in range(1, size)
+    ]
+    return nodes, edges
+
+
+def _graph_header(size: int) -> dict:
+    return {
+        "id": uuid.uuid4(), "name": f"Граф {size}", "description": "Синтетический граф",
+        "created_at": datetime(2024, 1, 1, 12, 0, 0, 123456),
+        "owner": {"id": uuid.uuid4(), "username": "bench_user_0"},
+        "learned_node_ids": [], "likes": 10, "dislikes": 2, "my_vote": 0, "revision": 1,
+    }
+
+
+def _render(dumps: Callable, header: dict, elements: bytes) -> bytes:
+    # Как render_graph_detail, но с явно выбранной реализацией
+    return dumps(header)[:-1] + b',"elements":' + elements + b"}"
+
+
+def bench_read_graph(size: int, repeat: int) -> Dict[str, float]:
+    nodes, edges = _graph_rows(size)
+    header = _graph_header(size)
+    elements = [
+        {"group": "nodes", "data": {"id": str(n.id), "label": n.name}, "position": {"x": n.position_x, "y": n.position_y}}
+        for n in nodes
+    ] + [
+        {"group": "edges", "data": {"id": str(e.id), "source": str(e.source_node_id), "target": str(e.target_node_id)}}
+        for e in edges
+    ]
+    results = {
+        "pydantic_ms": _median_ms(
+            lambda: GraphDetail.model_validate({**header, "elements": elements}).model_dump_json().encode("utf-8"), repeat),
+        "direct_stdlib_ms": _median_ms(
+            lambda: _render(json_codec.stdlib_dumps, header, json_codec.stdlib_dumps(elements)), repeat),
+    }
+    if json_codec.ORJSON_AVAILABLE:
+        results["direct_orjson_ms"] = _median_ms(
+            lambda: _render(json_codec.orjson_dumps, header, json_codec.orjson_dumps(elements)), repeat)
+    # Построение элементов из строк (промах кэша структуры графа) в текущем режиме
+    results["encode_rows_ms"] = _median_ms(lambda: encode_graph_elements(nodes, edges), repeat)
+    results["bytes"] = len(_render(json_codec.stdlib_dumps, header, json_codec.stdlib_dumps(elements)))
+    return results
+
+
+def bench_catalog_page(page_size: int, repeat: int) -> Dict[str, float]:
+    graphs = [
+        SimpleNamespace(
+            id=uuid.uuid4(), name=f"Граф {i}", description="Описание графа " * 5,
+            created_at=datetime(2024, 1, 1, 12, 0, i % 60), likes=i, dislikes=i // 3,
+            owner=SimpleNamespace(id=uuid.uuid4(), username=f"bench_user_{i}"),
+        )
+        for i in range(page_size)
+    ]
+    page = {"total": 1000, "graphs": graphs, "next_cursor": None}
+
+    def direct(dumps):
+        return lambda: dumps({
+            "total": page["total"], "graphs": [graph_in_list_dict(graph) for graph in graphs], "next_cursor": None,
+        })
+
+    results = {
+        "pydantic_ms": _median_ms(lambda: PaginatedGraphs.model_validate(page).model_dump_json().encode("utf-8"), repeat),
+        "direct_stdlib_ms": _median_ms(direct(json_codec.stdlib_dumps), repeat),
+    }
+    if json_codec.ORJSON_AVAILABLE:
+        results["direct_orjson_ms"] = _median_ms(direct(json_codec.orjson_dumps), repeat)
+    return results
+
+
+def run_serialization_benchmark(sizes: Sequence[int], repeat: int, page_size: int = 10) -> Dict[str, dict]:
+    results = {f"read_graph_{size}": bench_read_graph(size, repeat) for size in sizes}
+    results[f"catalog_page_{page_size}"] = bench_catalog_page(page_size, repeat * 20)
+    return results
@@ -0,0 +1,109 @@
+# backend/cli.py
+"""
+Служебные команды для обслуживания базы данных.
+Запуск из корня репозитория: python -m backend.cli <команда>
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+
+from backend.db.session import AsyncSessionLocal, engine
+from backend.db.migrations import run_migrations
+from backend.crud import rating_crud, graph_crud, transfer_crud, user_crud, change_crud
+from backend.core.graph_io import GraphFormatError
+
+# Размер куска при чтении файла импорта
+_READ_CHUNK_BYTES = 1024 * 1024
+
+
+async def reconcile_ratings() -> None:
+    async with AsyncSessionLocal() as db:
+        updated = await rating_crud.reconcile_graph_ratings(db)
+    print(f"Счетчики оценок пересчитаны для {updated} графов.")
+
+
+async def migrate() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(run_migrations)
+    print("Миграции схемы применены.")
+
+
+async def compact_changes() -> None:
+    async with AsyncSessionLocal() as db:
+        removed = await change_crud.compact_all_changes(db)
+    print(f"Журналы изменений графов сжаты, удалено записей: {removed}.")
+
+
+async def export_graph(graph_id: uuid.UUID, fmt: str, output: str) -> None:
+    async with AsyncSessionLocal() as db:
+        header = await graph_crud.get_graph_header(db, graph_id=graph_id)
+        if header is None:
+            sys.exit(f"Граф {graph_id} не найден.")
+        out = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            async for chunk in transfer_crud.export_graph(db, header, fmt):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    print(f"Граф {graph_id} выгружен.", file=sys.stderr)
+
+
+async def import_graph(path: str, owner: str) -> None:
+    async def read_chunks():
+        with open(path, "rb") as f:
+            while chunk := f.read(_READ_CHUNK_BYTES):
+                yield chunk
+
+    async with AsyncSessionLocal() as db:
+        user = await user_crud.get_user_by_username(db, username=owner)
+        if user is None:
+            sys.exit(f"Пользователь {owner} не найден.")
+        try:
+            graph = await transfer_crud.import_graph(db, owner_id=user.id, chunks=read_chunks())
+        except GraphFormatError as e:
+            sys.exit(f"Ошибка в файле: {e}")
+    print(f"Граф импортирован: {graph.id}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend.cli", description="Taideteos maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser(
+        "reconcile-ratings",
+        help="Пересчитать likes/dislikes/score графов по таблице graph_ratings"
+    )
+
+    subparsers.add_parser("migrate", help="Применить недостающие миграции схемы БД")
+
+    subparsers.add_parser(
+        "compact-changes",
+        help="Сжать журналы изменений графов (то же делается на каждой GRAPH_CHANGES_COMPACT_EVERY-й ревизии)"
+    )
+
+    export_parser = subparsers.add_parser("export-graph", help="Выгрузить граф в файл (JSON Lines или бинарный формат)")
+    export_parser.add_argument("graph_id", type=uuid.UUID)
+    export_parser.add_argument("--format", choices=transfer_crud.EXPORT_FORMATS, default="jsonl")
+    export_parser.add_argument("-o", "--output", default="-", help="Путь к файлу ('-' - стандартный вывод)")
+
+    import_parser = subparsers.add_parser("import-graph", help="Создать граф из файла экспорта (формат определяется автоматически)")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--owner", required=True, help="Имя пользователя-владельца нового графа")
+
+    args = parser.parse_args()
+    if args.command == "reconcile-ratings":
+        asyncio.run(reconcile_ratings())
+    elif args.command == "migrate":
+        asyncio.run(migrate())
+    elif args.command == "compact-changes":
+        asyncio.run(compact_changes())
+    elif args.command == "export-graph":
+        asyncio.run(export_graph(args.graph_id, args.format, args.output))
+    elif args.command == "import-graph":
+        asyncio.run(import_graph(args.path, args.owner))
+
+
+if __name__ == "__main__":
+    main()
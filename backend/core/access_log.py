@@ -0,0 +1,109 @@
+# backend/core/access_log.py
+"""
+Журнал HTTP-запросов (логгер backend.access) и корреляция логов по запросу.
+Каждый запрос получает request_id (из заголовка X-Request-ID или новый),
+который попадает во все записи логов, сделанные во время запроса, и
+возвращается клиенту в ответе. Частые маршруты пишутся в журнал выборочно.
+"""
+import logging
+import random
+import re
+import time
+import uuid
+from typing import Dict, Optional
+
+from backend.core.logging_setup import request_id_var
+
+access_logger = logging.getLogger("backend.access")
+
+# Принимаем id запроса от прокси, только если он похож на идентификатор
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def parse_sample_rules(spec: str) -> Dict[str, float]:
+    """
+    Разбирает "read_graph=0.1,/js=0.01" в словарь имя маршрута (или префикс пути) -> доля.
+    Пустые элементы пропускаются; элемент без имени или с долей вне [0, 1] - ValueError,
+    чтобы опечатка в LOG_ACCESS_SAMPLE_RULES не отключала журнал молча.
+    """
+    rules = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, rate = (part.strip() for part in item.partition("="))
+        try:
+            value = float(rate) if sep and name else None
+        except ValueError:
+            value = None
+        if value is None or not 0.0 <= value <= 1.0:
+            raise ValueError(f"Invalid access log sample rule '{item}' (expected name=rate, 0 <= rate <= 1)")
+        rules[name] = value
+    return rules
+
+
+class AccessLogMiddleware:
+    """
+    ASGI-middleware (без BaseHTTPMiddleware, чтобы не буферизовать потоковые
+    ответы). Решение о записи принимается после ответа, когда известен
+    маршрут: ошибки 5xx и запросы дольше slow_ms пишутся всегда, остальные -
+    с вероятностью из sample_rules по имени маршрута (для запросов без
+    маршрута, например статики, - по первому сегменту пути) или sample_rate.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, sample_rules: Optional[Dict[str, float]] = None,
+                 slow_ms: float = 500.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.sample_rules = sample_rules or {}
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not _REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            self._log(scope, status_code, (time.perf_counter() - started) * 1000)
+            request_id_var.reset(token)
+
+    def _log(self, scope, status_code: int, duration_ms: float) -> None:
+        route = getattr(scope.get("route"), "name", None)
+        rule_key = route if route is not None else "/" + scope["path"].lstrip("/").partition("/")[0]
+        if status_code >= 500:
+            level = logging.ERROR
+        elif duration_ms >= self.slow_ms:
+            level = logging.WARNING
+        else:
+            if random.random() >= self.sample_rules.get(rule_key, self.sample_rate):
+                return
+            level = logging.INFO
+        if not access_logger.isEnabledFor(level):
+            return
+        access_logger.log(
+            level, "%s %s %d %.1fms", scope["method"], scope["path"], status_code, duration_ms,
+            extra={
+                "method": scope["method"], "path": scope["path"], "route": route,
+                "status": status_code, "duration_ms": round(duration_ms, 2),
+            },
+        )
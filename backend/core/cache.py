@@ -0,0 +1,89 @@
+# backend/core/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Небольшой in-process кэш с ограничением по времени жизни записей
+    и по их количеству (вытесняются давно не использованные).
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Счетчики обращений (для метрик)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RevisionCache:
+    """
+    LRU-кэш значений, построенных по определенной ревизии графа.
+    Запись с другой ревизией считается устаревшей и удаляется при обращении.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, revision: int) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != revision:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, revision: int, value: Any) -> None:
+        self._entries[key] = (revision, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self._entries.values()]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
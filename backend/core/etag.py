@@ -0,0 +1,48 @@
+# backend/core/etag.py
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Клиент может хранить ответ, но обязан перепроверять его при каждом запросе
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Строит сильный ETag из произвольных частей (ревизий, идентификаторов и т.п.)."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверяет, совпадает ли ETag с одним из перечисленных в If-None-Match."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Для If-None-Match используется слабое сравнение: префикс W/ игнорируется
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+
+def cache_headers(etag: str, vary: Optional[str] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(etag: str, vary: Optional[str] = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, vary))
+
+
+def json_response_with_etag(request: Request, body: bytes, vary: Optional[str] = None) -> Response:
+    """
+    Отдает готовый JSON с ETag, вычисленным по его содержимому,
+    или 304, если у клиента уже есть эта версия.
+    """
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    if etag_matches(request, etag):
+        return not_modified(etag, vary)
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag, vary))
@@ -0,0 +1,184 @@
+# backend/core/graph_analysis.py
+"""
+Анализ графа знаний: ребро source -> target означает, что source - пререквизит target.
+Структура графа хранится в памяти в виде сжатых списков смежности (CSR) по
+порядковым номерам узлов из NodeOrdinals и строится один раз на ревизию графа.
+"""
+import uuid
+from array import array
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+from backend.core.cache import RevisionCache
+from backend.core.config import GRAPH_TOPOLOGY_CACHE_MAX_ENTRIES
+from backend.core.progress_bitmap import NodeOrdinals
+
+
+def _build_csr(node_count: int, sources: array, targets: array) -> Tuple[array, array]:
+    """Списки смежности: соседи узла i - adjacency[offsets[i]:offsets[i + 1]]."""
+    offsets = array("l", [0]) * (node_count + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+    adjacency = array("l", [0]) * len(sources)
+    cursor = offsets[:-1]
+    for source, target in zip(sources, targets):
+        adjacency[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, adjacency
+
+
+def is_acyclic(node_count: int, sources: array, targets: array) -> bool:
+    """Нет ли циклов в графе, заданном массивами номеров концов ребер (алгоритм Кана)."""
+    offsets, adjacency = _build_csr(node_count, sources, targets)
+    in_degree = array("l", [0]) * node_count
+    for target in targets:
+        in_degree[target] += 1
+    stack = [i for i in range(node_count) if in_degree[i] == 0]
+    visited = 0
+    while stack:
+        node = stack.pop()
+        visited += 1
+        for k in range(offsets[node], offsets[node + 1]):
+            target = adjacency[k]
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                stack.append(target)
+    return visited == node_count
+
+
+class GraphTopology:
+    """Неизменяемая структура пререквизитов одной ревизии графа."""
+
+    def __init__(self, ordinals: NodeOrdinals, edges: Iterable[Tuple[uuid.UUID, uuid.UUID]]):
+        self.ordinals = ordinals
+        index_of = ordinals.index_of
+        sources, targets = array("l"), array("l")
+        for source_id, target_id in edges:
+            source, target = index_of(source_id), index_of(target_id)
+            if source is not None and target is not None:
+                sources.append(source)
+                targets.append(target)
+        self.edge_count = len(sources)
+        self._out_offsets, self._out_targets = _build_csr(len(ordinals), sources, targets)
+        self._in_offsets, self._in_sources = _build_csr(len(ordinals), targets, sources)
+        self._order: Optional[List[int]] = None
+        self._order_computed = False
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def successors(self, node: int) -> array:
+        return self._out_targets[self._out_offsets[node]:self._out_offsets[node + 1]]
+
+    def predecessors(self, node: int) -> array:
+        return self._in_sources[self._in_offsets[node]:self._in_offsets[node + 1]]
+
+    def topological_order(self) -> Optional[List[int]]:
+        """Порядок изучения (алгоритм Кана) или None, если в графе есть цикл."""
+        if not self._order_computed:
+            in_degree = array("l", (self._in_offsets[i + 1] - self._in_offsets[i] for i in range(len(self))))
+            queue = deque(i for i in range(len(self)) if in_degree[i] == 0)
+            order = []
+            while queue:
+                node = queue.popleft()
+                order.append(node)
+                for target in self.successors(node):
+                    in_degree[target] -= 1
+                    if in_degree[target] == 0:
+                        queue.append(target)
+            self._order = order if len(order) == len(self) else None
+            self._order_computed = True
+        return self._order
+
+    def reaches(self, start: int, goal: int) -> bool:
+        """Есть ли путь из start в goal по направлению ребер."""
+        if start == goal:
+            return True
+        seen = bytearray(len(self))
+        seen[start] = 1
+        stack = [start]
+        while stack:
+            for target in self.successors(stack.pop()):
+                if target == goal:
+                    return True
+                if not seen[target]:
+                    seen[target] = 1
+                    stack.append(target)
+        return False
+
+    def would_create_cycle(self, source: int, target: int) -> bool:
+        """Создаст ли новое ребро source -> target цикл (включая петлю)."""
+        return self.reaches(target, source)
+
+    def ancestors(self, node: int) -> List[int]:
+        """Все транзитивные пререквизиты узла, в порядке изучения, если он определен."""
+        return self.in_learning_order(self._collect(node, self._in_offsets, self._in_sources))
+
+    def descendants(self, node: int) -> List[int]:
+        """Все узлы, для которых узел является транзитивным пререквизитом."""
+        return self.in_learning_order(self._collect(node, self._out_offsets, self._out_targets))
+
+    def in_learning_order(self, nodes: List[int]) -> List[int]:
+        """Упорядочивает узлы по порядку изучения (или по номеру, если в графе есть цикл)."""
+        order = self.topological_order()
+        if order is None or not nodes:
+            return sorted(nodes)
+        selected = bytearray(len(self))
+        for node in nodes:
+            selected[node] = 1
+        return [i for i in order if selected[i]]
+
+    def _collect(self, node: int, offsets: array, adjacency: array) -> List[int]:
+        seen = bytearray(len(self))
+        stack = [node]
+        found = []
+        while stack:
+            current = stack.pop()
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbour = adjacency[k]
+                if not seen[neighbour]:
+                    seen[neighbour] = 1
+                    found.append(neighbour)
+                    stack.append(neighbour)
+        return found
+
+    def next_unlockable(self, learned_bitmap: bytes) -> List[int]:
+        """
+        Неизученные узлы, все прямые пререквизиты которых уже изучены.
+        learned_bitmap - битовая карта прогресса по тем же порядковым номерам.
+        """
+        learned = bytearray(len(self))
+        for i in self.ordinals.decode_ordinals(learned_bitmap):
+            learned[i] = 1
+        offsets, sources = self._in_offsets, self._in_sources
+        unlockable = []
+        for i in range(len(self)):
+            if learned[i]:
+                continue
+            for k in range(offsets[i], offsets[i + 1]):
+                if not learned[sources[k]]:
+                    break
+            else:
+                unlockable.append(i)
+        return unlockable
+
+    def edge_list(self) -> Tuple[List[int], List[int]]:
+        """Ребра в виде двух списков номеров (source, target)."""
+        sources = [node for node in range(len(self)) for _ in range(self._out_offsets[node + 1] - self._out_offsets[node])]
+        return sources, self._out_targets.tolist()
+
+    def memory_bytes(self) -> int:
+        """Примерный объем массивов смежности."""
+        return sum(
+            arr.itemsize * len(arr)
+            for arr in (self._out_offsets, self._out_targets, self._in_offsets, self._in_sources)
+        )
+
+    def node_ids(self, ordinals: Iterable[int]) -> List[uuid.UUID]:
+        ids = self.ordinals.node_ids
+        return [ids[i] for i in ordinals]
+
+
+topology_cache = RevisionCache(max_entries=GRAPH_TOPOLOGY_CACHE_MAX_ENTRIES)
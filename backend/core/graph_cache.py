@@ -0,0 +1,97 @@
+# backend/core/graph_cache.py
+import uuid
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple
+
+from backend.core import json_codec
+from backend.core.config import GRAPH_CACHE_MAX_BYTES, GRAPH_CACHE_MAX_ENTRIES
+
+
+def encode_graph_elements(nodes: Iterable[Any], edges: Iterable[Any]) -> bytes:
+    """
+    Сериализует узлы и ребра графа в JSON-массив элементов Cytoscape.
+    Принимает строки с полями (id, name, position_x, position_y) для узлов
+    и (id, source_node_id, target_node_id) для ребер.
+    """
+    uuid_value = json_codec.uuid_value
+    elements = [{
+        "group": "nodes",
+        "data": {"id": uuid_value(node.id), "label": node.name},
+        "position": {"x": node.position_x, "y": node.position_y},
+    } for node in nodes]
+    elements.extend({
+        "group": "edges",
+        "data": {
+            "id": uuid_value(edge.id), "source": uuid_value(edge.source_node_id),
+            "target": uuid_value(edge.target_node_id),
+        },
+    } for edge in edges)
+    return json_codec.dumps(elements)
+
+
+def render_graph_detail(header: dict, elements_blob: bytes) -> bytes:
+    """
+    Собирает итоговый JSON ответа GraphDetail: сериализует "шапку" графа
+    (данные, зависящие от пользователя) и вклеивает в нее готовый блоб элементов.
+    UUID и datetime в header кодируются как строки. Так же собирается ответ
+    GraphChanges с блобом только измененных элементов.
+    """
+    head = json_codec.dumps(header)
+    return head[:-1] + b',"elements":' + elements_blob + b"}"
+
+
+class GraphStructureCache:
+    """
+    LRU-кэш сериализованных элементов графа, ограниченный числом записей
+    и суммарным размером в байтах. Запись действительна только для той
+    ревизии графа, с которой была сохранена.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.current_bytes = 0
+        self._entries: "OrderedDict[uuid.UUID, Tuple[int, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, graph_id: uuid.UUID, revision: int) -> Optional[bytes]:
+        entry = self._entries.get(graph_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        cached_revision, blob = entry
+        if cached_revision != revision:
+            # Граф изменился - устаревшая запись больше не понадобится
+            self.invalidate(graph_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(graph_id)
+        self.hits += 1
+        return blob
+
+    def put(self, graph_id: uuid.UUID, revision: int, blob: bytes) -> None:
+        # Слишком большой граф не кэшируем, чтобы он не вытеснил все остальные
+        if len(blob) > self.max_bytes:
+            return
+        self.invalidate(graph_id)
+        self._entries[graph_id] = (revision, blob)
+        self.current_bytes += len(blob)
+        while self._entries and (len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted)
+
+    def invalidate(self, graph_id: uuid.UUID) -> None:
+        entry = self._entries.pop(graph_id, None)
+        if entry is not None:
+            self.current_bytes -= len(entry[1])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+graph_cache = GraphStructureCache(max_bytes=GRAPH_CACHE_MAX_BYTES, max_entries=GRAPH_CACHE_MAX_ENTRIES)
@@ -0,0 +1,247 @@
+# backend/core/graph_io.py
+"""
+Форматы импорта/экспорта графа целиком. Граф - поток записей:
+сначала одна запись "graph", затем все "node", затем все "edge".
+
+JSON Lines (application/x-ndjson), по объекту на строку:
+    {"type": "graph", "version": 1, "name": "...", "description": "..."}
+    {"type": "node", "id": "...", "name": "...", "content": "...", "x": 0.0, "y": 0.0}
+    {"type": "edge", "source": "<id узла>", "target": "<id узла>"}
+id узлов в файле - произвольные строки (при экспорте - UUID), при импорте
+узлы получают новые UUID.
+
+Бинарный формат (application/octet-stream): заголовок b"TDGR" + версия (1 байт),
+затем записи: тег (1 байт) и поля. Строки - длина varint + UTF-8, необязательные
+строки - длина + 1 (0 означает null), UUID - 16 байт, координаты - два float64
+little-endian (NaN означает null).
+
+Оба читателя инкрементальные: принимают поток произвольных кусков байтов
+и возвращают только полностью прочитанные записи.
+"""
+import json
+import math
+import struct
+import uuid
+from typing import List, Optional
+
+BINARY_MAGIC = b"TDGR"
+FORMAT_VERSION = 1
+
+_TAG_GRAPH, _TAG_NODE, _TAG_EDGE = 1, 2, 3
+_COORDS = struct.Struct("<dd")
+
+# Не даем одной строке JSONL или одной строке бинарной записи занять всю память
+MAX_RECORD_BYTES = 16 * 1024 * 1024
+
+
+class GraphFormatError(ValueError):
+    """Файл графа поврежден или не соответствует формату."""
+
+
+# --- Запись ---
+
+def encode_jsonl(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return _varint(len(data)) + data
+
+
+def _optional_string(value: Optional[str]) -> bytes:
+    if value is None:
+        return b"\x00"
+    data = value.encode("utf-8")
+    return _varint(len(data) + 1) + data
+
+
+def _coord(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def encode_binary(record: dict) -> bytes:
+    kind = record["type"]
+    if kind == "graph":
+        return bytes([_TAG_GRAPH]) + _string(record["name"]) + _optional_string(record.get("description"))
+    if kind == "node":
+        return (
+            bytes([_TAG_NODE]) + uuid.UUID(str(record["id"])).bytes + _string(record["name"])
+            + _optional_string(record.get("content"))
+            + _COORDS.pack(_coord(record.get("x")), _coord(record.get("y")))
+        )
+    if kind == "edge":
+        return bytes([_TAG_EDGE]) + uuid.UUID(str(record["source"])).bytes + uuid.UUID(str(record["target"])).bytes
+    raise ValueError(f"Unknown record type '{kind}'")
+
+
+def binary_header() -> bytes:
+    return BINARY_MAGIC + bytes([FORMAT_VERSION])
+
+
+# --- Чтение ---
+
+class JsonLinesReader:
+    """Инкрементальный разбор JSON Lines."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[dict]:
+        self._buffer += chunk
+        records = []
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", start)
+            if end == -1:
+                break
+            line = bytes(self._buffer[start:end]).strip()
+            start = end + 1
+            if line:
+                records.append(self._parse(line))
+        del self._buffer[:start]
+        if len(self._buffer) > MAX_RECORD_BYTES:
+            raise GraphFormatError("Line is too long")
+        return records
+
+    def close(self) -> List[dict]:
+        line = bytes(self._buffer).strip()
+        self._buffer.clear()
+        return [self._parse(line)] if line else []
+
+    @staticmethod
+    def _parse(line: bytes) -> dict:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise GraphFormatError(f"Invalid JSON line: {e}")
+        if not isinstance(record, dict) or record.get("type") not in ("graph", "node", "edge"):
+            raise GraphFormatError("Every line must be an object with type graph, node or edge")
+        return record
+
+
+class _Incomplete(Exception):
+    pass
+
+
+class BinaryReader:
+    """Инкрементальный разбор бинарного формата."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._header_read = False
+
+    def feed(self, chunk: bytes) -> List[dict]:
+        self._buffer += chunk
+        if not self._header_read:
+            if len(self._buffer) < len(BINARY_MAGIC) + 1:
+                return []
+            if bytes(self._buffer[:len(BINARY_MAGIC)]) != BINARY_MAGIC:
+                raise GraphFormatError("Not a binary graph file")
+            if self._buffer[len(BINARY_MAGIC)] != FORMAT_VERSION:
+                raise GraphFormatError(f"Unsupported format version {self._buffer[len(BINARY_MAGIC)]}")
+            del self._buffer[:len(BINARY_MAGIC) + 1]
+            self._header_read = True
+
+        records = []
+        offset = 0
+        view = memoryview(self._buffer)
+        try:
+            while offset < len(view):
+                try:
+                    record, offset = self._read_record(view, offset)
+                except _Incomplete:
+                    break
+                records.append(record)
+        finally:
+            view.release()
+        del self._buffer[:offset]
+        if len(self._buffer) > MAX_RECORD_BYTES:
+            raise GraphFormatError("Record is too long")
+        return records
+
+    def close(self) -> List[dict]:
+        if self._buffer or not self._header_read:
+            raise GraphFormatError("Unexpected end of file")
+        return []
+
+    def _read_record(self, view: memoryview, offset: int):
+        tag = view[offset]
+        offset += 1
+        if tag == _TAG_GRAPH:
+            name, offset = self._read_string(view, offset)
+            description, offset = self._read_optional_string(view, offset)
+            return {"type": "graph", "name": name, "description": description}, offset
+        if tag == _TAG_NODE:
+            node_id, offset = self._read_bytes(view, offset, 16)
+            name, offset = self._read_string(view, offset)
+            content, offset = self._read_optional_string(view, offset)
+            coords, offset = self._read_bytes(view, offset, _COORDS.size)
+            x, y = _COORDS.unpack(coords)
+            return {
+                "type": "node", "id": str(uuid.UUID(bytes=node_id)), "name": name, "content": content,
+                "x": None if math.isnan(x) else x, "y": None if math.isnan(y) else y,
+            }, offset
+        if tag == _TAG_EDGE:
+            source, offset = self._read_bytes(view, offset, 16)
+            target, offset = self._read_bytes(view, offset, 16)
+            return {"type": "edge", "source": str(uuid.UUID(bytes=source)), "target": str(uuid.UUID(bytes=target))}, offset
+        raise GraphFormatError(f"Unknown record tag {tag}")
+
+    @staticmethod
+    def _read_bytes(view: memoryview, offset: int, size: int):
+        end = offset + size
+        if end > len(view):
+            raise _Incomplete()
+        return bytes(view[offset:end]), end
+
+    @staticmethod
+    def _read_varint(view: memoryview, offset: int):
+        value = shift = 0
+        while True:
+            if offset >= len(view):
+                raise _Incomplete()
+            byte = view[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value, offset
+            shift += 7
+            if shift > 63:
+                raise GraphFormatError("Invalid length")
+
+    def _read_string(self, view: memoryview, offset: int):
+        length, offset = self._read_varint(view, offset)
+        data, offset = self._read_bytes(view, offset, length)
+        return self._decode(data), offset
+
+    def _read_optional_string(self, view: memoryview, offset: int):
+        length, offset = self._read_varint(view, offset)
+        if length == 0:
+            return None, offset
+        data, offset = self._read_bytes(view, offset, length - 1)
+        return self._decode(data), offset
+
+    @staticmethod
+    def _decode(data: bytes) -> str:
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            raise GraphFormatError("Invalid UTF-8 string")
+
+
+def reader_for(first_bytes: bytes):
+    """Определяет формат по первым байтам файла."""
+    return BinaryReader() if first_bytes.startswith(BINARY_MAGIC) else JsonLinesReader()
@@ -0,0 +1,57 @@
+# backend/core/json_codec.py
+"""
+Сериализация JSON для ответов API. Обе реализации дают одинаковый компактный
+JSON (как JSONResponse: без пробелов, не-ASCII как есть) и сами кодируют
+UUID и datetime, поэтому jsonable_encoder перед ними не нужен. orjson
+используется при FAST_JSON_ENABLED и установленном пакете (extra "fast-json").
+"""
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any
+
+from backend.core.config import FAST_JSON_ENABLED
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def orjson_dumps(obj: Any) -> bytes:
+    if orjson is None:
+        raise RuntimeError("orjson is not installed")
+    return orjson.dumps(obj, default=_default)
+
+
+# Быстрый режим включается, только если orjson установлен
+FAST_JSON = FAST_JSON_ENABLED and ORJSON_AVAILABLE
+
+# Реализация выбирается один раз при импорте
+dumps = orjson_dumps if FAST_JSON else stdlib_dumps
+
+
+def _same(value: Any) -> Any:
+    return value
+
+
+# Подготовка UUID для массовой сериализации: orjson кодирует UUID сам и
+# быстрее, чем str(), а stdlib json быстрее получить готовую строку, чем
+# вызывать default= на каждое значение
+uuid_value = _same if FAST_JSON else str
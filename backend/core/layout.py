@@ -0,0 +1,209 @@
+# backend/core/layout.py
+"""
+Серверная авторасстановка узлов. Функции этого модуля выполняются в пуле
+процессов (LayoutPool): принимают и возвращают только простые типы
+(номера узлов, списки чисел), чтобы их можно было передать между процессами.
+
+- layered: слои по длине пути от корней (пререквизиты выше зависимых узлов),
+  порядок внутри слоя - эвристика барицентров для уменьшения пересечений.
+- force: силовой алгоритм Фрюхтермана-Рейнгольда, векторизованный на NumPy.
+"""
+import asyncio
+import functools
+import math
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+from backend.core.config import LAYOUT_WORKERS, LAYOUT_MAX_PENDING
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+# Силовой алгоритм доступен только с установленным numpy (extra "layout")
+FORCE_LAYOUT_AVAILABLE = np is not None
+
+Positions = Tuple[List[float], List[float]]
+
+
+def layered_layout(
+    node_count: int, sources: Sequence[int], targets: Sequence[int],
+    spacing_x: float = 160.0, spacing_y: float = 140.0, sweeps: int = 4
+) -> Positions:
+    """Послойная расстановка DAG сверху вниз; ребра, замыкающие циклы, игнорируются."""
+    successors: List[List[int]] = [[] for _ in range(node_count)]
+    predecessors: List[List[int]] = [[] for _ in range(node_count)]
+    for source, target in zip(sources, targets):
+        if source != target:
+            successors[source].append(target)
+            predecessors[target].append(source)
+
+    # Слой узла - длина самого длинного пути от корня (алгоритм Кана)
+    in_degree = [len(p) for p in predecessors]
+    layer = [0] * node_count
+    queue = deque(i for i in range(node_count) if in_degree[i] == 0)
+    placed = 0
+    while placed < node_count:
+        if not queue:
+            # Остались только узлы на циклах: разрываем цикл на узле с наименьшим номером
+            rest = next(i for i in range(node_count) if in_degree[i] > 0)
+            in_degree[rest] = 0
+            queue.append(rest)
+        node = queue.popleft()
+        placed += 1
+        for target in successors[node]:
+            if in_degree[target] > 0:
+                layer[target] = max(layer[target], layer[node] + 1)
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    queue.append(target)
+
+    layers: List[List[int]] = [[] for _ in range(max(layer, default=-1) + 1)]
+    for node in range(node_count):
+        layers[layer[node]].append(node)
+
+    # Барицентры: сортируем слой по среднему положению соседей в соседнем слое
+    position = [0.0] * node_count
+    for nodes in layers:
+        for index, node in enumerate(nodes):
+            position[node] = index
+    for sweep in range(sweeps):
+        downward = sweep % 2 == 0
+        order = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for layer_index in order:
+            nodes = layers[layer_index]
+            def barycenter(node: int) -> float:
+                neighbours = predecessors[node] if downward else successors[node]
+                return sum(position[n] for n in neighbours) / len(neighbours) if neighbours else position[node]
+            nodes.sort(key=barycenter)
+            for index, node in enumerate(nodes):
+                position[node] = index
+
+    xs = [0.0] * node_count
+    ys = [0.0] * node_count
+    for layer_index, nodes in enumerate(layers):
+        offset = (len(nodes) - 1) / 2
+        for index, node in enumerate(nodes):
+            xs[node] = (index - offset) * spacing_x
+            ys[node] = layer_index * spacing_y
+    return xs, ys
+
+
+def force_layout(
+    node_count: int, sources: Sequence[int], targets: Sequence[int],
+    initial: Optional[Positions] = None, iterations: int = 100,
+    spacing: float = 120.0, gravity: float = 0.05, seed: int = 0, block_size: int = 256
+) -> Positions:
+    """
+    Фрюхтерман-Рейнгольд: отталкивание всех пар узлов и притяжение по ребрам,
+    плюс слабое притяжение к центру, чтобы несвязанные узлы не улетали.
+    Попарные силы считаются блоками строк во float32, чтобы память была
+    O(block_size * N), а не O(N^2), и блок помещался в кэш процессора.
+    """
+    if np is None:
+        raise RuntimeError("Force-directed layout requires numpy")
+    if node_count == 0:
+        return [], []
+    rng = np.random.default_rng(seed)
+    if initial is not None:
+        pos = np.column_stack([np.asarray(initial[0], dtype=float), np.asarray(initial[1], dtype=float)])
+    else:
+        pos = np.zeros((node_count, 2))
+    # Узлы, сложенные в одну точку (обычно (0, 0) после импорта), разносим случайно
+    if node_count > 1 and np.ptp(pos, axis=0).max() < 1e-6:
+        pos = rng.uniform(-1.0, 1.0, size=(node_count, 2)) * spacing * math.sqrt(node_count)
+    src = np.asarray(sources, dtype=np.int64)
+    dst = np.asarray(targets, dtype=np.int64)
+
+    x = np.ascontiguousarray(pos[:, 0], dtype=np.float32)
+    y = np.ascontiguousarray(pos[:, 1], dtype=np.float32)
+    k_sq = np.float32(spacing * spacing)
+    temperature = spacing * math.sqrt(node_count)
+    cooling = temperature / (iterations + 1)
+    # Суммарное отталкивание растет с числом узлов, поэтому и притяжение к центру
+    pull_to_center = np.float32(gravity * math.sqrt(node_count))
+    for _ in range(iterations):
+        disp_x = np.zeros(node_count, dtype=np.float32)
+        disp_y = np.zeros(node_count, dtype=np.float32)
+        for start in range(0, node_count, block_size):
+            stop = min(start + block_size, node_count)
+            dx = x[start:stop, None] - x[None, :]
+            dy = y[start:stop, None] - y[None, :]
+            # Сила отталкивания k^2 / d вдоль (dx, dy) / d, то есть (dx, dy) * k^2 / d^2
+            factor = dx * dx
+            factor += dy * dy
+            np.maximum(factor, 0.01, out=factor)
+            np.divide(k_sq, factor, out=factor)
+            disp_x[start:stop] += (dx * factor).sum(axis=1)
+            disp_y[start:stop] += (dy * factor).sum(axis=1)
+        if len(src):
+            dx = x[src] - x[dst]
+            dy = y[src] - y[dst]
+            # Сила притяжения d^2 / k вдоль ребра, то есть (dx, dy) * d / k
+            pull = np.sqrt(dx * dx + dy * dy) / spacing
+            disp_x -= np.bincount(src, dx * pull, node_count) - np.bincount(dst, dx * pull, node_count)
+            disp_y -= np.bincount(src, dy * pull, node_count) - np.bincount(dst, dy * pull, node_count)
+        disp_x -= pull_to_center * (x - x.mean())
+        disp_y -= pull_to_center * (y - y.mean())
+        length = np.sqrt(disp_x * disp_x + disp_y * disp_y) + 1e-9
+        scale = np.minimum(length, temperature) / length
+        x += disp_x * scale
+        y += disp_y * scale
+        temperature -= cooling
+
+    return (x - x.mean()).astype(float).tolist(), (y - y.mean()).astype(float).tolist()
+
+
+LAYOUTS = {"layered": layered_layout, "force": force_layout}
+
+
+def compute_layout(algorithm: str, node_count: int, sources: List[int], targets: List[int], **options) -> Positions:
+    """Точка входа для процесса-исполнителя."""
+    return LAYOUTS[algorithm](node_count, sources, targets, **options)
+
+
+class LayoutPool:
+    """
+    Пул процессов для расчета раскладок: расчет занимает CPU на секунды и
+    держит GIL, поэтому выполняется вне процесса веб-сервера. Если в очереди
+    уже max_pending задач, новые запросы получают 429.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def run(self, algorithm: str, node_count: int, sources: List[int], targets: List[int], **options) -> Positions:
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many layout requests, please retry later",
+                headers={"Retry-After": "5"},
+            )
+        if self._executor is None:
+            # Не fork: у сервера уже есть потоки (логирование, пул bcrypt), и дочерний
+            # процесс мог бы унаследовать захваченную ими блокировку
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+        self.pending += 1
+        try:
+            task = functools.partial(compute_layout, algorithm, node_count, sources, targets, **options)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+layout_pool = LayoutPool(max_workers=LAYOUT_WORKERS, max_pending=LAYOUT_MAX_PENDING)
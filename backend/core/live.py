@@ -0,0 +1,291 @@
+# backend/core/live.py
+"""
+Живой канал графа: WebSocket /api/v1/graphs/{id}/live рассылает подписчикам
+правки узлов и ребер компактными дельтами вместо повторной загрузки графа.
+
+Сообщения (JSON):
+  {"type": "hello", "revision": R}  - ревизия графа на момент подписки;
+  {"type": "delta", "revision": R, "nodes": [...], "edges": [...],
+   "removed_nodes": [...], "removed_edges": [...]}
+      nodes - созданные узлы {"id", "label", "x", "y"} и измененные узлы
+      только с изменившимися полями; edges - созданные ребра {"id", "source", "target"};
+  {"type": "resync", "revision": R} - часть правок не будет доставлена,
+      клиент догоняет граф через GET /graphs/{id}/changes?since=.
+Дельты идемпотентны, клиент хранит последнюю полученную revision.
+
+Очередь отправки соединения (LiveSubscriber) - накопленная дельта: новые
+правки сливаются с еще не отправленными, поэтому серия перетаскиваний узла
+за LIVE_COALESCE_MS уходит одной позицией, а медленный клиент получает
+меньше сообщений вместо растущей очереди. Если ждут отправки больше
+LIVE_SEND_QUEUE_MAX элементов, дельта заменяется сообщением resync.
+
+Брокер (LIVE_BROKER) доставляет правки до подписчиков своего процесса:
+  local     - внутри процесса, подходит для одного воркера uvicorn;
+  changelog - опрашивает журнал graph_changes (crud/change_crud.py) по графам
+              с подписчиками: работает с любым числом воркеров и серверов над
+              общей БД ценой задержки до LIVE_POLL_INTERVAL_MS.
+Другой транспорт (например, Redis pub/sub) подключается реализацией LiveBroker.
+"""
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from backend.core import json_codec
+from backend.core.config import LIVE_BROKER, LIVE_COALESCE_MS, LIVE_POLL_INTERVAL_MS, LIVE_SEND_QUEUE_MAX
+
+logger = logging.getLogger(__name__)
+
+# Поля модели Node -> ключи узла в дельте (содержимое узла в дельту не входит)
+_NODE_FIELDS = {"name": "label", "position_x": "x", "position_y": "y"}
+
+
+def node_delta(node_id: uuid.UUID, values) -> dict:
+    """Узел дельты: id и те поля из values (словарь или строка по полям Node), что в нем есть."""
+    delta = {"id": node_id}
+    for field, key in _NODE_FIELDS.items():
+        if field in values:
+            delta[key] = values[field]
+    return delta
+
+
+def edge_delta(edge_id: uuid.UUID, source_node_id: uuid.UUID, target_node_id: uuid.UUID) -> dict:
+    return {"id": edge_id, "source": source_node_id, "target": target_node_id}
+
+
+class LiveSubscriber:
+    """Одно соединение: неотправленная накопленная дельта и событие "есть что отправить"."""
+
+    def __init__(self, hub: "LiveHub", max_pending: int, coalesce_seconds: float):
+        self.hub = hub
+        self.max_pending = max_pending
+        self.coalesce_seconds = coalesce_seconds
+        self._ready = asyncio.Event()
+        self._revision = 0
+        self._resync = False
+        self._nodes: Dict[uuid.UUID, dict] = {}
+        self._edges: Dict[uuid.UUID, dict] = {}
+        # dict вместо set сохраняет порядок удалений
+        self._removed_nodes: Dict[uuid.UUID, None] = {}
+        self._removed_edges: Dict[uuid.UUID, None] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._nodes) + len(self._edges) + len(self._removed_nodes) + len(self._removed_edges)
+
+    def push(self, revision: int, nodes: Iterable[dict] = (), edges: Iterable[dict] = (),
+             removed_nodes: Iterable[uuid.UUID] = (), removed_edges: Iterable[uuid.UUID] = ()) -> None:
+        """Сливает правки ревизии revision с неотправленными."""
+        self._revision = max(self._revision, revision)
+        self._ready.set()
+        if self._resync:
+            return
+        for node in nodes:
+            pending = self._nodes.get(node["id"])
+            if pending is None:
+                self._nodes[node["id"]] = dict(node)
+            else:
+                pending.update(node)
+        for edge in edges:
+            self._edges[edge["id"]] = edge
+        for node_id in removed_nodes:
+            self._nodes.pop(node_id, None)
+            self._removed_nodes[node_id] = None
+        for edge_id in removed_edges:
+            self._edges.pop(edge_id, None)
+            self._removed_edges[edge_id] = None
+        if self.pending > self.max_pending:
+            self.request_resync(revision)
+
+    def request_resync(self, revision: int) -> None:
+        """Отбрасывает накопленное: клиент получит resync и догонит граф сам."""
+        self._revision = max(self._revision, revision)
+        self._resync = True
+        self._nodes, self._edges, self._removed_nodes, self._removed_edges = {}, {}, {}, {}
+        self._ready.set()
+
+    def take(self) -> Optional[dict]:
+        """Забирает накопленное в виде сообщения (None, если отправлять нечего)."""
+        if self._resync:
+            self._resync = False
+            self.hub.resyncs += 1
+            return {"type": "resync", "revision": self._revision}
+        if not self.pending:
+            return None
+        message = {
+            "type": "delta", "revision": self._revision,
+            "nodes": list(self._nodes.values()), "edges": list(self._edges.values()),
+            "removed_nodes": list(self._removed_nodes), "removed_edges": list(self._removed_edges),
+        }
+        self._nodes, self._edges, self._removed_nodes, self._removed_edges = {}, {}, {}, {}
+        return message
+
+    async def run(self, send: Callable[[str], Awaitable[None]]) -> None:
+        """Отправляет накопленное, пока задачу не отменят. Пока идет send, новые правки копятся и сливаются."""
+        while True:
+            await self._ready.wait()
+            if self.coalesce_seconds > 0:
+                await asyncio.sleep(self.coalesce_seconds)
+            self._ready.clear()
+            message = self.take()
+            if message is not None:
+                await send(json_codec.dumps(message).decode("utf-8"))
+                self.hub.messages_sent += 1
+
+
+class LiveHub:
+    """Подписчики живых каналов в этом процессе, по графам."""
+
+    def __init__(self, max_pending: int = LIVE_SEND_QUEUE_MAX, coalesce_ms: int = LIVE_COALESCE_MS):
+        self.max_pending = max_pending
+        self.coalesce_seconds = coalesce_ms / 1000
+        self._subscribers: Dict[uuid.UUID, Set[LiveSubscriber]] = {}
+        self.messages_sent = 0
+        self.resyncs = 0
+
+    def subscribe(self, graph_id: uuid.UUID) -> LiveSubscriber:
+        subscriber = LiveSubscriber(self, self.max_pending, self.coalesce_seconds)
+        self._subscribers.setdefault(graph_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, graph_id: uuid.UUID, subscriber: LiveSubscriber) -> None:
+        subscribers = self._subscribers.get(graph_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[graph_id]
+
+    def graph_ids(self) -> Set[uuid.UUID]:
+        return set(self._subscribers)
+
+    def deliver(self, graph_id: uuid.UUID, revision: int, **delta) -> None:
+        for subscriber in self._subscribers.get(graph_id, ()):
+            subscriber.push(revision, **delta)
+
+    def resync(self, graph_id: uuid.UUID, revision: int) -> None:
+        for subscriber in self._subscribers.get(graph_id, ()):
+            subscriber.request_resync(revision)
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class LiveBroker(ABC):
+    """
+    Доставка правок графов до LiveHub каждого процесса. publish вызывается
+    после коммита и не должен блокировать запрос; watch - когда в этом
+    процессе открыт канал графа, который на момент подписки имел ревизию revision.
+    start, stop и watch по умолчанию ничего не делают.
+    """
+
+    def __init__(self, hub: LiveHub):
+        self.hub = hub
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def watch(self, graph_id: uuid.UUID, revision: int) -> None:
+        pass
+
+    @abstractmethod
+    def publish(self, graph_id: uuid.UUID, revision: int, **delta) -> None:
+        ...
+
+
+class LocalBroker(LiveBroker):
+    """Правки доходят только до подписчиков того же процесса."""
+
+    def publish(self, graph_id: uuid.UUID, revision: int, **delta) -> None:
+        self.hub.deliver(graph_id, revision, **delta)
+
+
+class ChangeLogBroker(LiveBroker):
+    """
+    Правки любого процесса читаются из журнала graph_changes: раз в interval
+    для каждого графа с подписчиками запрашивается дельта после последней
+    доставленной ревизии. publish ничего не делает - журнал пишется в той же
+    транзакции, что и правка.
+    """
+
+    def __init__(self, hub: LiveHub, interval_seconds: float):
+        super().__init__(hub)
+        self.interval_seconds = interval_seconds
+        self._revisions: Dict[uuid.UUID, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._poll_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def watch(self, graph_id: uuid.UUID, revision: int) -> None:
+        self._revisions[graph_id] = min(self._revisions.get(graph_id, revision), revision)
+
+    def publish(self, graph_id: uuid.UUID, revision: int, **delta) -> None:
+        pass
+
+    async def _poll_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Не удалось прочитать журнал изменений для живых каналов")
+
+    async def poll(self) -> None:
+        # Импорт здесь: модули БД не нужны при брокере local
+        from backend.db.session import AsyncSessionLocal
+        from backend.crud import change_crud
+
+        graph_ids = self.hub.graph_ids()
+        for graph_id in set(self._revisions) - graph_ids:
+            del self._revisions[graph_id]
+        watched = [(graph_id, self._revisions[graph_id]) for graph_id in graph_ids if graph_id in self._revisions]
+        if not watched:
+            return
+        async with AsyncSessionLocal() as db:
+            for graph_id, since in watched:
+                delta = await change_crud.get_changes_since(db, graph_id=graph_id, since=since)
+                if delta is None or delta["revision"] == since:
+                    continue
+                self._revisions[graph_id] = delta["revision"]
+                if delta["full_resync"]:
+                    self.hub.resync(graph_id, delta["revision"])
+                    continue
+                self.hub.deliver(
+                    graph_id, delta["revision"],
+                    nodes=[node_delta(row.id, row._mapping) for row in delta["nodes"]],
+                    edges=[edge_delta(row.id, row.source_node_id, row.target_node_id) for row in delta["edges"]],
+                    removed_nodes=delta["removed_node_ids"], removed_edges=delta["removed_edge_ids"],
+                )
+
+
+def _create_broker(name: str, hub: LiveHub) -> LiveBroker:
+    if name == "local":
+        return LocalBroker(hub)
+    if name == "changelog":
+        return ChangeLogBroker(hub, LIVE_POLL_INTERVAL_MS / 1000)
+    raise ValueError(f"Unknown LIVE_BROKER '{name}' (expected 'local' or 'changelog')")
+
+
+live_hub = LiveHub()
+live_broker = _create_broker(LIVE_BROKER, live_hub)
+
+
+def publish(graph_id: uuid.UUID, revision: int, nodes: Iterable[dict] = (), edges: Iterable[dict] = (),
+            removed_nodes: Iterable[uuid.UUID] = (), removed_edges: Iterable[uuid.UUID] = ()) -> None:
+    """Сообщает живым каналам графа о закоммиченной ревизии. Вызывается после коммита."""
+    live_broker.publish(
+        graph_id, revision,
+        nodes=list(nodes), edges=list(edges), removed_nodes=list(removed_nodes), removed_edges=list(removed_edges),
+    )
@@ -0,0 +1,129 @@
+# backend/core/logging_setup.py
+"""
+Логирование приложения. Обработчик корневого логгера только кладет записи
+в очередь (QueueHandler), а форматирование и запись в поток выполняет
+отдельный поток QueueListener, поэтому ввод-вывод логов не блокирует event loop.
+Каждая запись получает request_id текущего запроса (см. access_log.py).
+"""
+import json
+import logging
+import queue
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from backend.core.config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT
+
+# id текущего HTTP-запроса; "-" вне запроса (старт, фоновые задачи)
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Атрибуты, которые есть у любой LogRecord: все остальное пришло через extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id", "color_message"
+}
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет в запись request_id из контекста (вызывается в потоке event loop)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - один JSON-объект в строке; поля из extra= попадают в объект."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    Стандартный QueueHandler.prepare() форматирует запись еще в вызывающем
+    потоке; здесь только подставляются аргументы сообщения и текст исключения,
+    а JSON собирается уже в потоке QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Разбирает "backend.db=DEBUG,uvicorn.access=WARNING" в словарь логгер -> уровень."""
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.strip().partition("=")
+        if sep and name.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_listener: Optional[QueueListener] = None
+_listener_running = False
+
+
+def configure_logging() -> None:
+    """Настраивает корневой логгер (повторный вызов ничего не меняет)."""
+    global _listener
+    if _listener is not None:
+        return
+    stream_handler = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        ))
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    # uvicorn ставит своим логгерам собственные обработчики: направляем их в общую очередь
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(name).handlers.clear()
+        logging.getLogger(name).propagate = True
+    root.setLevel(LOG_LEVEL.upper())
+    for name, level in parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+
+def start_logging() -> None:
+    """Запускает поток записи логов (при старте приложения)."""
+    global _listener_running
+    configure_logging()
+    if not _listener_running:
+        _listener.start()
+        _listener_running = True
+
+
+def stop_logging() -> None:
+    """Дописывает накопленные записи и останавливает поток (при остановке приложения)."""
+    global _listener_running
+    if _listener is not None and _listener_running:
+        _listener.stop()
+        _listener_running = False
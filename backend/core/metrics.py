@@ -0,0 +1,341 @@
+# backend/core/metrics.py
+"""
+Метрики приложения в текстовом формате Prometheus (эндпоинт /metrics) и
+заголовок Server-Timing с разбивкой времени одного запроса.
+
+Реестр намеренно минимальный (счетчики, гистограммы и значения, снимаемые
+в момент выгрузки) и не требует prometheus_client: все обновления идут из
+потока event loop, поэтому блокировки не нужны.
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+from backend.core import json_codec
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # По каждому набору меток: число наблюдений в каждом интервале (+Inf последним), сумма
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le_label)} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+# Значения, снимаемые в момент выгрузки: функция возвращает [(метки, значение)]
+Collector = Tuple[str, str, str, Sequence[str], Callable[[], Iterable[Tuple[LabelValues, float]]]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, name: str, kind: str, help_text: str, labelnames: Sequence[str],
+                      collect: Callable[[], Iterable[Tuple[LabelValues, float]]]) -> None:
+        self._collectors.append((name, kind, help_text, tuple(labelnames), collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, kind, help_text, labelnames, collect in self._collectors:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collect():
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("route", "method")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed."))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Duration of a single database statement.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "Database statements executed per HTTP request.", ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)))
+db_time_per_request = registry.register(Histogram(
+    "db_time_per_request_seconds", "Total database time per HTTP request.", ("route",)))
+
+
+# --- Разбивка времени одного запроса ---
+
+class RequestMetrics:
+    """Время и число запросов к БД в рамках одного HTTP-запроса."""
+
+    __slots__ = ("db_queries", "db_seconds", "phases", "_active")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.phases: Dict[str, float] = {}
+        self._active: Set[str] = set()
+
+
+request_metrics_var: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Засчитывает время блока в фазу name текущего запроса (вложенные вызовы не суммируются)."""
+    current = request_metrics_var.get()
+    if current is None or name in current._active:
+        yield
+        return
+    current._active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.phases[name] = current.phases.get(name, 0.0) + time.perf_counter() - started
+        current._active.discard(name)
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONResponse через json_codec (orjson в быстром режиме), время
+    сериализации которого попадает в фазу serialize.
+    """
+
+    def render(self, content) -> bytes:
+        with phase("serialize"):
+            return json_codec.dumps(content)
+
+
+def instrument_engine(engine) -> None:
+    """Подписывается на события движка: длительность каждого запроса к БД."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_query_duration.observe(elapsed)
+        current = request_metrics_var.get()
+        if current is not None:
+            current.db_queries += 1
+            current.db_seconds += elapsed
+
+
+# --- Значения, снимаемые при выгрузке ---
+
+# Имя кэша -> функция, возвращающая {"hits", "misses", "entries"}
+_cache_stats: Dict[str, Callable[[], dict]] = {}
+
+
+def register_cache(name: str, cache) -> None:
+    """Кэш должен иметь счетчики hits и misses и поддерживать len()."""
+    register_cache_stats(name, lambda: {"hits": cache.hits, "misses": cache.misses, "entries": len(cache)})
+
+
+def register_cache_stats(name: str, stats: Callable[[], dict]) -> None:
+    """Кэш, отдающий свою статистику функцией (составные кэши, см. ProgressCache)."""
+    _cache_stats[name] = stats
+
+
+def _collect_cache_stat(key: str):
+    return [((name,), stats()[key]) for name, stats in _cache_stats.items()]
+
+
+def register_pool_metrics(engine) -> None:
+    pool = getattr(engine, "sync_engine", engine).pool
+
+    def collect(attribute: str):
+        method = getattr(pool, attribute, None)
+        return lambda: [((), method())] if method is not None else []
+
+    registry.add_collector("db_pool_size", "gauge", "Configured connection pool size.", (), collect("size"))
+    registry.add_collector("db_pool_checked_out", "gauge", "Connections currently in use.", (), collect("checkedout"))
+    registry.add_collector("db_pool_overflow", "gauge", "Connections opened above pool size (negative: unused capacity).", (), collect("overflow"))
+
+
+def register_executor_metrics(pools: Dict[str, object]) -> None:
+    """Пулы с атрибутами pending и max_pending (PasswordHashPool, LayoutPool)."""
+    registry.add_collector(
+        "executor_pending_tasks", "gauge", "Tasks queued or running in a worker pool.", ("pool",),
+        lambda: [((name,), pool.pending) for name, pool in pools.items()])
+    registry.add_collector(
+        "executor_max_pending_tasks", "gauge", "Queue limit of a worker pool before 429.", ("pool",),
+        lambda: [((name,), pool.max_pending) for name, pool in pools.items()])
+
+
+def register_live_metrics(hub) -> None:
+    """Живые каналы графов (LiveHub из core/live.py)."""
+    registry.add_collector(
+        "live_connections", "gauge", "Open live graph WebSocket connections.", (),
+        lambda: [((), hub.connections)])
+    registry.add_collector(
+        "live_messages_sent_total", "counter", "Delta and resync messages sent to live connections.", (),
+        lambda: [((), hub.messages_sent)])
+    registry.add_collector(
+        "live_resyncs_total", "counter", "Live connections told to resync instead of receiving a delta.", (),
+        lambda: [((), hub.resyncs)])
+
+
+def register_position_buffer_metrics(buffer) -> None:
+    """Буфер отложенной записи позиций узлов (PositionBuffer из core/position_buffer.py)."""
+    registry.add_collector(
+        "position_buffer_pending", "gauge", "Node positions waiting to be written.", (),
+        lambda: [((), buffer.pending)])
+    registry.add_collector(
+        "position_buffer_flushes_total", "counter", "Batched position writes committed.", (),
+        lambda: [((), buffer.flushes)])
+    registry.add_collector(
+        "position_buffer_flushed_nodes_total", "counter", "Node positions written by batched flushes.", (),
+        lambda: [((), buffer.flushed_nodes)])
+    registry.add_collector(
+        "position_buffer_flush_failures_total", "counter", "Batched position writes that failed and were requeued.", (),
+        lambda: [((), buffer.failures)])
+
+
+registry.add_collector(
+    "cache_hits_total", "counter", "In-process cache hits.", ("cache",),
+    lambda: _collect_cache_stat("hits"))
+registry.add_collector(
+    "cache_misses_total", "counter", "In-process cache misses.", ("cache",),
+    lambda: _collect_cache_stat("misses"))
+registry.add_collector(
+    "cache_entries", "gauge", "Entries currently held by an in-process cache.", ("cache",),
+    lambda: _collect_cache_stat("entries"))
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+# --- Middleware ---
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: задержка, число запросов в работе и время БД по маршрутам.
+    При server_timing=True добавляет в ответ заголовок Server-Timing
+    (auth, db, serialize, total), полезный при отладке одного запроса.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        current = RequestMetrics()
+        token = request_metrics_var.set(current)
+        started = time.perf_counter()
+        status_code = 500
+        http_requests_in_flight.inc()
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    header = self._server_timing(current, time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", ()), (b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            route = getattr(scope.get("route"), "name", None) or "unmatched"
+            http_requests_total.inc(route, scope["method"], str(status_code))
+            http_request_duration.observe(elapsed, route, scope["method"])
+            db_queries_per_request.observe(current.db_queries, route)
+            db_time_per_request.observe(current.db_seconds, route)
+            request_metrics_var.reset(token)
+
+    @staticmethod
+    def _server_timing(current: RequestMetrics, total: float) -> str:
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in current.phases.items()]
+        parts.append(f'db;dur={current.db_seconds * 1000:.2f};desc="{current.db_queries} queries"')
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
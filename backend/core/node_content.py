@@ -0,0 +1,37 @@
+# backend/core/node_content.py
+"""
+Кодирование содержимого узлов (markdown/KaTeX урока) для таблицы node_contents.
+
+Содержимое хранится отдельно от nodes, поэтому структурные запросы графа
+(узлы, позиции, ребра) не читают тексты уроков. Текст хранится байтами
+UTF-8; тексты от NODE_CONTENT_COMPRESS_MIN_BYTES байт сжимаются zlib, если
+это действительно экономит место. Рядом хранятся размер текста и его SHA-256:
+по ним можно сравнить содержимое, не распаковывая его. Распаковка ленивая -
+только при обращении к тексту (NodeContent.text), то есть при выдаче узла.
+"""
+import hashlib
+import zlib
+from typing import Optional
+
+from backend.core.config import NODE_CONTENT_COMPRESS_LEVEL, NODE_CONTENT_COMPRESS_MIN_BYTES
+
+ZLIB = "zlib"
+
+
+def encode_content(text: Optional[str]) -> dict:
+    """Колонки node_contents (body, compression, size, sha256) для текста."""
+    raw = (text or "").encode("utf-8")
+    body, compression = raw, None
+    if NODE_CONTENT_COMPRESS_MIN_BYTES > 0 and len(raw) >= NODE_CONTENT_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(raw, NODE_CONTENT_COMPRESS_LEVEL)
+        if len(compressed) < len(raw):
+            body, compression = compressed, ZLIB
+    return {"body": body, "compression": compression, "size": len(raw), "sha256": hashlib.sha256(raw).hexdigest()}
+
+
+def decode_content(body: bytes, compression: Optional[str]) -> str:
+    if compression == ZLIB:
+        body = zlib.decompress(body)
+    elif compression is not None:
+        raise ValueError(f"Unknown node content compression '{compression}'")
+    return bytes(body).decode("utf-8")
@@ -0,0 +1,51 @@
+# backend/core/pagination.py
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, List
+
+
+class InvalidCursorError(ValueError):
+    """Курсор поврежден, выдан для другой сортировки или к ней неприменим."""
+
+
+def encode_cursor(kind: str, values: List[Any]) -> str:
+    """
+    Упаковывает ключ последней строки страницы в непрозрачный курсор.
+    kind фиксирует порядок сортировки, для которого курсор действителен.
+    """
+    payload = {"k": kind, "v": [_encode_value(value) for value in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str, types: List[type]) -> List[Any]:
+    """
+    Распаковывает курсор, проверяя, что он выдан для той же сортировки.
+    Иначе - InvalidCursorError (API отвечает 400).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != kind or len(payload["v"]) != len(types):
+            raise ValueError("cursor kind mismatch")
+        return [_decode_value(value, value_type) for value, value_type in zip(payload["v"], types)]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(value: Any, value_type: type) -> Any:
+    if value_type is datetime:
+        return datetime.fromisoformat(value)
+    if value_type is uuid.UUID:
+        return uuid.UUID(value)
+    return value_type(value)
@@ -0,0 +1,171 @@
+# backend/core/position_buffer.py
+"""
+Отложенная запись (write-behind) позиций узлов. Перетаскивание узла шлет
+серию PATCH /nodes/{id} с одними координатами; вместо транзакции, новой
+ревизии и записи в журнал на каждый из них позиции копятся в памяти:
+
+- add отвечает сразу, повторные позиции одного узла сливаются в одну;
+- накопленное пишется одной транзакцией (node_crud.flush_node_positions)
+  раз в POSITION_BUFFER_FLUSH_MS или сразу, как только ждут записи
+  POSITION_BUFFER_MAX_PENDING узлов;
+- stop (lifespan приложения) дописывает все, что осталось;
+- чтения и другие правки графа сначала вызывают flush_graph/flush_node,
+  поэтому видят буферизованные позиции и не обгоняют их.
+
+Буфер свой у каждого процесса: при нескольких воркерах другие процессы
+видят позицию после записи, то есть с задержкой до POSITION_BUFFER_FLUSH_MS.
+Живые каналы получают позиции при записи, уже с настоящей ревизией.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Dict, Iterable, Optional
+
+from backend.db.session import AsyncSessionLocal
+from backend.crud import node_crud
+from backend.core.config import POSITION_BUFFER_ENABLED, POSITION_BUFFER_FLUSH_MS, POSITION_BUFFER_MAX_PENDING
+
+logger = logging.getLogger(__name__)
+
+# Поля узла, которые можно записывать отложенно
+POSITION_FIELDS = frozenset({"position_x", "position_y"})
+
+Positions = Dict[uuid.UUID, Dict[uuid.UUID, dict]]
+
+
+class PositionBuffer:
+    """Позиции узлов, ожидающие записи: {graph_id: {node_id: {поле: значение}}}."""
+
+    def __init__(self, enabled: bool, flush_ms: int, max_pending: int):
+        self.enabled = enabled
+        self.flush_seconds = flush_ms / 1000
+        self.max_pending = max_pending
+        self._pending: Positions = {}
+        self._graph_of: Dict[uuid.UUID, uuid.UUID] = {}
+        # Пачка, которая пишется прямо сейчас (до коммита ее не видно в БД)
+        self._in_flight: Positions = {}
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_nodes = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        """Буфер принимает позиции, только пока работает фоновая запись (см. start)."""
+        return self._task is not None
+
+    @property
+    def pending(self) -> int:
+        return len(self._graph_of)
+
+    def add(self, graph_id: uuid.UUID, node_id: uuid.UUID, values: dict) -> None:
+        """Ставит позицию узла в очередь на запись, сливая ее с еще не записанной."""
+        self._pending.setdefault(graph_id, {}).setdefault(node_id, {}).update(values)
+        self._graph_of[node_id] = graph_id
+        self._wakeup.set()
+        if self.pending >= self.max_pending:
+            self._full.set()
+
+    def get(self, node_id: uuid.UUID) -> dict:
+        """Еще не записанные поля позиции узла (пустой словарь, если их нет)."""
+        graph_id = self._graph_of.get(node_id)
+        if graph_id is None:
+            return {}
+        return dict(self._pending[graph_id][node_id])
+
+    async def flush_graph(self, graph_id: uuid.UUID) -> None:
+        """Дописывает позиции графа, если они есть в буфере или пишутся прямо сейчас."""
+        if graph_id in self._pending or graph_id in self._in_flight:
+            await self.flush([graph_id])
+
+    async def flush_node(self, node_id: uuid.UUID) -> None:
+        graph_id = self._graph_of.get(node_id)
+        if graph_id is None:
+            graph_id = next((g for g, nodes in self._in_flight.items() if node_id in nodes), None)
+        if graph_id is not None:
+            await self.flush([graph_id])
+
+    async def flush(self, graph_ids: Optional[Iterable[uuid.UUID]] = None) -> int:
+        """
+        Записывает позиции графов graph_ids (по умолчанию всех) одной транзакцией
+        и возвращает число узлов в пачке. Если идет другая запись, ждет ее. При
+        ошибке пачка возвращается в буфер (более новые позиции важнее), а
+        исключение пробрасывается.
+        """
+        async with self._lock:
+            batch = self._take(graph_ids)
+            if not batch:
+                return 0
+            size = sum(len(nodes) for nodes in batch.values())
+            self._in_flight = batch
+            try:
+                async with AsyncSessionLocal() as db:
+                    await node_crud.flush_node_positions(db, batch)
+            except Exception:
+                self.failures += 1
+                self._requeue(batch)
+                raise
+            finally:
+                self._in_flight = {}
+            self.flushes += 1
+            self.flushed_nodes += size
+            return size
+
+    def _take(self, graph_ids: Optional[Iterable[uuid.UUID]]) -> Positions:
+        if graph_ids is None:
+            batch, self._pending = self._pending, {}
+        else:
+            batch = {graph_id: self._pending.pop(graph_id) for graph_id in graph_ids if graph_id in self._pending}
+        for nodes in batch.values():
+            for node_id in nodes:
+                del self._graph_of[node_id]
+        if not self._pending:
+            self._wakeup.clear()
+        if self.pending < self.max_pending:
+            self._full.clear()
+        return batch
+
+    def _requeue(self, batch: Positions) -> None:
+        for graph_id, nodes in batch.items():
+            pending = self._pending.setdefault(graph_id, {})
+            for node_id, values in nodes.items():
+                pending[node_id] = {**values, **pending.get(node_id, {})}
+                self._graph_of[node_id] = graph_id
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self) -> None:
+        """Останавливает фоновую запись и дописывает все, что осталось в буфере."""
+        if self._task is not None:
+            # Под блокировкой, чтобы не прервать уже начатую запись
+            async with self._lock:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Не удалось записать позиции узлов при остановке (%d узлов потеряно)", self.pending)
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Копим правки окно flush_seconds, но пишем сразу, если буфер заполнился
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Не удалось записать позиции узлов, повтор через %.3f с", self.flush_seconds)
+                await asyncio.sleep(self.flush_seconds)
+
+
+position_buffer = PositionBuffer(POSITION_BUFFER_ENABLED, POSITION_BUFFER_FLUSH_MS, POSITION_BUFFER_MAX_PENDING)
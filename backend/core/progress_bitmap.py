@@ -0,0 +1,114 @@
+# backend/core/progress_bitmap.py
+import uuid
+from typing import Iterable, List, Optional, Sequence
+
+from backend.core.cache import RevisionCache, TTLCache
+from backend.core.config import (
+    PROGRESS_CACHE_TTL_SECONDS, PROGRESS_CACHE_MAX_ENTRIES, NODE_ORDINALS_CACHE_MAX_ENTRIES
+)
+
+
+class NodeOrdinals:
+    """
+    Порядковые номера узлов графа для одной ревизии его структуры.
+    Прогресс пользователя хранится как битовая карта: бит i означает,
+    что изучен узел с порядковым номером i. Размер карты - (узлов + 7) // 8 байт
+    независимо от того, сколько всего узлов пользователь изучил в других графах.
+    """
+
+    __slots__ = ("node_ids", "_index")
+
+    def __init__(self, node_ids: Sequence[uuid.UUID]):
+        self.node_ids = tuple(node_ids)
+        self._index = {node_id: ordinal for ordinal, node_id in enumerate(self.node_ids)}
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def index_of(self, node_id: uuid.UUID) -> Optional[int]:
+        """Порядковый номер узла или None, если узла нет в этой ревизии графа."""
+        return self._index.get(node_id)
+
+    def encode(self, learned_ids: Iterable[uuid.UUID]) -> bytes:
+        """Строит битовую карту; узлы, которых нет в этой ревизии графа, пропускаются."""
+        bitmap = bytearray((len(self.node_ids) + 7) // 8)
+        for node_id in learned_ids:
+            ordinal = self._index.get(node_id)
+            if ordinal is not None:
+                bitmap[ordinal >> 3] |= 1 << (ordinal & 7)
+        return bytes(bitmap)
+
+    def decode(self, bitmap: bytes) -> List[uuid.UUID]:
+        """Возвращает ID изученных узлов в порядке их номеров."""
+        return [self.node_ids[ordinal] for ordinal in self.decode_ordinals(bitmap)]
+
+    def decode_ordinals(self, bitmap: bytes) -> List[int]:
+        """Возвращает порядковые номера изученных узлов."""
+        learned = []
+        for byte_index, byte in enumerate(bitmap):
+            if not byte:
+                continue
+            base = byte_index << 3
+            for bit in range(8):
+                if byte & (1 << bit) and base + bit < len(self.node_ids):
+                    learned.append(base + bit)
+        return learned
+
+
+def bitmap_from_flags(flags: Iterable[bool]) -> bytes:
+    """Битовая карта по флагам "изучен" в порядке номеров узлов."""
+    flags = list(flags)
+    bitmap = bytearray((len(flags) + 7) // 8)
+    for ordinal, learned in enumerate(flags):
+        if learned:
+            bitmap[ordinal >> 3] |= 1 << (ordinal & 7)
+    return bytes(bitmap)
+
+
+class ProgressCache:
+    """
+    Кэш прогресса: порядковые номера узлов по графам (LRU, привязаны к ревизии)
+    и битовые карты по парам (пользователь, граф) с ограниченным временем жизни.
+    Карта действительна только для той ревизии графа, с которой была построена.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, max_graphs: int):
+        self._ordinals = RevisionCache(max_entries=max_graphs)
+        self._bitmaps = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    def get_ordinals(self, graph_id: uuid.UUID, revision: int) -> Optional[NodeOrdinals]:
+        return self._ordinals.get(graph_id, revision)
+
+    def put_ordinals(self, graph_id: uuid.UUID, revision: int, ordinals: NodeOrdinals) -> None:
+        self._ordinals.put(graph_id, revision, ordinals)
+
+    def get_bitmap(self, user_id: uuid.UUID, graph_id: uuid.UUID, revision: int) -> Optional[bytes]:
+        entry = self._bitmaps.get((user_id, graph_id))
+        if entry is None or entry[0] != revision:
+            return None
+        return entry[1]
+
+    def put_bitmap(self, user_id: uuid.UUID, graph_id: uuid.UUID, revision: int, bitmap: bytes) -> None:
+        self._bitmaps.set((user_id, graph_id), (revision, bitmap))
+
+    def invalidate_bitmap(self, user_id: uuid.UUID, graph_id: uuid.UUID) -> None:
+        self._bitmaps.invalidate((user_id, graph_id))
+
+    def ordinals_stats(self) -> dict:
+        """Попадания, промахи и число графов в кэше порядковых номеров (для метрик)."""
+        return {"hits": self._ordinals.hits, "misses": self._ordinals.misses, "entries": len(self._ordinals)}
+
+    def bitmap_stats(self) -> dict:
+        """Попадания, промахи и число битовых карт прогресса в кэше (для метрик)."""
+        return {"hits": self._bitmaps.hits, "misses": self._bitmaps.misses, "entries": len(self._bitmaps)}
+
+    def clear(self) -> None:
+        self._ordinals.clear()
+        self._bitmaps.clear()
+
+
+progress_cache = ProgressCache(
+    ttl_seconds=PROGRESS_CACHE_TTL_SECONDS,
+    max_entries=PROGRESS_CACHE_MAX_ENTRIES,
+    max_graphs=NODE_ORDINALS_CACHE_MAX_ENTRIES,
+)
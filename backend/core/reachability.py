@@ -0,0 +1,198 @@
+# backend/core/reachability.py
+"""
+Индекс достижимости графа пререквизитов: для каждого узла хранятся битовые
+множества (целые числа Python) всех его потомков и всех предков. Запросы
+"является ли A пререквизитом B" и "сколько узлов открывает X" отвечаются
+без обхода графа. Индекс строится по GraphTopology через сжатие компонент
+сильной связности (на случай старых графов с циклами) и дополняется
+инкрементально при добавлении ребра.
+"""
+import sys
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.core.config import REACHABILITY_CACHE_MAX_BYTES, REACHABILITY_MAX_NODES
+from backend.core.graph_analysis import GraphTopology
+from backend.core.progress_bitmap import NodeOrdinals
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Номера установленных битов по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _strongly_connected_components(topology: GraphTopology) -> Tuple[List[int], int]:
+    """
+    Алгоритм Косарайю без рекурсии. Возвращает номер компоненты для каждого узла
+    и число компонент; компоненты пронумерованы в топологическом порядке сжатого графа.
+    """
+    node_count = len(topology)
+    visited = bytearray(node_count)
+    finished: List[int] = []
+    for root in range(node_count):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        stack = [(root, iter(topology.successors(root)))]
+        while stack:
+            node, successors = stack[-1]
+            for target in successors:
+                if not visited[target]:
+                    visited[target] = 1
+                    stack.append((target, iter(topology.successors(target))))
+                    break
+            else:
+                stack.pop()
+                finished.append(node)
+
+    component = [-1] * node_count
+    count = 0
+    for root in reversed(finished):
+        if component[root] != -1:
+            continue
+        component[root] = count
+        stack = [root]
+        while stack:
+            for source in topology.predecessors(stack.pop()):
+                if component[source] == -1:
+                    component[source] = count
+                    stack.append(source)
+        count += 1
+    return component, count
+
+
+class ReachabilityIndex:
+    """Транзитивное замыкание одной ревизии графа: descendants[i] и ancestors[i] - битовые маски."""
+
+    def __init__(self, ordinals: NodeOrdinals, descendants: List[int], ancestors: List[int]):
+        self.ordinals = ordinals
+        self.descendants = descendants
+        self.ancestors = ancestors
+        self.memory_bytes = self._measure()
+
+    @classmethod
+    def build(cls, topology: GraphTopology) -> "ReachabilityIndex":
+        component, count = _strongly_connected_components(topology)
+        members = [0] * count
+        cyclic = [False] * count
+        for node in range(len(topology)):
+            members[component[node]] |= 1 << node
+        # Ребра сжатого графа (без петель внутри компоненты)
+        out_edges: List[set] = [set() for _ in range(count)]
+        in_edges: List[set] = [set() for _ in range(count)]
+        for node in range(len(topology)):
+            for target in topology.successors(node):
+                source_c, target_c = component[node], component[target]
+                if source_c == target_c:
+                    cyclic[source_c] = True
+                else:
+                    out_edges[source_c].add(target_c)
+                    in_edges[target_c].add(source_c)
+
+        # Компоненты уже в топологическом порядке: потомков считаем с конца, предков - с начала
+        down = [0] * count
+        for c in range(count - 1, -1, -1):
+            mask = members[c] if cyclic[c] else 0
+            for target_c in out_edges[c]:
+                mask |= members[target_c] | down[target_c]
+            down[c] = mask
+        up = [0] * count
+        for c in range(count):
+            mask = members[c] if cyclic[c] else 0
+            for source_c in in_edges[c]:
+                mask |= members[source_c] | up[source_c]
+            up[c] = mask
+
+        # Узлы одной компоненты разделяют одни и те же объекты масок
+        return cls(
+            topology.ordinals,
+            [down[component[node]] for node in range(len(topology))],
+            [up[component[node]] for node in range(len(topology))],
+        )
+
+    def is_reachable(self, source: int, target: int) -> bool:
+        """Есть ли путь из source в target хотя бы по одному ребру."""
+        return bool(self.descendants[source] >> target & 1)
+
+    def with_edge(self, source: int, target: int) -> "ReachabilityIndex":
+        """
+        Новый индекс с добавленным ребром source -> target. Меняются только маски
+        предков source (и его самого) и потомков target (и его самого).
+        """
+        descendants = list(self.descendants)
+        ancestors = list(self.ancestors)
+        gained_down = (1 << target) | self.descendants[target]
+        gained_up = (1 << source) | self.ancestors[source]
+        for node in iter_bits(gained_up):
+            descendants[node] |= gained_down
+        for node in iter_bits(gained_down):
+            ancestors[node] |= gained_up
+        return ReachabilityIndex(self.ordinals, descendants, ancestors)
+
+    def _measure(self) -> int:
+        seen: Dict[int, int] = {}
+        for mask in self.descendants + self.ancestors:
+            seen.setdefault(id(mask), sys.getsizeof(mask))
+        return sum(seen.values()) + sys.getsizeof(self.descendants) + sys.getsizeof(self.ancestors)
+
+
+class ReachabilityCache:
+    """
+    LRU-кэш индексов достижимости, ограниченный суммарным объемом масок.
+    Графы больше REACHABILITY_MAX_NODES не индексируются: размер замыкания
+    растет квадратично, и для них запросы выполняются обходом GraphTopology.
+    """
+
+    def __init__(self, max_bytes: int, max_nodes: int):
+        self.max_bytes = max_bytes
+        self.max_nodes = max_nodes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[uuid.UUID, Tuple[int, ReachabilityIndex]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, graph_id: uuid.UUID, revision: int) -> Optional[ReachabilityIndex]:
+        entry = self._entries.get(graph_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != revision:
+            self.invalidate(graph_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(graph_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, graph_id: uuid.UUID, revision: int, index: ReachabilityIndex) -> None:
+        self.invalidate(graph_id)
+        if index.memory_bytes > self.max_bytes:
+            return
+        self._entries[graph_id] = (revision, index)
+        self.current_bytes += index.memory_bytes
+        while self._entries and self.current_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.memory_bytes
+
+    def invalidate(self, graph_id: uuid.UUID) -> None:
+        entry = self._entries.pop(graph_id, None)
+        if entry is not None:
+            self.current_bytes -= entry[1].memory_bytes
+
+    def stats(self) -> dict:
+        """Сведения об использовании памяти (для метрик)."""
+        return {"graphs": len(self._entries), "bytes": self.current_bytes, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+reachability_cache = ReachabilityCache(max_bytes=REACHABILITY_CACHE_MAX_BYTES, max_nodes=REACHABILITY_MAX_NODES)
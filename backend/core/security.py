@@ -1,20 +1,31 @@
 # backend/core/security.py
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, Tuple, TypeVar
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
-from backend.core.config import SECRET_KEY, ALGORITHM
+from backend.core.config import (
+    SECRET_KEY, ALGORITHM, BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING,
+    PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES, TRUST_TOKEN_CLAIMS
+)
+from backend.core.cache import TTLCache
+from backend.core.metrics import phase
 
 from backend.db.session import get_db
 from backend.crud import user_crud
 from backend.models.user_model import User
 
-# Контекст для хэширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# Контекст для хэширования паролей. Хэши с другим cost factor считаются
+# устаревшими и пересчитываются при успешном входе (см. verify_and_update_password).
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +33,51 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class PasswordHashPool:
+    """
+    Ограниченный пул потоков для bcrypt. bcrypt отпускает GIL, поэтому потоков
+    достаточно, а event loop не блокируется на 100-300 мс при каждом входе.
+    Если в очереди уже max_pending операций, новые запросы получают 429.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many authentication requests, please retry later",
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+password_hash_pool = PasswordHashPool(max_workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Проверяет пароль в пуле хэширования. Если пароль верен, но хэш создан
+    с устаревшими параметрами, вторым элементом возвращает новый хэш.
+    """
+    return await password_hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -37,7 +93,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 # --- Graph ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login/token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+# Кэш "принципалов": user_id -> (id, username). Избавляет от SELECT в users
+# на каждый аутентифицированный запрос. Сбрасывается через invalidate_principal.
+principal_cache = TTLCache(ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS, max_entries=PRINCIPAL_CACHE_MAX_ENTRIES)
+
+def invalidate_principal(user_id: uuid.UUID) -> None:
+    """Вызывается при изменении или удалении пользователя."""
+    principal_cache.invalidate(user_id)
+
+def _principal(user_id: uuid.UUID, username: str) -> User:
+    # Новый объект вне сессии: его атрибуты не истекают после чужих коммитов
+    return User(id=user_id, username=username)
+
+def _decode_token(token: str) -> Tuple[str, Optional[uuid.UUID]]:
+    """Возвращает (username, user_id) из токена или вызывает 401."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -52,11 +121,41 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
             raise credentials_exception
         
         username: str = username_from_payload 
+        user_id_from_payload = payload.get("user_id")
+        user_id = uuid.UUID(user_id_from_payload) if isinstance(user_id_from_payload, str) else None
         
-    except JWTError:
+    except (JWTError, ValueError):
         raise credentials_exception
-    
-    user = await user_crud.get_user_by_username(db, username=username)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+    return username, user_id
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    with phase("auth"):
+        username, user_id = _decode_token(token)
+
+        if user_id is not None:
+            cached = principal_cache.get(user_id)
+            if cached is not None and cached[1] == username:
+                return _principal(*cached)
+
+        user = await user_crud.get_user_by_username(db, username=username)
+        if user is None or (user_id is not None and user.id != user_id):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        principal_cache.set(user.id, (user.id, user.username))
+        return _principal(user.id, user.username) # type: ignore
+
+async def get_current_user_read_only(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    """
+    Вариант get_current_user для эндпоинтов только на чтение. При TRUST_TOKEN_CLAIMS
+    пользователь берется из подписанных claims токена (sub, user_id) без обращения к БД;
+    удаленный пользователь в этом режиме остается "валидным" до истечения токена.
+    """
+    if TRUST_TOKEN_CLAIMS:
+        with phase("auth"):
+            username, user_id = _decode_token(token)
+        if user_id is not None:
+            return _principal(user_id, username)
+    return await get_current_user(token=token, db=db)
@@ -0,0 +1,132 @@
+# backend/crud/analysis_crud.py
+import uuid
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.core.graph_analysis import GraphTopology, topology_cache
+from backend.core.progress_bitmap import NodeOrdinals, progress_cache
+from backend.core.reachability import ReachabilityIndex, iter_bits, reachability_cache
+from backend.crud import progress_crud
+from backend.models.graph_model import Node, Edge
+
+async def get_graph_topology(db: AsyncSession, graph_id: uuid.UUID, revision: int) -> GraphTopology:
+    """Структура пререквизитов графа для указанной ревизии (из кэша или из БД)."""
+    topology = topology_cache.get(graph_id, revision)
+    if topology is None:
+        ordinals = await progress_crud.get_node_ordinals(db, graph_id, revision)
+        result = await db.execute(
+            select(Edge.source_node_id, Edge.target_node_id).where(Edge.graph_id == graph_id)
+        )
+        topology = GraphTopology(ordinals, result.all())
+        topology_cache.put(graph_id, revision, topology)
+    return topology
+
+async def get_reachability(db: AsyncSession, graph_id: uuid.UUID, revision: int) -> Optional[ReachabilityIndex]:
+    """
+    Индекс достижимости графа для указанной ревизии или None для слишком
+    больших графов (тогда запросы выполняются обходом GraphTopology).
+    """
+    index = reachability_cache.get(graph_id, revision)
+    if index is None:
+        topology = await get_graph_topology(db, graph_id, revision)
+        if len(topology) > reachability_cache.max_nodes:
+            return None
+        index = ReachabilityIndex.build(topology)
+        reachability_cache.put(graph_id, revision, index)
+    return index
+
+async def would_create_cycle(
+    db: AsyncSession, graph_id: uuid.UUID, revision: int, source_id: uuid.UUID, target_id: uuid.UUID
+) -> Optional[bool]:
+    """Замкнет ли ребро source -> target цикл пререквизитов; None, если узлы не из этого графа."""
+    topology = await get_graph_topology(db, graph_id, revision)
+    source, target = topology.ordinals.index_of(source_id), topology.ordinals.index_of(target_id)
+    if source is None or target is None:
+        return None
+    index = await get_reachability(db, graph_id, revision)
+    if index is not None:
+        return source == target or index.is_reachable(target, source)
+    return topology.would_create_cycle(source, target)
+
+async def get_related_nodes(
+    db: AsyncSession, graph_id: uuid.UUID, revision: int, node_id: uuid.UUID, ancestors: bool
+) -> Optional[List[uuid.UUID]]:
+    """
+    Транзитивные пререквизиты (ancestors=True) или зависимые узлы в порядке изучения;
+    None, если узла нет в графе.
+    """
+    topology = await get_graph_topology(db, graph_id, revision)
+    node = topology.ordinals.index_of(node_id)
+    if node is None:
+        return None
+    index = await get_reachability(db, graph_id, revision)
+    if index is None:
+        related = topology.ancestors(node) if ancestors else topology.descendants(node)
+    else:
+        mask = index.ancestors[node] if ancestors else index.descendants[node]
+        related = topology.in_learning_order(list(iter_bits(mask)))
+    return topology.node_ids(related)
+
+async def is_reachable(
+    db: AsyncSession, graph_id: uuid.UUID, revision: int, source_id: uuid.UUID, target_id: uuid.UUID
+) -> Optional[bool]:
+    """Является ли source транзитивным пререквизитом target; None, если узлы не из этого графа."""
+    topology = await get_graph_topology(db, graph_id, revision)
+    source, target = topology.ordinals.index_of(source_id), topology.ordinals.index_of(target_id)
+    if source is None or target is None:
+        return None
+    index = await get_reachability(db, graph_id, revision)
+    if index is not None:
+        return index.is_reachable(source, target)
+    return source != target and topology.reaches(source, target)
+
+async def load_graph_topology(db: AsyncSession, graph_id: uuid.UUID) -> GraphTopology:
+    """
+    Строит структуру пререквизитов по текущему состоянию транзакции, минуя кэш:
+    для проверок внутри незакоммиченных изменений, когда ревизия еще не видна другим.
+    """
+    nodes_result = await db.execute(select(Node.id).where(Node.graph_id == graph_id).order_by(Node.id))
+    edges_result = await db.execute(
+        select(Edge.source_node_id, Edge.target_node_id).where(Edge.graph_id == graph_id)
+    )
+    return GraphTopology(NodeOrdinals(nodes_result.scalars().all()), edges_result.all())
+
+# --- Перенос кэшей на новую ревизию без полной перестройки ---
+
+def structure_unchanged(graph_id: uuid.UUID, revision: int) -> None:
+    """
+    Ревизия revision изменила только поля узлов (позиции, названия, содержимое):
+    порядок узлов, списки смежности и замыкание переходят на нее как есть.
+    """
+    ordinals = progress_cache.get_ordinals(graph_id, revision - 1)
+    if ordinals is not None:
+        progress_cache.put_ordinals(graph_id, revision, ordinals)
+    topology = topology_cache.get(graph_id, revision - 1)
+    if topology is not None:
+        topology_cache.put(graph_id, revision, topology)
+    index = reachability_cache.get(graph_id, revision - 1)
+    if index is not None:
+        reachability_cache.put(graph_id, revision, index)
+
+def edges_added(graph_id: uuid.UUID, revision: int, edges) -> None:
+    """
+    Ревизия revision только добавила ребра (source_node_id, target_node_id):
+    набор узлов прежний, замыкание дополняется инкрементально.
+    Списки смежности неизменяемы и перестроятся при следующем обращении.
+    """
+    ordinals = progress_cache.get_ordinals(graph_id, revision - 1)
+    if ordinals is None:
+        reachability_cache.invalidate(graph_id)
+        return
+    progress_cache.put_ordinals(graph_id, revision, ordinals)
+    index = reachability_cache.get(graph_id, revision - 1)
+    if index is None:
+        return
+    for source_id, target_id in edges:
+        index = index.with_edge(ordinals.index_of(source_id), ordinals.index_of(target_id))
+    reachability_cache.put(graph_id, revision, index)
+
+def structure_changed(graph_id: uuid.UUID) -> None:
+    """Удалены узлы или ребра: замыкание перестроится при следующем запросе, память освобождаем сразу."""
+    reachability_cache.invalidate(graph_id)
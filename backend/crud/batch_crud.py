@@ -0,0 +1,181 @@
+# backend/crud/batch_crud.py
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.models.graph_model import Node, NodeContent, Edge, UserProgress
+from backend.schemas.graph_schema import (
+    GraphBatch, BatchNodeCreate, BatchNodeUpdate, BatchNodeDelete, BatchEdgeCreate, BatchEdgeDelete
+)
+from backend.crud import search_crud, analysis_crud, change_crud, node_crud
+from backend.crud.graph_crud import bump_graph_revision
+from backend.crud.change_crud import NODE, EDGE, CREATE, UPDATE, DELETE
+from backend.core import live
+
+
+class BatchValidationError(ValueError):
+    """Пачка операций не может быть применена к графу (ссылки на чужие или несуществующие элементы)."""
+
+
+async def apply_graph_batch(db: AsyncSession, graph_id: uuid.UUID, batch: GraphBatch) -> dict:
+    """
+    Применяет пачку операций над узлами и ребрами графа одной транзакцией:
+    по одному групповому запросу на каждый тип операции и один коммит.
+    Порядок применения: удаление ребер, удаление узлов, создание узлов,
+    изменение узлов, создание ребер. Проверка прав остается за вызывающим кодом.
+    """
+    node_creates = [op for op in batch.operations if isinstance(op, BatchNodeCreate)]
+    node_updates = [op for op in batch.operations if isinstance(op, BatchNodeUpdate)]
+    node_deletes = {op.id for op in batch.operations if isinstance(op, BatchNodeDelete)}
+    edge_creates = [op for op in batch.operations if isinstance(op, BatchEdgeCreate)]
+    edge_deletes = {op.id for op in batch.operations if isinstance(op, BatchEdgeDelete)}
+
+    # 1. Проверяем, что все упомянутые существующие элементы принадлежат графу
+    referenced_nodes = node_deletes | {op.id for op in node_updates}
+    for op in edge_creates:
+        for endpoint in (op.source_node_id, op.target_node_id):
+            node_id = _parse_uuid(endpoint)
+            if node_id is not None:
+                referenced_nodes.add(node_id)
+    existing_nodes = await _existing_ids(db, Node, graph_id, referenced_nodes)
+    existing_edges = await _existing_ids(db, Edge, graph_id, edge_deletes)
+    if edge_deletes - existing_edges:
+        raise BatchValidationError("Some edges do not belong to this graph")
+
+    created_nodes: Dict[str, uuid.UUID] = {}
+    for op in node_creates:
+        if op.ref in created_nodes:
+            raise BatchValidationError(f"Duplicate node ref '{op.ref}'")
+        created_nodes[op.ref] = uuid.uuid4()
+
+    def resolve(endpoint: str) -> uuid.UUID:
+        if endpoint in created_nodes:
+            return created_nodes[endpoint]
+        node_id = _parse_uuid(endpoint)
+        if node_id is None or node_id not in existing_nodes or node_id in node_deletes:
+            raise BatchValidationError(f"Unknown node '{endpoint}'")
+        return node_id
+
+    for op in node_updates:
+        if op.id not in existing_nodes or op.id in node_deletes:
+            raise BatchValidationError(f"Unknown node '{op.id}'")
+    if node_deletes - existing_nodes:
+        raise BatchValidationError("Some nodes do not belong to this graph")
+
+    edge_rows = []
+    created_edges: Dict[str, uuid.UUID] = {}
+    for op in edge_creates:
+        edge_id = uuid.uuid4()
+        edge_rows.append({
+            "id": edge_id, "graph_id": graph_id,
+            "source_node_id": resolve(op.source_node_id), "target_node_id": resolve(op.target_node_id),
+        })
+        if op.ref is not None:
+            created_edges[op.ref] = edge_id
+
+    # 2. Удаления. Ребра, прогресс и содержимое удаляемых узлов убираем сами:
+    # групповой DELETE не проходит через ORM-каскады.
+    removed_edges = set(edge_deletes)
+    if edge_deletes:
+        await db.execute(delete(Edge).where(Edge.id.in_(edge_deletes)))
+    if node_deletes:
+        result = await db.execute(delete(Edge).where(
+            Edge.graph_id == graph_id,
+            or_(Edge.source_node_id.in_(node_deletes), Edge.target_node_id.in_(node_deletes))
+        ).returning(Edge.id))
+        removed_edges.update(result.scalars().all())
+        await db.execute(delete(UserProgress).where(UserProgress.node_id.in_(node_deletes)))
+        await db.execute(delete(NodeContent).where(NodeContent.node_id.in_(node_deletes)))
+        await db.execute(delete(Node).where(Node.id.in_(node_deletes)))
+        await search_crud.remove_from_index(db, node_deletes)
+
+    # 3. Создание узлов одним executemany (и содержимого - вторым)
+    if node_creates:
+        await node_crud.insert_nodes(db, [
+            {**op.model_dump(exclude={"op", "ref"}), "id": created_nodes[op.ref], "graph_id": graph_id}
+            for op in node_creates
+        ])
+
+    # 4. Изменение узлов: bulk UPDATE по первичному ключу, сгруппированный по набору полей;
+    # содержимое перезаписывается отдельно, в node_contents
+    updates_by_fields: Dict[frozenset, List[dict]] = defaultdict(list)
+    contents: Dict[uuid.UUID, str] = {}
+    reindexed: Set[uuid.UUID] = set(created_nodes.values())
+    updated_nodes: Dict[uuid.UUID, dict] = {}
+    for op in node_updates:
+        values = op.model_dump(exclude={"op", "id"}, exclude_unset=True)
+        if not values:
+            continue
+        updated_nodes.setdefault(op.id, {}).update(values)
+        if "name" in values or "content" in values:
+            reindexed.add(op.id)
+        if "content" in values:
+            contents[op.id] = values.pop("content")
+        if values:
+            updates_by_fields[frozenset(values)].append({"id": op.id, **values})
+    for rows in updates_by_fields.values():
+        await db.execute(update(Node), rows)
+    await node_crud.write_node_contents(db, contents)
+
+    # 5. Создание ребер одним executemany и проверка, что они не замкнули цикл
+    # пререквизитов (граф проверяется в состоянии после всей пачки)
+    if edge_rows:
+        await db.execute(insert(Edge), edge_rows)
+        topology = await analysis_crud.load_graph_topology(db, graph_id)
+        for row in edge_rows:
+            source = topology.ordinals.index_of(row["source_node_id"])
+            target = topology.ordinals.index_of(row["target_node_id"])
+            if topology.would_create_cycle(source, target):
+                await db.rollback()
+                raise BatchValidationError(
+                    f"Edge {row['source_node_id']} -> {row['target_node_id']} would create a prerequisite cycle"
+                )
+
+    if reindexed:
+        result = await db.execute(select(Node).where(Node.id.in_(reindexed)))
+        await search_crud.index_nodes(db, result.scalars().all())
+
+    revision = await bump_graph_revision(db, graph_id)
+    await change_crud.record_changes(db, graph_id, revision, [
+        *((EDGE, DELETE, edge_id) for edge_id in removed_edges),
+        *((NODE, DELETE, node_id) for node_id in node_deletes),
+        *((NODE, CREATE, node_id) for node_id in created_nodes.values()),
+        *((NODE, UPDATE, node_id) for node_id in updated_nodes),
+        *((EDGE, CREATE, row["id"]) for row in edge_rows),
+    ])
+    await db.commit()
+    # Кэши анализа переносим на новую ревизию, если набор узлов не изменился
+    if node_creates or node_deletes or edge_deletes:
+        analysis_crud.structure_changed(graph_id)
+    elif edge_rows:
+        analysis_crud.edges_added(graph_id, revision, [(row["source_node_id"], row["target_node_id"]) for row in edge_rows])
+    else:
+        analysis_crud.structure_unchanged(graph_id, revision)
+    live.publish(
+        graph_id, revision,
+        nodes=[
+            *(live.node_delta(created_nodes[op.ref], op.model_dump()) for op in node_creates),
+            *(live.node_delta(node_id, values) for node_id, values in updated_nodes.items()),
+        ],
+        edges=[live.edge_delta(row["id"], row["source_node_id"], row["target_node_id"]) for row in edge_rows],
+        removed_nodes=node_deletes, removed_edges=removed_edges,
+    )
+    return {"created_nodes": created_nodes, "created_edges": created_edges, "revision": revision}
+
+
+async def _existing_ids(db: AsyncSession, model, graph_id: uuid.UUID, ids: Set[uuid.UUID]) -> Set[uuid.UUID]:
+    if not ids:
+        return set()
+    result = await db.execute(select(model.id).where(model.graph_id == graph_id, model.id.in_(ids)))
+    return set(result.scalars().all())
+
+
+def _parse_uuid(value: str):
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return None
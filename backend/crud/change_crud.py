@@ -0,0 +1,145 @@
+# backend/crud/change_crud.py
+"""
+Журнал изменений графа для инкрементальной синхронизации. Каждая правка,
+увеличившая ревизию графа, пишет в graph_changes по записи на затронутый
+узел или ребро, и GET /graphs/{id}/changes?since=R отдает только элементы,
+измененные после ревизии R: повторное открытие графа стоит пропорционально
+числу изменений, а не размеру графа.
+
+Сжатие оставляет по одной, последней, записи на элемент (для дельты важно
+лишь, существует ли элемент сейчас) и удаляет записи старше
+GRAPH_CHANGES_RETENTION_REVISIONS ревизий, поднимая graphs.changelog_floor:
+клиенту с ревизией ниже нее нужна полная загрузка графа.
+"""
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.core.config import (
+    GRAPH_CHANGES_COMPACT_EVERY, GRAPH_CHANGES_MAX_DELTA, GRAPH_CHANGES_RETENTION_REVISIONS
+)
+from backend.models.graph_model import Graph, GraphChange, Node, Edge
+
+NODE, EDGE = "node", "edge"
+CREATE, UPDATE, DELETE = "create", "update", "delete"
+
+# (entity, op, entity_id)
+Change = Tuple[str, str, uuid.UUID]
+
+
+async def record_changes(db: AsyncSession, graph_id: uuid.UUID, revision: int, changes: Iterable[Change]) -> None:
+    """
+    Записывает изменения, создавшие ревизию revision, одним executemany в текущей
+    транзакции (коммит остается за вызывающим кодом). На каждой
+    GRAPH_CHANGES_COMPACT_EVERY-й ревизии заодно сжимает журнал графа.
+    """
+    rows = [
+        {"graph_id": graph_id, "revision": revision, "entity": entity, "op": op, "entity_id": entity_id}
+        for entity, op, entity_id in changes
+    ]
+    if rows:
+        await db.execute(insert(GraphChange), rows)
+    if GRAPH_CHANGES_COMPACT_EVERY > 0 and revision % GRAPH_CHANGES_COMPACT_EVERY == 0:
+        await compact_graph_changes(db, graph_id, revision)
+
+
+async def compact_graph_changes(db: AsyncSession, graph_id: uuid.UUID, revision: int) -> int:
+    """Сжимает журнал графа в текущей транзакции и возвращает число удаленных записей."""
+    removed = 0
+    floor = revision - GRAPH_CHANGES_RETENTION_REVISIONS
+    if floor > 0:
+        result = await db.execute(
+            delete(GraphChange)
+            .where(GraphChange.graph_id == graph_id, GraphChange.revision <= floor)
+            .execution_options(synchronize_session=False)
+        )
+        removed += result.rowcount
+        await db.execute(
+            update(Graph)
+            .where(Graph.id == graph_id, Graph.changelog_floor < floor)
+            .values(changelog_floor=floor)
+            .execution_options(synchronize_session=False)
+        )
+    latest = (
+        select(func.max(GraphChange.id))
+        .where(GraphChange.graph_id == graph_id)
+        .group_by(GraphChange.entity, GraphChange.entity_id)
+    )
+    result = await db.execute(
+        delete(GraphChange)
+        .where(GraphChange.graph_id == graph_id, GraphChange.id.not_in(latest))
+        .execution_options(synchronize_session=False)
+    )
+    return removed + result.rowcount
+
+
+async def compact_all_changes(db: AsyncSession) -> int:
+    """Сжимает журналы всех графов, у которых они есть, и коммитит. Возвращает число удаленных записей."""
+    result = await db.execute(
+        select(Graph.id, Graph.revision).where(Graph.id.in_(select(GraphChange.graph_id).distinct()))
+    )
+    removed = 0
+    for graph_id, revision in result.all():
+        removed += await compact_graph_changes(db, graph_id, revision)
+    await db.commit()
+    return removed
+
+
+async def get_changes_since(db: AsyncSession, graph_id: uuid.UUID, since: int) -> Optional[dict]:
+    """
+    Дельта графа после ревизии since или None, если графа нет. Возвращает
+    словарь с revision, full_resync, строками созданных и измененных узлов
+    (id, name, position_x, position_y) и ребер (id, source_node_id, target_node_id)
+    и id удаленных элементов. full_resync=True, если записи после since уже
+    сжаты, since больше текущей ревизии или дельта больше GRAPH_CHANGES_MAX_DELTA.
+    """
+    # Ревизия графа и записи журнала после since одним запросом: у графа без
+    # изменений - одна строка с пустыми колонками журнала
+    result = await db.execute(
+        select(Graph.revision, Graph.changelog_floor, GraphChange.entity, GraphChange.op, GraphChange.entity_id)
+        .outerjoin(GraphChange, and_(GraphChange.graph_id == Graph.id, GraphChange.revision > since))
+        .where(Graph.id == graph_id)
+        .order_by(GraphChange.id)
+        .limit(GRAPH_CHANGES_MAX_DELTA + 1)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    head = rows[0]
+    delta = {
+        "revision": head.revision, "full_resync": False, "nodes": [], "edges": [],
+        "removed_node_ids": [], "removed_edge_ids": [],
+    }
+    if since < head.changelog_floor or since > head.revision or len(rows) > GRAPH_CHANGES_MAX_DELTA:
+        delta["full_resync"] = True
+        return delta
+    if head.entity is None:
+        return delta
+
+    # Последняя операция над каждым элементом
+    last_ops: Dict[Tuple[str, uuid.UUID], str] = {}
+    for row in rows:
+        last_ops[(row.entity, row.entity_id)] = row.op
+    changed = {NODE: [], EDGE: []}
+    for (entity, entity_id), op in last_ops.items():
+        if op == DELETE:
+            delta["removed_node_ids" if entity == NODE else "removed_edge_ids"].append(entity_id)
+        else:
+            changed[entity].append(entity_id)
+
+    if changed[NODE]:
+        result = await db.execute(
+            select(Node.id, Node.name, Node.position_x, Node.position_y)
+            .where(Node.graph_id == graph_id, Node.id.in_(changed[NODE]))
+        )
+        delta["nodes"] = result.all()
+    if changed[EDGE]:
+        result = await db.execute(
+            select(Edge.id, Edge.source_node_id, Edge.target_node_id)
+            .where(Edge.graph_id == graph_id, Edge.id.in_(changed[EDGE]))
+        )
+        delta["edges"] = result.all()
+    return delta
@@ -1,12 +1,15 @@
 # backend/crud/comment_crud.py
 import uuid
-from typing import List
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
 from ..models.graph_model import Comment
 from ..schemas.comment_schema import CommentCreate
+from ..core.pagination import encode_cursor, decode_cursor
 
 async def create_comment_for_graph(
     db: AsyncSession,
@@ -30,15 +33,30 @@ async def get_comments_for_graph(
     db: AsyncSession,
     graph_id: uuid.UUID,
     skip: int = 0,
-    limit: int = 10
-) -> List[Comment]:
-    """Получает список комментариев для графа с пагинацией."""
-    result = await db.execute(
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> Tuple[List[Comment], Optional[str]]:
+    """
+    Получает список комментариев для графа с пагинацией (новые сверху).
+    Если передан cursor, страница выбирается по ключу (created_at, id), а skip
+    игнорируется. Возвращает комментарии и курсор следующей страницы.
+    """
+    query = (
         select(Comment)
         .options(selectinload(Comment.owner)) # Жадно загружаем автора
         .filter(Comment.graph_id == graph_id)
-        .order_by(Comment.created_at.desc()) # Новые комментарии сверху
-        .offset(skip)
-        .limit(limit)
+        .order_by(Comment.created_at.desc(), Comment.id.desc()) # Новые комментарии сверху
     )
-    return result.scalars().all() # type: ignore
\ No newline at end of file
+    if cursor is not None:
+        last_created_at, last_id = decode_cursor(cursor, "comments", [datetime, uuid.UUID])
+        query = query.where(tuple_(Comment.created_at, Comment.id) < tuple_(last_created_at, last_id))
+    else:
+        query = query.offset(skip)
+
+    result = await db.execute(query.limit(limit))
+    comments = result.scalars().all()
+
+    next_cursor = None
+    if len(comments) == limit:
+        next_cursor = encode_cursor("comments", [comments[-1].created_at, comments[-1].id])
+    return comments, next_cursor # type: ignore
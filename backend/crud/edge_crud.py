@@ -3,19 +3,29 @@ import uuid
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
 from ..models.graph_model import Edge
+from .graph_crud import bump_graph_revision
+from . import analysis_crud, change_crud
+from ..core import live
 
 async def get_edge_by_id(db: AsyncSession, edge_id: uuid.UUID) -> Optional[Edge]:
-    """Получает ребро по ID, жадно загружая его граф для проверки прав."""
-    result = await db.execute(
-        select(Edge).options(selectinload(Edge.graph)).filter(Edge.id == edge_id)
-    )
+    """
+    Получает ребро по ID без его графа: права проверяются по edge.graph_id
+    через graph_crud.get_graph_owner.
+    """
+    result = await db.execute(select(Edge).filter(Edge.id == edge_id))
     return result.scalar_one_or_none()
 
 async def delete_edge(db: AsyncSession, db_edge: Edge) -> None:
     """Удаляет ребро."""
+    graph_id, edge_id = db_edge.graph_id, db_edge.id
     await db.delete(db_edge)
+    revision = await bump_graph_revision(db, graph_id) # type: ignore
+    await change_crud.record_changes(
+        db, graph_id, revision, [(change_crud.EDGE, change_crud.DELETE, edge_id)] # type: ignore
+    )
     await db.commit()
+    analysis_crud.structure_changed(graph_id) # type: ignore
+    live.publish(graph_id, revision, removed_edges=[edge_id]) # type: ignore
     return
\ No newline at end of file
@@ -1,13 +1,22 @@
 # backend/crud/graph_crud.py
-from sqlalchemy import distinct, func, case, or_
+from sqlalchemy import and_, func, literal, update, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from typing import List, Optional  # noqa: F401
+from datetime import datetime
 import uuid
 
 from backend.models.graph_model import Graph, Node, Edge, GraphRating
+from backend.models.user_model import User
 from backend.schemas.graph_schema import GraphCreate, NodeCreate, EdgeCreate
+from backend.crud import search_crud, analysis_crud, change_crud
+from backend.core.cache import TTLCache
+from backend.core import live
+from backend.core.config import (
+    CATALOG_COUNT_TTL_SECONDS, GRAPH_OWNER_CACHE_TTL_SECONDS, GRAPH_OWNER_CACHE_MAX_ENTRIES
+)
+from backend.core.pagination import InvalidCursorError, encode_cursor, decode_cursor
 
 async def create_graph(db: AsyncSession, graph: GraphCreate, owner_id: uuid.UUID) -> Graph:
     """
@@ -17,102 +26,225 @@ async def create_graph(db: AsyncSession, graph: GraphCreate, owner_id: uuid.UUID
     db_graph = Graph(**graph.model_dump(), owner_id=owner_id)
     db.add(db_graph)
     
-    # 2. Коммитим, чтобы сохранить объект в БД и получить ID
+    # 2. Сбрасываем изменения, чтобы получить ID, и добавляем граф в поисковый индекс
+    await db.flush()
+    await search_crud.index_graph(db, db_graph)
+    
+    # 3. Коммитим граф вместе с документом индекса одной транзакцией
     await db.commit()
+    catalog_count_cache.clear()
     
-    # 3. Обновляем объект из БД, "жадно" загружая связанного владельца.
+    # 4. Обновляем объект из БД, "жадно" загружая связанного владельца.
     # Это ключевой шаг, который делает объект снова "живым" и загружает связи.
     await db.refresh(db_graph, attribute_names=['owner'])
     
     return db_graph
 
-async def get_graph_by_id(db: AsyncSession, graph_id: uuid.UUID) -> Optional[Graph]:
+# Владелец графа не меняется при правках графа, поэтому проверки прав на запись
+# обходятся без запроса к БД. Смена владельца или удаление графа должны
+# вызывать invalidate_graph_owner; TTL ограничивает устаревание в других процессах.
+graph_owner_cache = TTLCache(ttl_seconds=GRAPH_OWNER_CACHE_TTL_SECONDS, max_entries=GRAPH_OWNER_CACHE_MAX_ENTRIES)
+
+async def get_graph_owner(db: AsyncSession, graph_id: uuid.UUID) -> Optional[uuid.UUID]:
     """
-    Получает граф по ID, "жадно" загружая все связанные сущности:
-    владельца, узлы и ребра.
+    Возвращает owner_id графа или None, если графа нет. Читает одну колонку
+    (без узлов, ребер и ORM-объектов) и кэширует результат.
     """
-    result = await db.execute(
-        select(Graph)
-        .options(
-            selectinload(Graph.owner),
-            selectinload(Graph.nodes), # <-- Загружаем узлы
-            selectinload(Graph.edges)  # <-- Загружаем ребра
+    owner_id = graph_owner_cache.get(graph_id)
+    if owner_id is None:
+        result = await db.execute(select(Graph.owner_id).where(Graph.id == graph_id))
+        owner_id = result.scalar_one_or_none()
+        if owner_id is not None:
+            graph_owner_cache.set(graph_id, owner_id)
+    return owner_id
+
+def invalidate_graph_owner(graph_id: uuid.UUID) -> None:
+    graph_owner_cache.invalidate(graph_id)
+
+async def get_graph_header(db: AsyncSession, graph_id: uuid.UUID, viewer_id: Optional[uuid.UUID] = None):
+    """
+    Получает "шапку" графа и его ревизию одним запросом по колонкам,
+    не создавая ORM-объектов и не загружая узлы и ребра.
+    Возвращает строку (id, name, description, created_at, revision,
+    likes, dislikes, owner_id, owner_username, my_vote) или None.
+    my_vote - голос viewer_id (1, -1 или 0), подтягивается в том же запросе.
+    """
+    if viewer_id is not None:
+        my_vote = func.coalesce(GraphRating.value, 0)
+    else:
+        my_vote = literal(0)
+    query = (
+        select(
+            Graph.id, Graph.name, Graph.description, Graph.created_at, Graph.revision,
+            Graph.likes, Graph.dislikes, Graph.owner_id, User.username.label("owner_username"),
+            my_vote.label("my_vote")
         )
-        .filter(Graph.id == graph_id)
+        .join(User, User.id == Graph.owner_id)
+        .where(Graph.id == graph_id)
     )
+    if viewer_id is not None:
+        query = query.outerjoin(
+            GraphRating, and_(GraphRating.graph_id == Graph.id, GraphRating.user_id == viewer_id)
+        )
+    result = await db.execute(query)
+    return result.one_or_none()
+
+async def get_graph_revision(db: AsyncSession, graph_id: uuid.UUID) -> Optional[int]:
+    """Возвращает только ревизию структуры графа или None, если графа нет."""
+    result = await db.execute(select(Graph.revision).where(Graph.id == graph_id))
     return result.scalar_one_or_none()
 
+async def get_node_positions(db: AsyncSession, graph_id: uuid.UUID):
+    """Позиции узлов графа: строки (id, position_x, position_y)."""
+    result = await db.execute(
+        select(Node.id, Node.position_x, Node.position_y).where(Node.graph_id == graph_id)
+    )
+    return result.all()
+
+async def set_node_positions(
+    db: AsyncSession, graph_id: uuid.UUID, expected_revision: int, positions: List[dict]
+) -> Optional[int]:
+    """
+    Записывает позиции узлов ({"id", "position_x", "position_y"}) одним групповым
+    UPDATE и увеличивает ревизию графа. Если граф успел измениться после
+    expected_revision, ничего не записывает и возвращает None.
+    """
+    result = await db.execute(
+        update(Graph)
+        .where(Graph.id == graph_id, Graph.revision == expected_revision)
+        .values(revision=Graph.revision + 1)
+        .returning(Graph.revision)
+    )
+    revision = result.scalar_one_or_none()
+    if revision is None:
+        await db.rollback()
+        return None
+    if positions:
+        await db.execute(update(Node), positions)
+        await change_crud.record_changes(
+            db, graph_id, revision, [(change_crud.NODE, change_crud.UPDATE, p["id"]) for p in positions]
+        )
+    await db.commit()
+    analysis_crud.structure_unchanged(graph_id, revision)
+    live.publish(graph_id, revision, nodes=[live.node_delta(p["id"], p) for p in positions])
+    return revision
+
+async def get_graph_elements(db: AsyncSession, graph_id: uuid.UUID, nodes=None):
+    """
+    Загружает структуру графа в виде легких кортежей колонок (без ORM-объектов
+    и без содержимого узлов): узлы (id, name, position_x, position_y)
+    и ребра (id, source_node_id, target_node_id). Если узлы уже загружены
+    (progress_crud.get_progress_with_nodes), передаются в nodes и не читаются повторно.
+    """
+    if nodes is None:
+        nodes_result = await db.execute(
+            select(Node.id, Node.name, Node.position_x, Node.position_y).where(Node.graph_id == graph_id)
+        )
+        nodes = nodes_result.all()
+    edges_result = await db.execute(
+        select(Edge.id, Edge.source_node_id, Edge.target_node_id).where(Edge.graph_id == graph_id)
+    )
+    return nodes, edges_result.all()
+
+async def bump_graph_revision(db: AsyncSession, graph_id: uuid.UUID) -> int:
+    """
+    Увеличивает ревизию структуры графа в рамках текущей транзакции
+    и возвращает новое значение. Коммит остается за вызывающим кодом.
+    """
+    result = await db.execute(
+        update(Graph)
+        .where(Graph.id == graph_id)
+        .values(revision=Graph.revision + 1)
+        .returning(Graph.revision)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one()
+
+# Колонки ключа для курсорной (keyset) пагинации каталога, все по убыванию
+CATALOG_KEYSETS = {
+    "date_desc": ([Graph.created_at, Graph.id], [datetime, uuid.UUID]),
+    "rating_desc": ([Graph.score, Graph.created_at, Graph.id], [int, datetime, uuid.UUID]),
+}
+
+# Точное число графов нужно только для номеров страниц, поэтому оно кэшируется
+catalog_count_cache = TTLCache(ttl_seconds=CATALOG_COUNT_TTL_SECONDS, max_entries=1024)
+
 async def get_graphs(
     db: AsyncSession,
     skip: int = 0,
     limit: int = 10,
     sort_by: str = "date_desc",
-    search_query: Optional[str] = None
+    search_query: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
     """
     Получает графы, включая их рейтинг, с пагинацией, сортировкой и поиском.
+    sort_by: 'date_desc', 'rating_desc' или 'relevance' (только вместе с поиском).
+    Если передан cursor (из next_cursor предыдущей страницы), страница выбирается
+    по ключу сортировки, а skip игнорируется. Для 'relevance' доступен только skip:
+    курсор с ней - InvalidCursorError.
     """
     
-    # 1. Основной запрос для выборки данных
-    # Мы сразу соединяем Graph с GraphRating, чтобы посчитать голоса
-    # Используем outerjoin, чтобы графы без оценок тоже попадали в выборку
-    base_query = select(
-        Graph,
-        func.sum(case((GraphRating.value == 1, 1), else_=0)).label("likes"),
-        func.sum(case((GraphRating.value == -1, 1), else_=0)).label("dislikes")
-    ).outerjoin(GraphRating, Graph.id == GraphRating.graph_id)
+    # 0. Поиск выполняется по полнотекстовому индексу, а не через LIKE по всей таблице
+    matches = None
+    if search_query:
+        matches = search_crud.match_graphs(db, search_query)
+        if matches is None:
+            return {"total": 0, "graphs": [], "next_cursor": None}
+
+    # 1. Основной запрос для выборки данных.
+    # Лайки и дизлайки хранятся в самом графе, агрегировать голоса не нужно.
+    base_query = select(Graph)
 
     # 2. Применяем фильтр поиска, если он есть
-    if search_query:
-        search_term = f"%{search_query.lower()}%"
-        base_query = base_query.filter(
-            or_(
-                func.lower(Graph.name).like(search_term),
-                func.lower(Graph.description).like(search_term)
-            )
-        )
-    
-    # Группировка должна быть после фильтрации, но до сортировки
-    query_with_filter = base_query.group_by(Graph.id)
+    if matches is not None:
+        base_query = base_query.join(matches, matches.c.entity_id == Graph.id)
     
-    # 3. Применяем сортировку
-    if sort_by == "rating_desc":
-        # Сортируем по разнице лайков и дизлайков
-        rating_expr = func.sum(case((GraphRating.value == 1, 1), (GraphRating.value == -1, -1), else_=0))
-        # func.coalesce нужен для графов без оценок (чтобы они считались с рейтингом 0)
-        order_expr = func.coalesce(rating_expr, 0).desc()
-        query_with_sort = query_with_filter.order_by(order_expr, Graph.created_at.desc())
-    else: # По умолчанию (date_desc)
-        query_with_sort = query_with_filter.order_by(Graph.created_at.desc())
-
-    # 4. Применяем пагинацию и загрузку связанных данных
-    final_query = query_with_sort.options(selectinload(Graph.owner)).offset(skip).limit(limit)
+    # 3. Применяем сортировку. id в конце ключа делает порядок однозначным.
+    keyset = None
+    if sort_by == "relevance" and matches is not None:
+        if cursor is not None:
+            raise InvalidCursorError("Cursor pagination is not available for relevance sorting, use skip")
+        query_with_sort = base_query.order_by(matches.c.rank.desc(), Graph.created_at.desc(), Graph.id.desc())
+    else:
+        # 'rating_desc' идет по индексу ix_graphs_score_created_at_id, остальное - как date_desc
+        if sort_by not in CATALOG_KEYSETS:
+            sort_by = "date_desc"
+        keyset = CATALOG_KEYSETS[sort_by]
+        query_with_sort = base_query.order_by(*(column.desc() for column in keyset[0]))
+
+    # 4. Применяем пагинацию: по курсору или по смещению
+    if cursor is not None and keyset is not None:
+        key_columns, key_types = keyset
+        last_key = decode_cursor(cursor, sort_by, key_types)
+        query_with_sort = query_with_sort.where(tuple_(*key_columns) < tuple_(*last_key))
+    else:
+        query_with_sort = query_with_sort.offset(skip)
+    final_query = query_with_sort.options(selectinload(Graph.owner)).limit(limit)
     
     # 5. Выполняем запрос для получения графов
     result = await db.execute(final_query)
+    graphs = result.scalars().all()
+
+    next_cursor = None
+    if keyset is not None and len(graphs) == limit:
+        last = graphs[-1]
+        next_cursor = encode_cursor(sort_by, [getattr(last, column.key) for column in keyset[0]])
+
+    # 6. Общее количество элементов (с учетом поиска, но не пагинации).
+    # Считается отдельным запросом не чаще раза в CATALOG_COUNT_TTL_SECONDS.
+    count_key = search_query.lower() if search_query else None
+    total = catalog_count_cache.get(count_key)
+    if total is None:
+        if matches is not None:
+            # Каждому графу соответствует ровно один документ индекса
+            count_query = select(func.count()).select_from(matches)
+        else:
+            count_query = select(func.count(Graph.id))
+        total = (await db.execute(count_query)).scalar_one()
+        catalog_count_cache.set(count_key, total)
     
-    # Собираем результат. Теперь result содержит кортежи (Graph, likes, dislikes)
-    graphs_with_ratings = []
-    for graph, likes, dislikes in result.fetchall():
-        graph.likes = likes or 0
-        graph.dislikes = dislikes or 0
-        graphs_with_ratings.append(graph)
-
-    # 6. Выполняем отдельный запрос для подсчета общего количества элементов
-    # Он должен учитывать фильтр поиска, но не пагинацию
-    count_query = select(func.count(distinct(Graph.id))) # Считаем уникальные графы
-    if search_query:
-        search_term = f"%{search_query.lower()}%"
-        count_query = count_query.filter(
-             or_(
-                func.lower(Graph.name).like(search_term),
-                func.lower(Graph.description).like(search_term)
-            )
-        )
-    
-    total = (await db.execute(count_query)).scalar_one()
-    
-    return {"total": total, "graphs": graphs_with_ratings}
+    return {"total": total, "graphs": graphs, "next_cursor": next_cursor}
 
 async def create_node_for_graph(db: AsyncSession, node: NodeCreate, graph_id: uuid.UUID) -> Node:
     """Создает узел для указанного графа."""
@@ -121,19 +253,47 @@ async def create_node_for_graph(db: AsyncSession, node: NodeCreate, graph_id: uu
         graph_id=graph_id
     )
     db.add(db_node)
+    await db.flush()
+    await search_crud.index_nodes(db, [db_node])
+    revision = await bump_graph_revision(db, graph_id)
+    await change_crud.record_changes(db, graph_id, revision, [(change_crud.NODE, change_crud.CREATE, db_node.id)])
     await db.commit()
     await db.refresh(db_node)
+    live.publish(graph_id, revision, nodes=[live.node_delta(db_node.id, node.model_dump())]) # type: ignore
     return db_node
 
-async def create_edge_for_graph(db: AsyncSession, edge: EdgeCreate, graph_id: uuid.UUID) -> Edge:
-    """Создает ребро для указанного графа."""
-    # TODO: В будущем здесь нужна валидация, что source и target узлы
-    # принадлежат этому же графу. Пока опускаем для простоты.
+async def create_edge_for_graph(
+    db: AsyncSession, edge: EdgeCreate, graph_id: uuid.UUID, expected_revision: int
+) -> Optional[Edge]:
+    """
+    Создает ребро для указанного графа. Если граф успел измениться после
+    expected_revision, ничего не записывает и возвращает None.
+    """
+    # Принадлежность узлов графу и отсутствие циклов проверяет вызывающий код
+    # (analysis_crud.would_create_cycle) по ревизии expected_revision. Условное
+    # увеличение ревизии не дает двум параллельным встречным ребрам вместе
+    # замкнуть цикл: проигравший запрос увидит чужую ревизию и перепроверит.
+    result = await db.execute(
+        update(Graph)
+        .where(Graph.id == graph_id, Graph.revision == expected_revision)
+        .values(revision=Graph.revision + 1)
+        .returning(Graph.revision)
+    )
+    revision = result.scalar_one_or_none()
+    if revision is None:
+        await db.rollback()
+        return None
     db_edge = Edge(
         **edge.model_dump(),
         graph_id=graph_id
     )
     db.add(db_edge)
+    await db.flush()
+    await change_crud.record_changes(db, graph_id, revision, [(change_crud.EDGE, change_crud.CREATE, db_edge.id)])
     await db.commit()
     await db.refresh(db_edge)
+    analysis_crud.edges_added(graph_id, revision, [(db_edge.source_node_id, db_edge.target_node_id)])
+    live.publish(graph_id, revision, edges=[
+        live.edge_delta(db_edge.id, db_edge.source_node_id, db_edge.target_node_id) # type: ignore
+    ])
     return db_edge
\ No newline at end of file
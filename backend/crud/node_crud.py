@@ -1,17 +1,54 @@
 # backend/crud/node_crud.py
 import uuid
-from typing import Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, or_, update
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
-from backend.models.graph_model import Node
+from backend.models.graph_model import Node, NodeContent, Edge, Graph
 from backend.schemas.graph_schema import NodeUpdate
+from backend.crud.graph_crud import bump_graph_revision
+from backend.crud import search_crud, analysis_crud, change_crud
+from backend.core import live
+from backend.core.node_content import encode_content
 
 async def get_node_by_id(db: AsyncSession, node_id: uuid.UUID) -> Optional[Node]:
-    """Получает узел по ID, жадно загружая его граф для проверки прав."""
+    """
+    Получает узел по ID без его графа: права проверяются по node.graph_id
+    через graph_crud.get_graph_owner. Содержимое (node_contents) приходит
+    тем же запросом, но распаковывается только при обращении к node.content.
+    """
+    result = await db.execute(select(Node).filter(Node.id == node_id))
+    return result.scalar_one_or_none()
+
+async def insert_nodes(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    Групповая вставка узлов (импорт, пачки правок): строки - поля Node и content.
+    Узлы вставляются одним executemany, непустое содержимое - вторым, в node_contents.
+    """
+    await db.execute(insert(Node), [{key: value for key, value in row.items() if key != "content"} for row in rows])
+    await write_node_contents(db, {row["id"]: row.get("content") for row in rows}, replace=False)
+
+async def write_node_contents(db: AsyncSession, contents: Dict[uuid.UUID, Optional[str]], replace: bool = True) -> None:
+    """Записывает содержимое узлов {node_id: текст}; replace=False - для только что созданных узлов."""
+    if replace and contents:
+        await db.execute(delete(NodeContent).where(NodeContent.node_id.in_(list(contents))))
+    rows = [{"node_id": node_id, **encode_content(text)} for node_id, text in contents.items() if text]
+    if rows:
+        await db.execute(insert(NodeContent), rows)
+
+async def get_node_graph_id(db: AsyncSession, node_id: uuid.UUID) -> Optional[uuid.UUID]:
+    """Возвращает graph_id узла или None, если узла нет (без загрузки самого узла)."""
+    result = await db.execute(select(Node.graph_id).where(Node.id == node_id))
+    return result.scalar_one_or_none()
+
+async def get_node_revision(db: AsyncSession, node_id: uuid.UUID) -> Optional[int]:
+    """
+    Возвращает ревизию графа, которому принадлежит узел, не загружая сам узел.
+    Любое изменение узла увеличивает ревизию графа, поэтому ее достаточно для ETag.
+    """
     result = await db.execute(
-        select(Node).options(selectinload(Node.graph)).filter(Node.id == node_id)
+        select(Graph.revision).join(Node, Node.graph_id == Graph.id).where(Node.id == node_id)
     )
     return result.scalar_one_or_none()
 
@@ -22,12 +59,63 @@ async def update_node(db: AsyncSession, db_node: Node, node_in: NodeUpdate) -> N
         setattr(db_node, key, value)
     
     db.add(db_node)
+    if "name" in update_data or "content" in update_data:
+        await search_crud.index_nodes(db, [db_node])
+    revision = await bump_graph_revision(db, db_node.graph_id) # type: ignore
+    await change_crud.record_changes(
+        db, db_node.graph_id, revision, [(change_crud.NODE, change_crud.UPDATE, db_node.id)] # type: ignore
+    )
     await db.commit()
     await db.refresh(db_node)
+    # Поля узла не влияют на структуру пререквизитов
+    analysis_crud.structure_unchanged(db_node.graph_id, revision) # type: ignore
+    live.publish(db_node.graph_id, revision, nodes=[live.node_delta(db_node.id, update_data)]) # type: ignore
     return db_node
 
+async def flush_node_positions(
+    db: AsyncSession, positions: Dict[uuid.UUID, Dict[uuid.UUID, dict]]
+) -> Dict[uuid.UUID, int]:
+    """
+    Записывает позиции, накопленные буфером (core/position_buffer.py), одной
+    транзакцией: positions - {graph_id: {node_id: {"position_x"/"position_y": ...}}}.
+    Каждый граф получает одну новую ревизию и групповой UPDATE своих узлов;
+    узлы, удаленные до записи, пропускаются. Возвращает новые ревизии графов.
+    """
+    revisions: Dict[uuid.UUID, int] = {}
+    written: Dict[uuid.UUID, list] = {}
+    for graph_id, nodes in positions.items():
+        result = await db.execute(select(Node.id).where(Node.graph_id == graph_id, Node.id.in_(list(nodes))))
+        rows = [{"id": node_id, **nodes[node_id]} for node_id in result.scalars()]
+        if not rows:
+            continue
+        await db.execute(update(Node), rows)
+        revision = await bump_graph_revision(db, graph_id)
+        await change_crud.record_changes(
+            db, graph_id, revision, [(change_crud.NODE, change_crud.UPDATE, row["id"]) for row in rows]
+        )
+        revisions[graph_id], written[graph_id] = revision, rows
+    await db.commit()
+    for graph_id, revision in revisions.items():
+        analysis_crud.structure_unchanged(graph_id, revision)
+        live.publish(graph_id, revision, nodes=[live.node_delta(row["id"], row) for row in written[graph_id]])
+    return revisions
+
 async def delete_node(db: AsyncSession, db_node: Node) -> None:
     """Удаляет узел."""
+    graph_id, node_id = db_node.graph_id, db_node.id
+    # Ребра узла удаляются каскадом: в журнал изменений они попадают отдельно
+    result = await db.execute(
+        select(Edge.id).where(or_(Edge.source_node_id == node_id, Edge.target_node_id == node_id))
+    )
+    edge_ids = result.scalars().all()
     await db.delete(db_node)
+    await search_crud.remove_from_index(db, [node_id]) # type: ignore
+    revision = await bump_graph_revision(db, graph_id) # type: ignore
+    await change_crud.record_changes(db, graph_id, revision, [ # type: ignore
+        (change_crud.NODE, change_crud.DELETE, node_id),
+        *((change_crud.EDGE, change_crud.DELETE, edge_id) for edge_id in edge_ids),
+    ])
     await db.commit()
+    analysis_crud.structure_changed(graph_id) # type: ignore
+    live.publish(graph_id, revision, removed_nodes=[node_id], removed_edges=edge_ids) # type: ignore
     return
\ No newline at end of file
@@ -1,60 +1,105 @@
 # backend/crud/progress_crud.py
 import uuid
-import logging
-from typing import List, Set
+from typing import List, Tuple
+from sqlalchemy import and_, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from backend.core.progress_bitmap import NodeOrdinals, bitmap_from_flags, progress_cache
 from backend.models.graph_model import UserProgress, Node
 
-# Настраиваем логгер для этого модуля
-logger = logging.getLogger(__name__)
-
-async def mark_node_as_learned(db: AsyncSession, user_id: uuid.UUID, node_id: uuid.UUID):
-    """Отмечает узел как изученный для пользователя."""
+async def mark_node_as_learned(db: AsyncSession, user_id: uuid.UUID, node_id: uuid.UUID, graph_id: uuid.UUID):
+    """Отмечает узел графа graph_id как изученный для пользователя."""
     existing_progress = await db.get(UserProgress, (user_id, node_id))
     if existing_progress:
         return existing_progress
 
-    new_progress = UserProgress(user_id=user_id, node_id=node_id)
+    new_progress = UserProgress(user_id=user_id, node_id=node_id, graph_id=graph_id)
     db.add(new_progress)
     await db.commit()
+    progress_cache.invalidate_bitmap(user_id, graph_id)
     return new_progress
 
 async def unmark_node_as_learned(db: AsyncSession, user_id: uuid.UUID, node_id: uuid.UUID):
     """Убирает отметку об изучении узла."""
-    progress_to_delete = await db.get(UserProgress, (user_id, node_id))
-    if progress_to_delete:
-        await db.delete(progress_to_delete)
-        await db.commit()
-    return
+    result = await db.execute(
+        delete(UserProgress)
+        .where(UserProgress.user_id == user_id, UserProgress.node_id == node_id)
+        .returning(UserProgress.graph_id)
+    )
+    graph_id = result.scalar_one_or_none()
+    await db.commit()
+    if graph_id is not None:
+        progress_cache.invalidate_bitmap(user_id, graph_id)
 
 async def get_learned_nodes_for_graph(db: AsyncSession, user_id: uuid.UUID, graph_id: uuid.UUID) -> List[uuid.UUID]:
-    """Возвращает список ID изученных узлов для конкретного графа и пользователя."""
-    logger.info("--- [CRUD] Запущена get_learned_nodes_for_graph ---")
-    logger.info(f"[CRUD] user_id: {user_id}")
-    logger.info(f"[CRUD] graph_id: {graph_id}")
-
-    # 1. Получаем ВСЕ узлы, которые изучил данный пользователь
-    learned_nodes_result = await db.execute(
-        select(UserProgress.node_id).where(UserProgress.user_id == user_id)
+    """
+    Возвращает список ID изученных узлов для конкретного графа и пользователя.
+    Один запрос по покрывающему индексу (user_id, graph_id, node_id):
+    стоимость зависит от прогресса в этом графе, а не от всей истории пользователя.
+    """
+    result = await db.execute(
+        select(UserProgress.node_id).where(UserProgress.user_id == user_id, UserProgress.graph_id == graph_id)
     )
-    all_learned_node_ids: Set[uuid.UUID] = set(learned_nodes_result.scalars().all())
-    logger.info(f"[CRUD] Все изученные узлы для юзера {user_id}: {all_learned_node_ids}")
+    return list(result.scalars().all())
 
-    if not all_learned_node_ids:
-        logger.info("[CRUD] Пользователь ничего не изучал. Возвращаем пустой список.")
-        return []
+async def get_node_ordinals(db: AsyncSession, graph_id: uuid.UUID, revision: int) -> NodeOrdinals:
+    """Порядковые номера узлов графа для указанной ревизии (из кэша или из БД)."""
+    ordinals = progress_cache.get_ordinals(graph_id, revision)
+    if ordinals is None:
+        result = await db.execute(select(Node.id).where(Node.graph_id == graph_id).order_by(Node.id))
+        ordinals = NodeOrdinals(result.scalars().all())
+        progress_cache.put_ordinals(graph_id, revision, ordinals)
+    return ordinals
 
-    # 2. Получаем ВСЕ узлы, которые принадлежат данному графу
-    graph_nodes_result = await db.execute(
-        select(Node.id).where(Node.graph_id == graph_id)
+def _nodes_with_progress(graph_id: uuid.UUID, user_id: uuid.UUID, *columns):
+    """Узлы графа в порядке номеров с флагом learned: изучен ли узел пользователем."""
+    return (
+        select(*columns, UserProgress.node_id.is_not(None).label("learned"))
+        .outerjoin(UserProgress, and_(UserProgress.node_id == Node.id, UserProgress.user_id == user_id))
+        .where(Node.graph_id == graph_id)
+        .order_by(Node.id)
     )
-    graph_node_ids: Set[uuid.UUID] = set(graph_nodes_result.scalars().all())
-    logger.info(f"[CRUD] Все узлы в графе {graph_id}: {graph_node_ids}")
-
-    # 3. Находим пересечение
-    learned_nodes_in_graph = all_learned_node_ids.intersection(graph_node_ids)
-    logger.info(f"[CRUD] Пересечение (результат): {learned_nodes_in_graph}")
-    
-    return list(learned_nodes_in_graph)
\ No newline at end of file
+
+async def get_progress_bitmap(
+    db: AsyncSession, user_id: uuid.UUID, graph_id: uuid.UUID, revision: int
+) -> Tuple[NodeOrdinals, bytes]:
+    """
+    Возвращает прогресс пользователя в графе как битовую карту по порядковым
+    номерам узлов вместе с самими номерами (для декодирования в ID).
+    Если в кэше нет номеров узлов, они и прогресс читаются одним запросом.
+    """
+    ordinals = progress_cache.get_ordinals(graph_id, revision)
+    if ordinals is None:
+        rows = (await db.execute(_nodes_with_progress(graph_id, user_id, Node.id))).all()
+        ordinals = NodeOrdinals([row.id for row in rows])
+        progress_cache.put_ordinals(graph_id, revision, ordinals)
+        bitmap = bitmap_from_flags(row.learned for row in rows)
+        progress_cache.put_bitmap(user_id, graph_id, revision, bitmap)
+        return ordinals, bitmap
+
+    bitmap = progress_cache.get_bitmap(user_id, graph_id, revision)
+    if bitmap is None:
+        learned_ids = await get_learned_nodes_for_graph(db, user_id=user_id, graph_id=graph_id)
+        bitmap = ordinals.encode(learned_ids)
+        progress_cache.put_bitmap(user_id, graph_id, revision, bitmap)
+    return ordinals, bitmap
+
+async def get_progress_with_nodes(
+    db: AsyncSession, user_id: uuid.UUID, graph_id: uuid.UUID, revision: int
+) -> Tuple[NodeOrdinals, bytes, list]:
+    """
+    Для промаха кэша структуры графа: одним запросом загружает узлы
+    (id, name, position_x, position_y) вместе с прогрессом пользователя.
+    Возвращает номера узлов, битовую карту и строки узлов для get_graph_elements.
+    """
+    rows = (await db.execute(
+        _nodes_with_progress(graph_id, user_id, Node.id, Node.name, Node.position_x, Node.position_y)
+    )).all()
+    ordinals = progress_cache.get_ordinals(graph_id, revision)
+    if ordinals is None:
+        ordinals = NodeOrdinals([row.id for row in rows])
+        progress_cache.put_ordinals(graph_id, revision, ordinals)
+    bitmap = bitmap_from_flags(row.learned for row in rows)
+    progress_cache.put_bitmap(user_id, graph_id, revision, bitmap)
+    return ordinals, bitmap, rows
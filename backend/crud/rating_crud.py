@@ -1,18 +1,26 @@
 # backend/crud/rating_crud.py
 import uuid
-from sqlalchemy import func
+from sqlalchemy import func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from ..models.graph_model import GraphRating
+from ..models.graph_model import Graph, GraphRating
 
 async def set_graph_rating(db: AsyncSession, user_id: uuid.UUID, graph_id: uuid.UUID, value: int):
-    """Устанавливает или обновляет голос пользователя за граф."""
+    """
+    Устанавливает или обновляет голос пользователя за граф и в той же
+    транзакции корректирует денормализованные счетчики графа.
+    """
+    likes_delta = 0
+    dislikes_delta = 0
     
     # Пытаемся получить существующий голос
     existing_rating = await db.get(GraphRating, (user_id, graph_id))
     
     if existing_rating:
+        # Старый голос в любом случае снимается со счетчиков
+        likes_delta -= int(existing_rating.value == 1) # type: ignore
+        dislikes_delta -= int(existing_rating.value == -1) # type: ignore
         # Если пользователь голосует так же еще раз, его голос удаляется (отмена голоса)
         if existing_rating.value == value: # type: ignore
             await db.delete(existing_rating)
@@ -20,38 +28,46 @@ async def set_graph_rating(db: AsyncSession, user_id: uuid.UUID, graph_id: uuid.
             # Если пользователь меняет голос, обновляем его
             existing_rating.value = value # type: ignore
             db.add(existing_rating)
+            likes_delta += int(value == 1)
+            dislikes_delta += int(value == -1)
     else:
         # Если голоса не было, создаем новый
         new_rating = GraphRating(user_id=user_id, graph_id=graph_id, value=value)
         db.add(new_rating)
-        
-    await db.commit()
-
-async def get_graph_ratings(db: AsyncSession, graph_id: uuid.UUID):
-    """Подсчитывает лайки и дизлайки для графа."""
+        likes_delta += int(value == 1)
+        dislikes_delta += int(value == -1)
     
-    # Считаем лайки (value = 1)
-    likes_query = select(func.count()).select_from(GraphRating).where(
-        GraphRating.graph_id == graph_id,
-        GraphRating.value == 1
-    )
-    likes_count = (await db.execute(likes_query)).scalar_one()
-
-    # Считаем дизлайки (value = -1)
-    dislikes_query = select(func.count()).select_from(GraphRating).where(
-        GraphRating.graph_id == graph_id,
-        GraphRating.value == -1
+    # Инкремент выполняется на стороне БД, поэтому параллельные голоса не теряются
+    await db.execute(
+        update(Graph)
+        .where(Graph.id == graph_id)
+        .values(
+            likes=Graph.likes + likes_delta,
+            dislikes=Graph.dislikes + dislikes_delta,
+            score=Graph.score + (likes_delta - dislikes_delta)
+        )
+        .execution_options(synchronize_session=False)
     )
-    dislikes_count = (await db.execute(dislikes_query)).scalar_one()
+    await db.commit()
 
-    return {"likes": likes_count, "dislikes": dislikes_count}
+async def reconcile_graph_ratings(db: AsyncSession) -> int:
+    """
+    Пересчитывает счетчики likes/dislikes/score всех графов по таблице graph_ratings.
+    Нужна, если счетчики разошлись с голосами (ручные правки БД, старые данные).
+    Возвращает количество обновленных графов.
+    """
+    def count_votes(vote_value: int):
+        return (
+            select(func.count())
+            .select_from(GraphRating)
+            .where(GraphRating.graph_id == Graph.id, GraphRating.value == vote_value)
+            .scalar_subquery()
+        )
 
-async def get_user_vote_for_graph(db: AsyncSession, user_id: uuid.UUID, graph_id: uuid.UUID) -> int:
-    """Получает голос конкретного пользователя за конкретный граф."""
-    query = select(GraphRating.value).where(
-        GraphRating.user_id == user_id,
-        GraphRating.graph_id == graph_id
+    result = await db.execute(
+        update(Graph)
+        .values(likes=count_votes(1), dislikes=count_votes(-1), score=count_votes(1) - count_votes(-1))
+        .execution_options(synchronize_session=False)
     )
-    result = (await db.execute(query)).scalar_one_or_none()
-    
-    return result if result is not None else 0
\ No newline at end of file
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,86 @@
+# backend/crud/search_crud.py
+import uuid
+from typing import Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.db.search import SearchBackend, get_search_backend
+from backend.models.graph_model import Graph, Node
+
+
+def get_backend(db: AsyncSession) -> SearchBackend:
+    """Выбирает реализацию поиска по диалекту подключенной БД."""
+    return get_search_backend(db.get_bind().dialect.name)
+
+
+def graph_document(graph: Graph) -> dict:
+    return {
+        "kind": "graph", "entity_id": graph.id, "graph_id": graph.id,
+        "title": graph.name, "body": graph.description or "",
+    }
+
+
+def node_document(node: Node) -> dict:
+    return {
+        "kind": "node", "entity_id": node.id, "graph_id": node.graph_id,
+        "title": node.name, "body": node.content or "",
+    }
+
+
+async def index_graph(db: AsyncSession, graph: Graph) -> None:
+    """Добавляет или обновляет граф в поисковом индексе (в рамках текущей транзакции)."""
+    await get_backend(db).upsert_documents(db, [graph_document(graph)])
+
+
+async def index_nodes(db: AsyncSession, nodes: Iterable[Node]) -> None:
+    """Добавляет или обновляет узлы в поисковом индексе (в рамках текущей транзакции)."""
+    await get_backend(db).upsert_documents(db, [node_document(node) for node in nodes])
+
+
+async def index_new_nodes(db: AsyncSession, rows: Iterable[dict]) -> None:
+    """
+    Добавляет в индекс только что вставленные узлы по строкам групповой вставки
+    (id, graph_id, name, content), не проверяя прежние документы (импорт графа).
+    """
+    await get_backend(db).insert_documents(db, [
+        {"kind": "node", "entity_id": row["id"], "graph_id": row["graph_id"],
+         "title": row["name"], "body": row.get("content") or ""}
+        for row in rows
+    ])
+
+
+async def remove_from_index(db: AsyncSession, entity_ids: Iterable[uuid.UUID]) -> None:
+    """Удаляет документы графов или узлов из поискового индекса."""
+    await get_backend(db).remove_documents(db, entity_ids)
+
+
+def match_graphs(db: AsyncSession, query: str):
+    """Подзапрос (entity_id, graph_id, rank) по графам или None для пустого запроса."""
+    backend = get_backend(db)
+    stmt = backend.match(query, kind="graph")
+    return backend.as_subquery(stmt) if stmt is not None else None
+
+
+async def search_nodes(
+    db: AsyncSession,
+    query: str,
+    limit: int = 20,
+    graph_id: Optional[uuid.UUID] = None
+) -> List[dict]:
+    """Ищет узлы по названию и содержимому во всех графах (или в одном), по убыванию релевантности."""
+    backend = get_backend(db)
+    stmt = backend.match(query, kind="node", with_snippet=True)
+    if stmt is None:
+        return []
+    if graph_id is not None:
+        stmt = stmt.where(stmt.selected_columns.graph_id == graph_id)
+    matches = backend.as_subquery(stmt.order_by(stmt.selected_columns.rank.desc()).limit(limit))
+
+    result = await db.execute(
+        select(Node.id, Node.name, Node.graph_id, Graph.name.label("graph_name"), matches.c.snippet, matches.c.rank)
+        .join(matches, matches.c.entity_id == Node.id)
+        .join(Graph, Graph.id == Node.graph_id)
+        .order_by(matches.c.rank.desc())
+    )
+    return [dict(row._mapping) for row in result.all()]
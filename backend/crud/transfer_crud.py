@@ -0,0 +1,220 @@
+# backend/crud/transfer_crud.py
+"""
+Импорт и экспорт графа целиком (форматы см. в backend/core/graph_io.py).
+Экспорт читает узлы и ребра потоково (server-side cursor) и отдает байты
+кусками, импорт разбирает входной поток по мере поступления и вставляет
+строки пачками по GRAPH_IMPORT_BATCH_SIZE. Память импорта растет только
+на соответствие id узлов файла новым UUID и по два числа на ребро
+(нужны для ссылок ребер и проверки на циклы), строки в ней не копятся.
+"""
+import uuid
+from array import array
+from typing import AsyncIterable, AsyncIterator, Dict, List
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.core.config import GRAPH_IMPORT_BATCH_SIZE, GRAPH_IMPORT_MAX_NODES
+from backend.core.graph_analysis import is_acyclic
+from backend.core.node_content import decode_content
+from backend.core.graph_io import (
+    GraphFormatError, binary_header, encode_binary, encode_jsonl, reader_for, BINARY_MAGIC
+)
+from backend.crud import search_crud, node_crud
+from backend.crud.graph_crud import catalog_count_cache
+from backend.models.graph_model import Graph, Node, NodeContent, Edge
+from backend.schemas.graph_schema import GraphCreate, NodeCreate
+
+EXPORT_FORMATS = ("jsonl", "binary")
+
+# Записи копятся до этого объема и отдаются клиенту одним куском
+_EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+async def export_graph_records(db: AsyncSession, graph) -> AsyncIterator[dict]:
+    """
+    Записи графа: шапка, затем узлы, затем ребра. graph - объект Graph
+    или строка get_graph_header (нужны id, name и description).
+    """
+    yield {"type": "graph", "version": 1, "name": graph.name, "description": graph.description}
+
+    nodes = await db.stream(
+        select(Node.id, Node.name, Node.position_x, Node.position_y, NodeContent.body, NodeContent.compression)
+        .outerjoin(NodeContent, NodeContent.node_id == Node.id)
+        .where(Node.graph_id == graph.id)
+        .order_by(Node.id)
+        .execution_options(yield_per=GRAPH_IMPORT_BATCH_SIZE)
+    )
+    # Строки забираем пачками: построчная итерация AsyncResult переключает greenlet на каждую строку
+    async for partition in nodes.partitions():
+        for row in partition:
+            yield {
+                "type": "node", "id": str(row.id), "name": row.name,
+                "content": decode_content(row.body, row.compression) if row.body is not None else "",
+                "x": row.position_x, "y": row.position_y,
+            }
+
+    edges = await db.stream(
+        select(Edge.source_node_id, Edge.target_node_id)
+        .where(Edge.graph_id == graph.id)
+        .execution_options(yield_per=GRAPH_IMPORT_BATCH_SIZE)
+    )
+    async for partition in edges.partitions():
+        for row in partition:
+            yield {"type": "edge", "source": str(row.source_node_id), "target": str(row.target_node_id)}
+
+
+async def export_graph(db: AsyncSession, graph, fmt: str) -> AsyncIterator[bytes]:
+    """Граф в формате fmt ("jsonl" или "binary") в виде потока кусков байтов."""
+    encode = encode_binary if fmt == "binary" else encode_jsonl
+    buffer = bytearray(binary_header() if fmt == "binary" else b"")
+    async for record in export_graph_records(db, graph):
+        buffer += encode(record)
+        if len(buffer) >= _EXPORT_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+class _GraphImport:
+    """
+    Состояние одного импорта: граф, соответствие id узлов файла их номерам,
+    пачки строк для вставки и ребра в виде номеров (для проверки на циклы).
+    """
+
+    def __init__(self, db: AsyncSession, owner_id: uuid.UUID):
+        self.db = db
+        self.owner_id = owner_id
+        self.graph: Graph = None  # type: ignore[assignment]
+        self.node_ordinals: Dict[str, int] = {}
+        self.node_ids: List[uuid.UUID] = []
+        self.edge_sources, self.edge_targets = array("l"), array("l")
+        self.node_rows: List[dict] = []
+        self.edge_rows: List[dict] = []
+        self.edges_started = False
+
+    async def add(self, record: dict) -> None:
+        kind = record["type"]
+        if self.graph is None:
+            if kind != "graph":
+                raise GraphFormatError("The first record must describe the graph")
+            await self._create_graph(record)
+        elif kind == "node":
+            await self._add_node(record)
+        elif kind == "edge":
+            await self._add_edge(record)
+        else:
+            raise GraphFormatError("Only one graph record is allowed")
+
+    async def _create_graph(self, record: dict) -> None:
+        try:
+            graph_in = GraphCreate(name=record.get("name"), description=record.get("description"))
+        except ValidationError as e:
+            raise GraphFormatError(f"Invalid graph record: {e.errors()[0]['msg']}")
+        self.graph = Graph(**graph_in.model_dump(), owner_id=self.owner_id)
+        self.db.add(self.graph)
+        await self.db.flush()
+        await search_crud.index_graph(self.db, self.graph)
+
+    async def _add_node(self, record: dict) -> None:
+        if self.edges_started:
+            raise GraphFormatError("Nodes must precede edges")
+        external_id = str(record.get("id", ""))
+        if not external_id or external_id in self.node_ordinals:
+            raise GraphFormatError(f"Missing or duplicate node id '{external_id}'")
+        if len(self.node_ids) >= GRAPH_IMPORT_MAX_NODES:
+            raise GraphFormatError(f"Graph is limited to {GRAPH_IMPORT_MAX_NODES} nodes")
+        try:
+            node_in = NodeCreate(
+                name=record.get("name"), content=record.get("content"),
+                position_x=record.get("x"), position_y=record.get("y"),
+            )
+        except ValidationError as e:
+            raise GraphFormatError(f"Invalid node '{external_id}': {e.errors()[0]['msg']}")
+        node_id = uuid.uuid4()
+        self.node_ordinals[external_id] = len(self.node_ids)
+        self.node_ids.append(node_id)
+        self.node_rows.append({
+            "id": node_id, "graph_id": self.graph.id, "name": node_in.name,
+            "content": node_in.content if node_in.content is not None else "",
+            "position_x": node_in.position_x or 0.0, "position_y": node_in.position_y or 0.0,
+        })
+        if len(self.node_rows) >= GRAPH_IMPORT_BATCH_SIZE:
+            await self._flush_nodes()
+
+    async def _add_edge(self, record: dict) -> None:
+        if not self.edges_started:
+            self.edges_started = True
+            await self._flush_nodes()
+        source = self.node_ordinals.get(str(record.get("source")))
+        target = self.node_ordinals.get(str(record.get("target")))
+        if source is None or target is None:
+            raise GraphFormatError(f"Edge references unknown node: {record.get('source')} -> {record.get('target')}")
+        self.edge_sources.append(source)
+        self.edge_targets.append(target)
+        self.edge_rows.append({
+            "id": uuid.uuid4(), "graph_id": self.graph.id,
+            "source_node_id": self.node_ids[source], "target_node_id": self.node_ids[target],
+        })
+        if len(self.edge_rows) >= GRAPH_IMPORT_BATCH_SIZE:
+            await self._flush_edges()
+
+    async def _flush_nodes(self) -> None:
+        if self.node_rows:
+            await node_crud.insert_nodes(self.db, self.node_rows)
+            await search_crud.index_new_nodes(self.db, self.node_rows)
+            self.node_rows = []
+
+    async def _flush_edges(self) -> None:
+        if self.edge_rows:
+            await self.db.execute(insert(Edge), self.edge_rows)
+            self.edge_rows = []
+
+    async def finish(self) -> Graph:
+        if self.graph is None:
+            raise GraphFormatError("The file is empty")
+        # Импортированный граф должен быть DAG, как и граф, собранный через API
+        if not is_acyclic(len(self.node_ids), self.edge_sources, self.edge_targets):
+            raise GraphFormatError("Edges form a prerequisite cycle")
+        await self._flush_nodes()
+        await self._flush_edges()
+        return self.graph
+
+
+async def import_graph(db: AsyncSession, owner_id: uuid.UUID, chunks: AsyncIterable[bytes]) -> Graph:
+    """
+    Создает новый граф владельца owner_id из потока байтов файла (JSON Lines
+    или бинарного формата, определяется по первым байтам) одной транзакцией.
+    При ошибке формата откатывает транзакцию и выбрасывает GraphFormatError.
+    """
+    state = _GraphImport(db, owner_id)
+    reader = None
+    head = b""
+    try:
+        async for chunk in chunks:
+            if reader is None:
+                head += chunk
+                if len(head) < len(BINARY_MAGIC):
+                    continue
+                reader, chunk = reader_for(head), head
+            for record in reader.feed(chunk):
+                await state.add(record)
+        if reader is None:
+            reader = reader_for(head)
+            records = reader.feed(head)
+        else:
+            records = []
+        for record in records + reader.close():
+            await state.add(record)
+        graph = await state.finish()
+    except Exception:
+        await db.rollback()
+        raise
+
+    await db.commit()
+    catalog_count_cache.clear()
+    await db.refresh(graph, attribute_names=["owner"])
+    return graph
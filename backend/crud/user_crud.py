@@ -9,8 +9,9 @@ from sqlalchemy.future import select
 # 2. Импортируем модель User для использования в аннотации
 from backend.models.user_model import User 
 from backend.schemas.user_schema import UserCreate
-from backend.core.security import get_password_hash
-from backend.models.graph_model import Graph, Node, UserProgress, GraphRating
+# Импортируем модуль целиком: security сам импортирует user_crud
+from backend.core import security
+from backend.models.graph_model import Graph, UserProgress
 
 # 3. Обновляем сигнатуру функции, явно указывая тип возвращаемого значения
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
@@ -25,13 +26,22 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """
     Создает нового пользователя в базе данных.
     """
-    hashed_password = get_password_hash(user.password)
+    # bcrypt выполняется в пуле потоков, не блокируя event loop
+    hashed_password = await security.get_password_hash_async(user.password)
     db_user = User(username=user.username, password_hash=hashed_password)
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
     return db_user
 
+async def update_password_hash(db: AsyncSession, db_user: User, password_hash: str) -> None:
+    """Сохраняет пересчитанный хэш пароля (например, после смены cost factor)."""
+    db_user.password_hash = password_hash # type: ignore
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    security.invalidate_principal(db_user.id) # type: ignore
+
 async def get_owned_graphs(db: AsyncSession, user_id: uuid.UUID) -> List[Graph]:
     """Получает все графы, созданные пользователем."""
     result = await db.execute(
@@ -44,10 +54,9 @@ async def get_owned_graphs(db: AsyncSession, user_id: uuid.UUID) -> List[Graph]:
 
 async def get_learning_graphs(db: AsyncSession, user_id: uuid.UUID) -> List[Graph]:
     """Получает графы, в которых пользователь изучил хотя бы один узел."""
-    # Находим уникальные graph_id из прогресса пользователя
+    # Находим уникальные graph_id из прогресса пользователя (по индексу user_id, graph_id)
     subquery = (
-        select(distinct(Node.graph_id))
-        .join(UserProgress, Node.id == UserProgress.node_id)
+        select(distinct(UserProgress.graph_id))
         .filter(UserProgress.user_id == user_id)
     ).scalar_subquery()
 
@@ -62,22 +71,13 @@ async def get_learning_graphs(db: AsyncSession, user_id: uuid.UUID) -> List[Grap
 
 async def get_user_total_ratings(db: AsyncSession, user_id: uuid.UUID):
     """Подсчитывает суммарные лайки и дизлайки для всех графов пользователя."""
-    
-    # Подзапрос для нахождения всех графов пользователя
-    owned_graphs_subquery = select(Graph.id).where(Graph.owner_id == user_id).scalar_subquery()
-    
-    # Считаем лайки
-    likes_query = select(func.count()).select_from(GraphRating).where(
-        GraphRating.graph_id.in_(owned_graphs_subquery),
-        GraphRating.value == 1
-    )
-    total_likes = (await db.execute(likes_query)).scalar_one()
-
-    # Считаем дизлайки
-    dislikes_query = select(func.count()).select_from(GraphRating).where(
-        GraphRating.graph_id.in_(owned_graphs_subquery),
-        GraphRating.value == -1
+    # Суммируем денормализованные счетчики графов вместо подсчета голосов
+    result = await db.execute(
+        select(
+            func.coalesce(func.sum(Graph.likes), 0),
+            func.coalesce(func.sum(Graph.dislikes), 0)
+        ).where(Graph.owner_id == user_id)
     )
-    total_dislikes = (await db.execute(dislikes_query)).scalar_one()
+    total_likes, total_dislikes = result.one()
 
     return {"total_likes": total_likes, "total_dislikes": total_dislikes}
\ No newline at end of file
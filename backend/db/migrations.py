@@ -0,0 +1,148 @@
+# backend/db/migrations.py
+"""
+Простые последовательные миграции схемы. Заменяют Base.metadata.create_all
+при старте: create_all не добавляет новые колонки и индексы в уже
+существующие таблицы. Примененные версии хранятся в таблице schema_migrations.
+
+Каждая миграция идемпотентна (проверяет, есть ли уже колонка/индекс), поэтому
+на новой базе, созданной первой миграцией по актуальным моделям, остальные
+шаги просто ничего не делают. Новые миграции добавляются в конец MIGRATIONS.
+"""
+import logging
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection
+
+from backend.db.session import Base
+from backend.db.search import install_search_index
+from backend.core.node_content import encode_content
+# Модели должны быть зарегистрированы в Base.metadata до применения миграций
+from backend.models import user_model, graph_model, search_model  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+_migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+
+def _add_column(connection: Connection, table: str, column: str, ddl: str) -> None:
+    columns = {col["name"] for col in inspect(connection).get_columns(table)}
+    if column not in columns:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _create_model_indexes(connection: Connection, *names: str) -> None:
+    """
+    Создает перечисленные индексы по их объявлениям в моделях, если их еще нет.
+    Индексы называются явно: иначе ранняя миграция попыталась бы создать индекс
+    по колонке, которую добавляет одна из следующих.
+    """
+    indexes = {index.name: index for table in Base.metadata.sorted_tables for index in table.indexes}
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+
+# --- Шаги миграций ---
+
+def _create_tables(connection: Connection) -> None:
+    Base.metadata.create_all(connection)
+
+
+def _graph_revision_and_rating_counters(connection: Connection) -> None:
+    _add_column(connection, "graphs", "revision", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, "graphs", "likes", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, "graphs", "dislikes", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, "graphs", "score", "INTEGER NOT NULL DEFAULT 0")
+    # Заполняем счетчики по уже существующим голосам
+    connection.execute(text(
+        "UPDATE graphs SET "
+        "likes = (SELECT count(*) FROM graph_ratings WHERE graph_ratings.graph_id = graphs.id AND value = 1), "
+        "dislikes = (SELECT count(*) FROM graph_ratings WHERE graph_ratings.graph_id = graphs.id AND value = -1)"
+    ))
+    connection.execute(text("UPDATE graphs SET score = likes - dislikes"))
+
+
+def _hot_lookup_indexes(connection: Connection) -> None:
+    _create_model_indexes(
+        connection,
+        "ix_graphs_owner_id", "ix_graphs_created_at_id", "ix_graphs_score_created_at_id",
+        "ix_nodes_graph_id", "ix_edges_graph_id", "ix_edges_source_node_id", "ix_edges_target_node_id",
+        "ix_graph_ratings_graph_id", "ix_comments_graph_id_created_at_id",
+    )
+
+
+def _user_progress_graph_id(connection: Connection) -> None:
+    _add_column(connection, "user_progress", "graph_id", "UUID REFERENCES graphs (id) ON DELETE CASCADE")
+    connection.execute(text(
+        "UPDATE user_progress SET graph_id = "
+        "(SELECT nodes.graph_id FROM nodes WHERE nodes.id = user_progress.node_id) "
+        "WHERE graph_id IS NULL"
+    ))
+    # Отметки об уже удаленных узлах больше ни на что не ссылаются
+    connection.execute(text("DELETE FROM user_progress WHERE graph_id IS NULL"))
+    _create_model_indexes(connection, "ix_user_progress_user_id_graph_id")
+
+
+def _graph_change_log(connection: Connection) -> None:
+    # Таблицу graph_changes создает create_all первой миграции или этот шаг
+    Base.metadata.tables["graph_changes"].create(connection, checkfirst=True)
+    columns = {col["name"] for col in inspect(connection).get_columns("graphs")}
+    if "changelog_floor" not in columns:
+        _add_column(connection, "graphs", "changelog_floor", "INTEGER NOT NULL DEFAULT 0")
+        # История правок существующих графов не записана: дельты - только с текущей ревизии
+        connection.execute(text("UPDATE graphs SET changelog_floor = revision"))
+
+
+
+# Сколько текстов узлов переносится в node_contents за один INSERT
+_CONTENT_MIGRATION_BATCH = 1000
+
+
+def _node_contents(connection: Connection) -> None:
+    # Таблицу node_contents создает create_all первой миграции или этот шаг
+    Base.metadata.tables["node_contents"].create(connection, checkfirst=True)
+    columns = {col["name"] for col in inspect(connection).get_columns("nodes")}
+    if "content" not in columns:
+        return
+    # Тексты переносятся пачками и сжимаются по текущим настройкам NODE_CONTENT_*;
+    # id узла копируется как есть, в том же представлении, что хранит nodes
+    result = connection.execute(text("SELECT id, content FROM nodes WHERE content IS NOT NULL AND content != ''"))
+    while rows := result.fetchmany(_CONTENT_MIGRATION_BATCH):
+        connection.execute(
+            text(
+                "INSERT INTO node_contents (node_id, body, compression, size, sha256) "
+                "VALUES (:node_id, :body, :compression, :size, :sha256)"
+            ),
+            [{"node_id": node_id, **encode_content(content)} for node_id, content in rows]
+        )
+    # Без колонки строки nodes короткие: чтение позиций не проходит по страницам переполнения с текстами
+    connection.execute(text("ALTER TABLE nodes DROP COLUMN content"))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create tables", _create_tables),
+    (2, "graph revision and rating counters", _graph_revision_and_rating_counters),
+    (3, "full-text search index", install_search_index),
+    (4, "indexes for hot lookup columns", _hot_lookup_indexes),
+    (5, "graph_id in user_progress", _user_progress_graph_id),
+    (6, "graph change log", _graph_change_log),
+    (7, "node contents side table", _node_contents),
+]
+
+
+def run_migrations(connection: Connection) -> None:
+    """Применяет недостающие миграции. Вызывается через `await conn.run_sync(run_migrations)`."""
+    _migration_metadata.create_all(connection)
+    applied = set(connection.execute(select(schema_migrations.c.version)).scalars().all())
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info("Применяем миграцию %d: %s", version, description)
+        migrate(connection)
+        connection.execute(schema_migrations.insert().values(version=version, description=description))
@@ -0,0 +1,216 @@
+# backend/db/search.py
+import re
+import uuid
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Float, Integer, column, delete, func, insert, inspect, literal_column, select, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.search_model import SearchDocument
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize_query(query: str) -> List[str]:
+    """Разбивает пользовательский запрос на слова, отбрасывая спецсимволы синтаксиса поиска."""
+    return _TOKEN_RE.findall(query.lower())
+
+
+class SearchBackend(ABC):
+    """
+    Общий интерфейс полнотекстового поиска. Документы хранятся в таблице
+    search_documents, а конкретная реализация отвечает за индекс и ранжирование.
+    Для всех реализаций rank - чем больше, тем релевантнее.
+    """
+
+    @abstractmethod
+    async def upsert_documents(self, db: AsyncSession, documents: List[dict]) -> None:
+        ...
+
+    @abstractmethod
+    async def remove_documents(self, db: AsyncSession, entity_ids: Iterable[uuid.UUID]) -> None:
+        ...
+
+    async def insert_documents(self, db: AsyncSession, documents: List[dict]) -> None:
+        """
+        Добавляет документы, которых заведомо нет в индексе (узлы, только что
+        вставленные при импорте графа), без поиска и удаления прежних версий.
+        """
+        await self.upsert_documents(db, documents)
+
+    @abstractmethod
+    def match(self, query: str, kind: str, with_snippet: bool = False):
+        """
+        Возвращает select с колонками (entity_id, graph_id, rank[, snippet])
+        для документов вида kind, подходящих под запрос, или None для пустого запроса.
+        Каждое слово запроса ищется по префиксу, в snippet найденные слова выделены **.
+        """
+
+    def as_subquery(self, stmt):
+        """Оборачивает результат match() для соединения с другими таблицами."""
+        return stmt.subquery()
+
+    @abstractmethod
+    def install(self, connection) -> None:
+        """Создает структуры индекса (синхронно, для run_sync) и заполняет его при первом запуске."""
+
+    @staticmethod
+    def _backfill_documents(connection) -> bool:
+        if connection.execute(select(SearchDocument.id).limit(1)).first() is not None:
+            return False
+        connection.execute(text(
+            "INSERT INTO search_documents (kind, entity_id, graph_id, title, body) "
+            "SELECT 'graph', id, id, name, coalesce(description, '') FROM graphs"
+        ))
+        # До миграции node_contents текст узла лежал в nodes.content; на новой базе
+        # (колонки уже нет) таблица узлов на этом шаге пуста
+        node_columns = {col["name"] for col in inspect(connection).get_columns("nodes")}
+        node_body = "coalesce(content, '')" if "content" in node_columns else "''"
+        connection.execute(text(
+            "INSERT INTO search_documents (kind, entity_id, graph_id, title, body) "
+            f"SELECT 'node', id, graph_id, name, {node_body} FROM nodes"
+        ))
+        return True
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5: rowid виртуальной таблицы search_fts совпадает с search_documents.id."""
+
+    fts = table("search_fts", column("rowid", Integer), column("kind"), column("title"), column("body"))
+
+    async def upsert_documents(self, db: AsyncSession, documents: List[dict]) -> None:
+        if not documents:
+            return
+        await self.remove_documents(db, [doc["entity_id"] for doc in documents])
+        await self.insert_documents(db, documents)
+
+    async def insert_documents(self, db: AsyncSession, documents: List[dict]) -> None:
+        if not documents:
+            return
+        result = await db.execute(
+            insert(SearchDocument).returning(SearchDocument.id, sort_by_parameter_order=True),
+            documents
+        )
+        doc_ids = result.scalars().all()
+        await db.execute(
+            text("INSERT INTO search_fts (rowid, kind, title, body) VALUES (:id, :kind, :title, :body)"),
+            [{"id": doc_id, "kind": doc["kind"], "title": doc["title"], "body": doc["body"]}
+             for doc_id, doc in zip(doc_ids, documents)]
+        )
+
+    async def remove_documents(self, db: AsyncSession, entity_ids: Iterable[uuid.UUID]) -> None:
+        entity_ids = list(entity_ids)
+        if not entity_ids:
+            return
+        result = await db.execute(select(SearchDocument.id).where(SearchDocument.entity_id.in_(entity_ids)))
+        doc_ids = result.scalars().all()
+        if not doc_ids:
+            return
+        await db.execute(delete(self.fts).where(self.fts.c.rowid.in_(doc_ids)))
+        await db.execute(delete(SearchDocument).where(SearchDocument.id.in_(doc_ids)))
+
+    def match(self, query: str, kind: str, with_snippet: bool = False):
+        tokens = tokenize_query(query)
+        if not tokens:
+            return None
+        terms = " ".join(f'"{token}"*' for token in tokens)
+        fts_query = f'kind:"{kind}" AND {{title body}}: ({terms})'
+        fts_ref = literal_column("search_fts")
+        # bm25 возвращает отрицательные значения: чем меньше, тем лучше.
+        # Веса колонок: kind не учитывается, совпадение в названии важнее.
+        rank = (-func.bm25(fts_ref, 0.0, 10.0, 1.0)).label("rank")
+        columns = [SearchDocument.entity_id, SearchDocument.graph_id, rank]
+        if with_snippet:
+            columns.append(func.snippet(fts_ref, 2, "**", "**", "…", 12).label("snippet"))
+        return (
+            select(*columns)
+            .select_from(self.fts)
+            .join(SearchDocument, SearchDocument.id == self.fts.c.rowid)
+            .where(fts_ref.op("MATCH")(fts_query))
+        )
+
+    def as_subquery(self, stmt):
+        # bm25() можно вычислять только в контексте FTS-курсора: если SQLite
+        # "расплющит" подзапрос во внешний запрос с GROUP BY, вызов упадет.
+        return stmt.cte("search_matches").prefix_with("MATERIALIZED")
+
+    def install(self, connection) -> None:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_fts'")
+        ).first()
+        if exists:
+            return
+        # Префиксные индексы на 2 и 3 символа ускоряют поиск "слово*"
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE search_fts USING fts5("
+            "kind, title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+        self._backfill_documents(connection)
+        connection.execute(text(
+            "INSERT INTO search_fts (rowid, kind, title, body) "
+            "SELECT id, kind, title, body FROM search_documents"
+        ))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector: генерируемая колонка search_documents.tsv с GIN-индексом."""
+
+    tsv = literal_column("search_documents.tsv")
+
+    async def upsert_documents(self, db: AsyncSession, documents: List[dict]) -> None:
+        if not documents:
+            return
+        stmt = pg_insert(SearchDocument).values(documents)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SearchDocument.entity_id],
+            set_={"title": stmt.excluded.title, "body": stmt.excluded.body, "graph_id": stmt.excluded.graph_id}
+        )
+        await db.execute(stmt)
+
+    async def remove_documents(self, db: AsyncSession, entity_ids: Iterable[uuid.UUID]) -> None:
+        entity_ids = list(entity_ids)
+        if entity_ids:
+            await db.execute(delete(SearchDocument).where(SearchDocument.entity_id.in_(entity_ids)))
+
+    def match(self, query: str, kind: str, with_snippet: bool = False):
+        tokens = tokenize_query(query)
+        if not tokens:
+            return None
+        ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        rank = func.ts_rank(self.tsv, ts_query).cast(Float).label("rank")
+        columns = [SearchDocument.entity_id, SearchDocument.graph_id, rank]
+        if with_snippet:
+            columns.append(func.ts_headline("simple", SearchDocument.body, ts_query,
+                                            "StartSel=**, StopSel=**, MaxWords=24, MinWords=8").label("snippet"))
+        return select(*columns).where(SearchDocument.kind == kind, self.tsv.op("@@")(ts_query))
+
+    def install(self, connection) -> None:
+        connection.execute(text(
+            "ALTER TABLE search_documents ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(body, '')), 'B')) STORED"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_search_documents_tsv ON search_documents USING GIN (tsv)"
+        ))
+        self._backfill_documents(connection)
+
+
+_BACKENDS = {
+    "sqlite": SQLiteSearchBackend(),
+    "postgresql": PostgresSearchBackend(),
+}
+
+
+def get_search_backend(dialect_name: str) -> SearchBackend:
+    backend: Optional[SearchBackend] = _BACKENDS.get(dialect_name)
+    if backend is None:
+        raise ValueError(f"Full-text search is not supported for the '{dialect_name}' dialect")
+    return backend
+
+
+def install_search_index(connection) -> None:
+    """Точка входа для lifespan: `await conn.run_sync(install_search_index)`."""
+    get_search_backend(connection.dialect.name).install(connection)
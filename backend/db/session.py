@@ -1,10 +1,55 @@
 # backend/db/session.py
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
-DATABASE_URL = "sqlite+aiosqlite:///../graph_database.db" # Путь относительно папки backend
+from backend.core.config import (
+    DATABASE_URL, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KB, SQLITE_BUSY_TIMEOUT_MS,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+)
 
-engine = create_async_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL позволяет читателям не ждать писателя, а synchronous=NORMAL в режиме WAL
+    убирает fsync на каждый коммит (данные по-прежнему не портятся при сбое).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    # Отрицательное значение задает размер кэша в KiB, а не в страницах
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def create_engine_for_url(database_url: str) -> AsyncEngine:
+    """Создает движок с профилем настроек под конкретную СУБД."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        sqlite_engine = create_async_engine(url, connect_args={"check_same_thread": False})
+        event.listen(sqlite_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return sqlite_engine
+
+    if backend == "postgresql":
+        # "postgresql://..." без драйвера трактуем как asyncpg
+        if url.drivername == "postgresql":
+            url = url.set(drivername="postgresql+asyncpg")
+        return create_async_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+
+    return create_async_engine(url)
+
+engine = create_engine_for_url(DATABASE_URL)
 AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,8 +1,8 @@
 # backend/main.py
 from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, Request
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import logging
@@ -10,25 +10,54 @@ import logging
 # Импортируем модели, чтобы Base.metadata знал о них при создании таблиц
 from backend.models.user_model import User  # noqa: F401
 from backend.models.graph_model import Graph, Node, Edge  # noqa: F401
+from backend.models.search_model import SearchDocument  # noqa: F401
 
-from backend.db.session import engine, Base
+from backend.db.session import engine
+from backend.db.migrations import run_migrations
+from backend.core.security import password_hash_pool, principal_cache
+from backend.core.layout import layout_pool
+from backend.core.live import live_broker, live_hub
+from backend.core.position_buffer import position_buffer
+from backend.core.logging_setup import configure_logging, start_logging, stop_logging
+from backend.core.access_log import AccessLogMiddleware, parse_sample_rules
+from backend.core.config import (
+    LOG_ACCESS_SAMPLE_RATE, LOG_ACCESS_SAMPLE_RULES, LOG_SLOW_REQUEST_MS,
+    METRICS_ENABLED, METRICS_TOKEN, SERVER_TIMING_ENABLED
+)
+from backend.core import metrics
+from backend.core.metrics import MetricsMiddleware
+from backend.core.graph_cache import graph_cache
+from backend.core.graph_analysis import topology_cache
+from backend.core.progress_bitmap import progress_cache
+from backend.core.reachability import reachability_cache
+from backend.crud.graph_crud import catalog_count_cache, graph_owner_cache
 from backend.api.v1 import users, graphs, nodes, edges, comments # Убедитесь, что все импортированы
 
-# Настройка логирования для отладки
-logging.basicConfig(level=logging.INFO)
+# Логи пишутся через очередь в отдельном потоке (см. core/logging_setup.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# --- Lifespan для создания таблиц при старте ---
+# --- Lifespan для применения миграций схемы при старте ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Приложение запускается, создаем таблицы в БД...")
+    start_logging()
+    logger.info("Приложение запускается, применяем миграции БД...")
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Таблицы успешно созданы или уже существуют.")
+        await conn.run_sync(run_migrations)
+    logger.info("Схема БД в актуальном состоянии.")
+    await live_broker.start()
+    await position_buffer.start()
     yield
     logger.info("Приложение останавливается.")
+    # Отложенные позиции узлов дописываются до остановки живых каналов и логов
+    await position_buffer.stop()
+    await live_broker.stop()
+    password_hash_pool.shutdown()
+    layout_pool.shutdown()
+    stop_logging()
 
-app = FastAPI(lifespan=lifespan, title="Taideteos API")
+# TimedJSONResponse сериализует через json_codec и учитывает время сериализации в Server-Timing
+app = FastAPI(lifespan=lifespan, title="Taideteos API", default_response_class=metrics.TimedJSONResponse)
 
 # --- Настройка CORS ---
 app.add_middleware(
@@ -37,6 +66,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Request-ID"],
+)
+
+# --- Метрики: задержки, запросы в работе, время БД, кэши, пул соединений ---
+if METRICS_ENABLED:
+    metrics.instrument_engine(engine)
+    metrics.register_pool_metrics(engine)
+    metrics.register_executor_metrics({"password_hash": password_hash_pool, "layout": layout_pool})
+    metrics.register_live_metrics(live_hub)
+    metrics.register_position_buffer_metrics(position_buffer)
+    for cache_name, cache in {
+        "graph_structure": graph_cache, "graph_topology": topology_cache,
+        "reachability": reachability_cache, "principal": principal_cache, "catalog_count": catalog_count_cache,
+        "graph_owner": graph_owner_cache,
+    }.items():
+        metrics.register_cache(cache_name, cache)
+    metrics.register_cache_stats("node_ordinals", progress_cache.ordinals_stats)
+    metrics.register_cache_stats("progress_bitmap", progress_cache.bitmap_stats)
+    app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING_ENABLED)
+
+# --- Журнал запросов и request_id (добавлен последним, чтобы охватить все остальное) ---
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_rate=LOG_ACCESS_SAMPLE_RATE,
+    sample_rules=parse_sample_rules(LOG_ACCESS_SAMPLE_RULES),
+    slow_ms=LOG_SLOW_REQUEST_MS,
 )
 
 # --- Подключение роутеров API ---
@@ -55,11 +110,18 @@ app.mount("/js", StaticFiles(directory=STATIC_FILES_DIR / "js"), name="js")
 app.mount("/pages", StaticFiles(directory=STATIC_FILES_DIR / "pages"), name="pages")
 app.mount("/assets", StaticFiles(directory=STATIC_FILES_DIR / "assets"), name="assets")
 
+# --- Метрики в формате Prometheus (до catch-all маршрута) ---
+if METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def read_metrics(request: Request):
+        if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
 # --- Catch-all маршрут для SPA ---
 @app.get("/{full_path:path}", response_class=FileResponse, include_in_schema=False)
 async def serve_spa(request: Request, full_path: str):
     """
     Отдает index.html на любой путь, который не был обработан API или StaticFiles.
     """
-    logger.info(f"Catch-all route: Запрос на путь '{full_path}', отдаем index.html")
     return FileResponse(STATIC_FILES_DIR / "index.html")
\ No newline at end of file
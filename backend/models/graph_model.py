@@ -1,10 +1,12 @@
 # backend/models/graph_model.py
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Float, Integer
+from typing import Optional
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Float, Integer, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from backend.db.session import Base
+from backend.core.node_content import encode_content, decode_content
 
 class Graph(Base):
     __tablename__ = "graphs"
@@ -13,36 +15,98 @@ class Graph(Base):
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Версия структуры графа: увеличивается при любом изменении узлов и ребер.
+    # По ней инвалидируется кэш сериализованных элементов Cytoscape.
+    revision = Column(Integer, nullable=False, default=0)
     
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    # Денормализованные счетчики оценок: обновляются в set_graph_rating
+    # в той же транзакции, что и сам голос (score = likes - dislikes).
+    likes = Column(Integer, nullable=False, default=0)
+    dislikes = Column(Integer, nullable=False, default=0)
+    score = Column(Integer, nullable=False, default=0)
+    # Журнал изменений (graph_changes) полон для ревизий после этой: более
+    # старые записи удалены при сжатии, и клиенту с ними нужна полная перезагрузка
+    changelog_floor = Column(Integer, nullable=False, default=0)
+    
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     owner = relationship("User")
     
     nodes = relationship("Node", back_populates="graph", cascade="all, delete-orphan")
     edges = relationship("Edge", back_populates="graph", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Индексы повторяют ключи сортировки каталога (см. CATALOG_KEYSETS):
+        # date_desc и rating_desc, включая курсорную пагинацию, идут по индексу
+        Index("ix_graphs_created_at_id", "created_at", "id"),
+        Index("ix_graphs_score_created_at_id", "score", "created_at", "id"),
+    )
+
 class Node(Base):
     __tablename__ = "nodes"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
-    content = Column(Text, default="")
     position_x = Column(Float, default=0.0)
     position_y = Column(Float, default=0.0)
     
-    graph_id = Column(UUID(as_uuid=True), ForeignKey("graphs.id"), nullable=False)
+    graph_id = Column(UUID(as_uuid=True), ForeignKey("graphs.id", ondelete="CASCADE"), nullable=False, index=True)
     graph = relationship("Graph", back_populates="nodes")
 
     source_for_edges = relationship("Edge", foreign_keys="Edge.source_node_id", back_populates="source_node", cascade="all, delete-orphan")
     target_for_edges = relationship("Edge", foreign_keys="Edge.target_node_id", back_populates="target_node", cascade="all, delete-orphan")
 
+    # Текст урока лежит в node_contents: структурные запросы выбирают колонки
+    # nodes и его не читают, а загрузка узла целиком подтягивает его тем же запросом
+    content_record = relationship("NodeContent", uselist=False, lazy="joined", cascade="all, delete-orphan")
+
+    @property
+    def content(self) -> str:
+        record = self.content_record
+        return record.text if record is not None else ""
+
+    @content.setter
+    def content(self, text: Optional[str]) -> None:
+        # Пустое содержимое не хранится
+        if not text:
+            self.content_record = None
+        elif self.content_record is None:
+            self.content_record = NodeContent(**encode_content(text))
+        else:
+            self.content_record.set_text(text)
+
+class NodeContent(Base):
+    __tablename__ = "node_contents"
+    
+    node_id = Column(UUID(as_uuid=True), ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True)
+    # Текст в UTF-8, сжатый алгоритмом compression (NULL - без сжатия), см. core/node_content.py
+    body = Column(LargeBinary, nullable=False)
+    compression = Column(String, nullable=True)
+    # Размер текста в байтах UTF-8 и его SHA-256: сравнение без распаковки body
+    size = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+
+    @property
+    def text(self) -> str:
+        """Распаковывает текст при каждом обращении."""
+        return decode_content(self.body, self.compression)
+
+    def set_text(self, text: str) -> bool:
+        """Заменяет текст, если он изменился. Возвращает True, если изменился."""
+        values = encode_content(text)
+        if values["sha256"] == self.sha256:
+            return False
+        for key, value in values.items():
+            setattr(self, key, value)
+        return True
+
 class Edge(Base):
     __tablename__ = "edges"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
-    graph_id = Column(UUID(as_uuid=True), ForeignKey("graphs.id"), nullable=False)
-    source_node_id = Column(UUID(as_uuid=True), ForeignKey("nodes.id"), nullable=False)
-    target_node_id = Column(UUID(as_uuid=True), ForeignKey("nodes.id"), nullable=False)
+    graph_id = Column(UUID(as_uuid=True), ForeignKey("graphs.id", ondelete="CASCADE"), nullable=False, index=True)
+    source_node_id = Column(UUID(as_uuid=True), ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False, index=True)
+    target_node_id = Column(UUID(as_uuid=True), ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False, index=True)
     
     graph = relationship("Graph", back_populates="edges")
     source_node = relationship("Node", foreign_keys=[source_node_id])
@@ -51,16 +115,41 @@ class Edge(Base):
     source_node = relationship("Node", foreign_keys=[source_node_id], back_populates="source_for_edges")
     target_node = relationship("Node", foreign_keys=[target_node_id], back_populates="target_for_edges")
 
+class GraphChange(Base):
+    __tablename__ = "graph_changes"
+    
+    # Порядок записи: внутри одной ревизии записи применяются по возрастанию id
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    graph_id = Column(UUID(as_uuid=True), ForeignKey("graphs.id", ondelete="CASCADE"), nullable=False)
+    # Ревизия графа, которую создало изменение
+    revision = Column(Integer, nullable=False)
+    entity = Column(String, nullable=False) # "node" или "edge"
+    op = Column(String, nullable=False) # "create", "update" или "delete"
+    # Без внешнего ключа: запись об удалении переживает сам элемент
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+
+    __table_args__ = (
+        # "Изменения графа G после ревизии R" - диапазон по индексу
+        Index("ix_graph_changes_graph_id_revision", "graph_id", "revision"),
+    )
+
 class UserProgress(Base):
     __tablename__ = "user_progress"
     
     # Составной первичный ключ
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     node_id = Column(UUID(as_uuid=True), ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True)
+    # Денормализованный граф узла: прогресс по графу выбирается без join с nodes
+    graph_id = Column(UUID(as_uuid=True), ForeignKey("graphs.id", ondelete="CASCADE"), nullable=False)
     
     # Можно добавить дату, если понадобится в будущем
     # marked_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Покрывающий индекс для "изученные узлы графа G у пользователя U"
+        Index("ix_user_progress_user_id_graph_id", "user_id", "graph_id", "node_id"),
+    )
+
 class GraphRating(Base):
     __tablename__ = "graph_ratings"
     
@@ -71,6 +160,11 @@ class GraphRating(Base):
     # Голос: +1 за лайк, -1 за дизлайк
     value = Column(Integer, nullable=False)
 
+    __table_args__ = (
+        # graph_id - второй столбец первичного ключа, поэтому для выборок по графу нужен свой индекс
+        Index("ix_graph_ratings_graph_id", "graph_id"),
+    )
+
 class Comment(Base):
     __tablename__ = "comments"
 
@@ -83,4 +177,9 @@ class Comment(Base):
 
     # Связи для удобного доступа
     owner = relationship("User")
-    # replies = relationship("Reply", back_populates="comment", cascade="all, delete-orphan") # <-- Добавим, когда будем делать ответы
\ No newline at end of file
+    # replies = relationship("Reply", back_populates="comment", cascade="all, delete-orphan") # <-- Добавим, когда будем делать ответы
+
+    __table_args__ = (
+        # Страница комментариев графа: фильтр по graph_id и курсор по (created_at, id)
+        Index("ix_comments_graph_id_created_at_id", "graph_id", "created_at", "id"),
+    )
@@ -0,0 +1,20 @@
+# backend/models/search_model.py
+from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from backend.db.session import Base
+
+class SearchDocument(Base):
+    """
+    Документ полнотекстового индекса: граф (название + описание) или узел
+    (название + содержимое). Сам индекс живет рядом и зависит от СУБД:
+    виртуальная таблица FTS5 в SQLite или колонка tsvector в Postgres.
+    """
+    __tablename__ = "search_documents"
+
+    # Целочисленный id нужен FTS5: он совпадает с rowid строки в search_fts
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(16), nullable=False) # 'graph' или 'node'
+    entity_id = Column(UUID(as_uuid=True), nullable=False, unique=True, index=True)
+    graph_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    title = Column(String, nullable=False, default="")
+    body = Column(Text, nullable=False, default="")
@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime
 from pydantic import BaseModel
 from .user_base_schemas import UserOut
-from typing import List
+from typing import List, Optional
 
 class GraphInList(BaseModel):
     id: uuid.UUID
@@ -18,7 +18,22 @@ class GraphInList(BaseModel):
     class Config:
         from_attributes = True
 
+def graph_in_list_dict(graph) -> dict:
+    """
+    То же, что GraphInList.model_validate(graph), но без валидации: словарь
+    для json_codec.dumps из ORM-объекта Graph с загруженным owner.
+    Поля должны совпадать с GraphInList.
+    """
+    return {
+        "id": graph.id, "name": graph.name, "description": graph.description,
+        "created_at": graph.created_at,
+        "owner": {"id": graph.owner.id, "username": graph.owner.username},
+        "likes": graph.likes, "dislikes": graph.dislikes,
+    }
+
 # ---СХЕМА-ОБЕРТКА ---
 class PaginatedGraphs(BaseModel):
-    total: int
-    graphs: List[GraphInList]
\ No newline at end of file
+    total: int # Может отставать на несколько секунд: значение кэшируется
+    graphs: List[GraphInList]
+    # Курсор следующей страницы для параметра cursor; None, если страница последняя
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -2,7 +2,7 @@
 import uuid
 from datetime import datetime  # noqa: F401
 from pydantic import BaseModel, Field  # noqa: F401
-from typing import Optional, List, Dict, Union, Literal
+from typing import Optional, List, Dict, Union, Literal, Annotated
 
 from backend.schemas.user_schema import UserOut  # noqa: F401
 from .graph_base_schemas import GraphInList, PaginatedGraphs  # noqa: F401
@@ -18,10 +18,20 @@ class CytoscapeEdgeData(BaseModel):
     source: str
     target: str
 
-class CytoscapeElement(BaseModel):
-    group: str # 'nodes' или 'edges'
-    data: Union[CytoscapeNodeData, CytoscapeEdgeData]
-    position: Optional[Dict[str, float]] = None # Для узлов { "x": 100, "y": 100 }
+class CytoscapeNodeElement(BaseModel):
+    group: Literal["nodes"]
+    data: CytoscapeNodeData
+    position: Optional[Dict[str, float]] = None # { "x": 100, "y": 100 }
+
+class CytoscapeEdgeElement(BaseModel):
+    group: Literal["edges"]
+    data: CytoscapeEdgeData
+
+# Тип элемента выбирается по group сразу, без попыток провалидировать data каждой схемой
+CytoscapeElement = Annotated[
+    Union[CytoscapeNodeElement, CytoscapeEdgeElement],
+    Field(discriminator="group")
+]
 
 
 # --- Схемы для сущностей из БД ---
@@ -47,6 +57,14 @@ class NodeOut(NodeBase):
     class Config:
         from_attributes = True
 
+class NodeSearchHit(BaseModel):
+    id: uuid.UUID
+    name: str
+    graph_id: uuid.UUID
+    graph_name: str
+    snippet: str # Фрагмент содержимого, найденные слова выделены **жирным** (Markdown)
+    rank: float # Чем больше, тем релевантнее
+
 class EdgeBase(BaseModel):
     source_node_id: uuid.UUID
     target_node_id: uuid.UUID
@@ -60,6 +78,77 @@ class EdgeOut(EdgeBase):
     class Config:
         from_attributes = True
 
+# --- Схемы анализа пререквизитов ---
+
+class NodeIdList(BaseModel):
+    # ID узлов; для путей изучения - в порядке, в котором их стоит изучать
+    node_ids: List[uuid.UUID]
+
+class NodeClosure(NodeIdList):
+    # Транзитивные пререквизиты или зависимые узлы, в порядке изучения
+    count: int
+
+class Reachability(BaseModel):
+    source_node_id: uuid.UUID
+    target_node_id: uuid.UUID
+    # True, если source - транзитивный пререквизит target
+    reachable: bool
+
+# --- Схемы авторасстановки ---
+
+class LayoutRequest(BaseModel):
+    # layered - по слоям пререквизитов сверху вниз, force - силовой алгоритм
+    algorithm: Literal["layered", "force"] = "layered"
+    iterations: int = Field(100, ge=1, le=500) # Только для force
+
+class NodePosition(BaseModel):
+    id: uuid.UUID
+    x: float
+    y: float
+
+class LayoutResult(BaseModel):
+    revision: int
+    positions: List[NodePosition]
+
+# --- Схемы для пакетного изменения графа ---
+
+class BatchNodeCreate(NodeCreate):
+    op: Literal["create_node"]
+    ref: str # Временный id узла на клиенте: по нему ссылаются ребра из этой же пачки
+
+class BatchNodeUpdate(NodeUpdate):
+    op: Literal["update_node"]
+    id: uuid.UUID
+
+class BatchNodeDelete(BaseModel):
+    op: Literal["delete_node"]
+    id: uuid.UUID
+
+class BatchEdgeCreate(BaseModel):
+    op: Literal["create_edge"]
+    ref: Optional[str] = None
+    # UUID существующего узла графа или ref узла, создаваемого в этой же пачке
+    source_node_id: str
+    target_node_id: str
+
+class BatchEdgeDelete(BaseModel):
+    op: Literal["delete_edge"]
+    id: uuid.UUID
+
+BatchOperation = Annotated[
+    Union[BatchNodeCreate, BatchNodeUpdate, BatchNodeDelete, BatchEdgeCreate, BatchEdgeDelete],
+    Field(discriminator="op")
+]
+
+class GraphBatch(BaseModel):
+    operations: List[BatchOperation] = Field(..., max_length=5000)
+
+class GraphBatchResult(BaseModel):
+    # Соответствие временных ref клиента и выданных сервером id
+    created_nodes: Dict[str, uuid.UUID]
+    created_edges: Dict[str, uuid.UUID]
+    revision: int
+
 # --- Основные схемы для графа ---
 
 class GraphBase(BaseModel):
@@ -81,4 +170,16 @@ class GraphDetail(GraphInList):
     likes: int = 0
     dislikes: int = 0
     # Голос текущего пользователя: 1, -1 или 0 (если не голосовал)
-    my_vote: Optional[Literal[1, -1, 0]] = 0
\ No newline at end of file
+    my_vote: Optional[Literal[1, -1, 0]] = 0
+    # Ревизия структуры графа: с нее начинается GET /graphs/{id}/changes?since=
+    revision: Optional[int] = None
+# Ответ инкрементальной синхронизации: элементы, измененные после ревизии since
+class GraphChanges(BaseModel):
+    revision: int # Текущая ревизия графа: ее клиент передает в since в следующий раз
+    since: int
+    # True - журнал уже сжат дальше since (или since из будущего): нужна полная загрузка графа
+    full_resync: bool
+    removed_node_ids: List[uuid.UUID]
+    removed_edge_ids: List[uuid.UUID]
+    # Созданные и измененные элементы в формате Cytoscape
+    elements: List[CytoscapeElement]
@@ -0,0 +1,66 @@
+# backend/tests/conftest.py
+"""
+Общие фикстуры тестов: приложение на временной базе SQLite и асинхронный клиент.
+
+Настройки и движок БД создаются при импорте модулей backend, поэтому
+переменные окружения выставляются здесь, до первого импорта приложения.
+"""
+import os
+import tempfile
+import uuid
+
+_TMP_DIR = tempfile.mkdtemp(prefix="taideteos-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TMP_DIR}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Минимальный cost factor bcrypt: регистрация и вход в тестах не должны занимать секунды
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from backend.main import app as fastapi_app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def app():
+    """Приложение с примененными миграциями; lifespan один на всю сессию тестов."""
+    async with fastapi_app.router.lifespan_context(fastapi_app):
+        yield fastapi_app
+
+
+@pytest.fixture
+async def client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        yield async_client
+
+
+async def register_user(client: httpx.AsyncClient, username: str = None, password: str = "secret1") -> dict:
+    """Регистрирует пользователя и возвращает заголовки с его токеном."""
+    username = username or f"user_{uuid.uuid4().hex[:12]}"
+    response = await client.post("/api/v1/users/register", json={"username": username, "password": password})
+    assert response.status_code == 201, response.text
+    response = await client.post("/api/v1/users/login/token", data={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+async def auth_headers(client):
+    return await register_user(client)
+
+
+@pytest.fixture
+async def graph_id(client, auth_headers):
+    """Новый пустой граф пользователя auth_headers."""
+    response = await client.post(
+        "/api/v1/graphs/", json={"name": "Linear algebra", "description": "Vectors"}, headers=auth_headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
@@ -0,0 +1,84 @@
+# backend/tests/test_access_log.py
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from backend.core.access_log import AccessLogMiddleware, parse_sample_rules
+
+
+def test_parse_sample_rules():
+    assert parse_sample_rules("read_graph=0.1, /js = 0.01,,") == {"read_graph": 0.1, "/js": 0.01}
+    assert parse_sample_rules("") == {}
+    assert parse_sample_rules("serve_spa=0,read_graph=1") == {"serve_spa": 0.0, "read_graph": 1.0}
+
+
+@pytest.mark.parametrize("spec", ["read_graph", "=0.1", "read_graph=", "read_graph=often", "/js=1.5", "/js=-0.1"])
+def test_parse_sample_rules_rejects_bad_items(spec):
+    with pytest.raises(ValueError, match="sample rule"):
+        parse_sample_rules(f"serve_spa=0.01,{spec}")
+
+
+def make_app(status: int, route_name=None, error: bool = False):
+    async def app(scope, receive, send):
+        if route_name is not None:
+            scope["route"] = SimpleNamespace(name=route_name)
+        if error:
+            raise RuntimeError("boom")
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+    return app
+
+
+async def call(middleware, path="/api/v1/graphs/1", request_id=None):
+    headers = [(b"x-request-id", request_id.encode())] if request_id else []
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware({"type": "http", "method": "GET", "path": path, "headers": headers}, receive, send)
+    return sent
+
+
+def access_records(caplog):
+    return [record for record in caplog.records if record.name == "backend.access"]
+
+
+@pytest.mark.anyio
+async def test_server_errors_are_always_logged(caplog):
+    caplog.set_level(logging.INFO, logger="backend.access")
+    await call(AccessLogMiddleware(make_app(503), sample_rate=0.0))
+    with pytest.raises(RuntimeError):
+        await call(AccessLogMiddleware(make_app(200, error=True), sample_rate=0.0))
+
+    records = access_records(caplog)
+    assert [(record.levelno, record.status) for record in records] == [(logging.ERROR, 503), (logging.ERROR, 500)]
+
+
+@pytest.mark.anyio
+async def test_sampled_out_success_is_not_logged(caplog):
+    caplog.set_level(logging.INFO, logger="backend.access")
+    await call(AccessLogMiddleware(make_app(200, "read_graph"), sample_rate=1.0, sample_rules={"read_graph": 0.0}))
+    await call(AccessLogMiddleware(make_app(200), sample_rate=1.0, sample_rules={"/js": 0.0}), path="/js/app.js")
+    assert access_records(caplog) == []
+
+    await call(AccessLogMiddleware(make_app(200, "read_graph"), sample_rate=0.0, sample_rules={"read_graph": 1.0}))
+    await call(AccessLogMiddleware(make_app(404), sample_rate=0.0, slow_ms=0.0))
+    records = access_records(caplog)
+    assert [(record.levelno, record.route, record.status) for record in records] == [
+        (logging.INFO, "read_graph", 200), (logging.WARNING, None, 404),
+    ]
+
+
+@pytest.mark.anyio
+async def test_request_id_is_echoed_or_generated():
+    sent = await call(AccessLogMiddleware(make_app(200), sample_rate=0.0), request_id="req-42")
+    assert (b"x-request-id", b"req-42") in sent[0]["headers"]
+
+    sent = await call(AccessLogMiddleware(make_app(200), sample_rate=0.0), request_id="bad id\n")
+    (request_id,) = [value for name, value in sent[0]["headers"] if name == b"x-request-id"]
+    assert request_id != b"bad id\n" and len(request_id) == 32
@@ -0,0 +1,34 @@
+# backend/tests/test_api.py
+import pytest
+
+from backend.tests.conftest import register_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_register_and_login(client, auth_headers):
+    response = await client.get("/api/v1/users/me/profile", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["learning_graphs"] == []
+
+
+async def test_graph_with_nodes_and_edge(client, auth_headers, graph_id):
+    first = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": "Vectors"}, headers=auth_headers)
+    second = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": "Matrices"}, headers=auth_headers)
+    assert first.status_code == second.status_code == 201
+    edge = await client.post(
+        f"/api/v1/graphs/{graph_id}/edges",
+        json={"source_node_id": first.json()["id"], "target_node_id": second.json()["id"]},
+        headers=auth_headers,
+    )
+    assert edge.status_code == 201, edge.text
+
+    response = await client.get(f"/api/v1/graphs/{graph_id}")
+    assert response.status_code == 200, response.text
+    assert len(response.json()["elements"]) == 3
+
+
+async def test_write_requires_owner(client, graph_id):
+    stranger = await register_user(client)
+    response = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": "Spam"}, headers=stranger)
+    assert response.status_code == 403
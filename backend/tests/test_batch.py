@@ -0,0 +1,173 @@
+# backend/tests/test_batch.py
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.db.session import AsyncSessionLocal
+from backend.models.graph_model import Edge, Node, NodeContent, UserProgress
+from backend.models.search_model import SearchDocument
+from backend.tests.conftest import register_user
+
+
+async def apply(client, headers, graph_id, *operations):
+    return await client.post(
+        f"/api/v1/graphs/{graph_id}/batch", json={"operations": list(operations)}, headers=headers
+    )
+
+
+async def count(model, *where):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(model).where(*where))
+
+
+async def graph_state(client, graph_id):
+    """(id узлов, пары (source, target) ребер, ревизия) по GET /graphs/{id}."""
+    body = (await client.get(f"/api/v1/graphs/{graph_id}")).json()
+    nodes = {el["data"]["id"] for el in body["elements"] if el["group"] == "nodes"}
+    edges = {(el["data"]["source"], el["data"]["target"]) for el in body["elements"] if el["group"] == "edges"}
+    return nodes, edges, body["revision"]
+
+
+@pytest.mark.anyio
+async def test_batch_creates_nodes_and_edges_by_ref(client, auth_headers, graph_id):
+    _, _, revision = await graph_state(client, graph_id)
+    response = await apply(
+        client, auth_headers, graph_id,
+        {"op": "create_node", "ref": "a", "name": "Vectors"},
+        {"op": "create_node", "ref": "b", "name": "Matrices"},
+        {"op": "create_edge", "ref": "ab", "source_node_id": "a", "target_node_id": "b"},
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert set(result["created_nodes"]) == {"a", "b"} and set(result["created_edges"]) == {"ab"}
+    assert result["revision"] == revision + 1
+
+    nodes, edges, current = await graph_state(client, graph_id)
+    a, b = result["created_nodes"]["a"], result["created_nodes"]["b"]
+    assert nodes == {a, b}
+    assert edges == {(a, b)}
+    assert current == result["revision"]
+
+
+@pytest.mark.anyio
+async def test_batch_rejects_duplicate_ref(client, auth_headers, graph_id):
+    response = await apply(
+        client, auth_headers, graph_id,
+        {"op": "create_node", "ref": "a", "name": "Vectors"},
+        {"op": "create_node", "ref": "a", "name": "Matrices"},
+    )
+    assert response.status_code == 400, response.text
+    assert await count(Node, Node.graph_id == uuid.UUID(graph_id)) == 0
+
+
+@pytest.mark.anyio
+async def test_batch_rejects_foreign_ids_without_writing(client, auth_headers, graph_id):
+    other_headers = await register_user(client)
+    other_graph = (await client.post("/api/v1/graphs/", json={"name": "Other"}, headers=other_headers)).json()["id"]
+    created = (await apply(
+        client, other_headers, other_graph,
+        {"op": "create_node", "ref": "x", "name": "X"},
+        {"op": "create_node", "ref": "y", "name": "Y"},
+        {"op": "create_edge", "ref": "xy", "source_node_id": "x", "target_node_id": "y"},
+    )).json()
+    foreign_node = created["created_nodes"]["x"]
+    foreign_edge = created["created_edges"]["xy"]
+    _, _, revision = await graph_state(client, graph_id)
+
+    for operation in (
+        {"op": "create_edge", "source_node_id": "a", "target_node_id": foreign_node},
+        {"op": "update_node", "id": foreign_node, "name": "Hijacked"},
+        {"op": "delete_node", "id": foreign_node},
+        {"op": "delete_edge", "id": foreign_edge},
+    ):
+        response = await apply(
+            client, auth_headers, graph_id, {"op": "create_node", "ref": "a", "name": "Vectors"}, operation
+        )
+        assert response.status_code == 400, (operation, response.text)
+
+    assert await graph_state(client, graph_id) == (set(), set(), revision)
+    assert await graph_state(client, other_graph) == (
+        set(created["created_nodes"].values()),
+        {(created["created_nodes"]["x"], created["created_nodes"]["y"])},
+        created["revision"],
+    )
+    async with AsyncSessionLocal() as db:
+        assert await db.scalar(select(Node.name).where(Node.id == uuid.UUID(foreign_node))) == "X"
+
+
+@pytest.mark.anyio
+async def test_batch_cycle_rolls_back_whole_batch(client, auth_headers, graph_id):
+    created = (await apply(
+        client, auth_headers, graph_id,
+        {"op": "create_node", "ref": "a", "name": "Vectors"},
+        {"op": "create_node", "ref": "b", "name": "Matrices"},
+        {"op": "create_edge", "source_node_id": "a", "target_node_id": "b"},
+    )).json()
+    a, b = created["created_nodes"]["a"], created["created_nodes"]["b"]
+    before = await graph_state(client, graph_id)
+
+    response = await apply(
+        client, auth_headers, graph_id,
+        {"op": "create_node", "ref": "c", "name": "Determinants"},
+        {"op": "update_node", "id": a, "name": "Renamed"},
+        {"op": "create_edge", "source_node_id": b, "target_node_id": "c"},
+        {"op": "create_edge", "source_node_id": "c", "target_node_id": a},
+    )
+    assert response.status_code == 400, response.text
+    assert "cycle" in response.json()["detail"]
+
+    assert await graph_state(client, graph_id) == before
+    assert await count(Node, Node.graph_id == uuid.UUID(graph_id)) == 2
+    async with AsyncSessionLocal() as db:
+        assert await db.scalar(select(Node.name).where(Node.id == uuid.UUID(a))) == "Vectors"
+
+
+@pytest.mark.anyio
+async def test_batch_delete_node_removes_dependent_rows(client, auth_headers, graph_id):
+    created = (await apply(
+        client, auth_headers, graph_id,
+        {"op": "create_node", "ref": "a", "name": "Vectors", "content": "Basis"},
+        {"op": "create_node", "ref": "b", "name": "Matrices"},
+        {"op": "create_edge", "source_node_id": "a", "target_node_id": "b"},
+    )).json()
+    a, b = created["created_nodes"]["a"], created["created_nodes"]["b"]
+    response = await client.post(f"/api/v1/nodes/{a}/progress", headers=auth_headers)
+    assert response.status_code == 204, response.text
+    node_id = uuid.UUID(a)
+    assert await count(NodeContent, NodeContent.node_id == node_id) == 1
+    assert await count(UserProgress, UserProgress.node_id == node_id) == 1
+    assert await count(SearchDocument, SearchDocument.entity_id == node_id) == 1
+
+    response = await apply(client, auth_headers, graph_id, {"op": "delete_node", "id": a})
+    assert response.status_code == 200, response.text
+
+    nodes, edges, _ = await graph_state(client, graph_id)
+    assert nodes == {b} and edges == set()
+    assert await count(Edge, Edge.graph_id == uuid.UUID(graph_id)) == 0
+    assert await count(NodeContent, NodeContent.node_id == node_id) == 0
+    assert await count(UserProgress, UserProgress.node_id == node_id) == 0
+    assert await count(SearchDocument, SearchDocument.entity_id == node_id) == 0
+
+
+@pytest.mark.anyio
+async def test_batch_update_splits_content_and_position(client, auth_headers, graph_id):
+    created = (await apply(
+        client, auth_headers, graph_id,
+        {"op": "create_node", "ref": "a", "name": "Vectors", "content": "Old"},
+    )).json()
+    a = created["created_nodes"]["a"]
+
+    response = await apply(
+        client, auth_headers, graph_id,
+        {"op": "update_node", "id": a, "content": "New **content**", "position_x": 12.5, "position_y": -3.0},
+    )
+    assert response.status_code == 200, response.text
+
+    async with AsyncSessionLocal() as db:
+        node = await db.scalar(select(Node).where(Node.id == uuid.UUID(a)))
+        assert (node.position_x, node.position_y, node.name) == (12.5, -3.0, "Vectors")
+        row = await db.scalar(select(NodeContent).where(NodeContent.node_id == uuid.UUID(a)))
+        assert row.text == "New **content**"
+    response = await client.get(f"/api/v1/nodes/{a}")
+    assert response.json()["content"] == "New **content**"
@@ -0,0 +1,99 @@
+# backend/tests/test_changes.py
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.crud import change_crud
+from backend.db.session import AsyncSessionLocal
+from backend.models.graph_model import GraphChange
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_nodes(client, headers, graph_id, *names):
+    ids = []
+    for name in names:
+        response = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": name}, headers=headers)
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def revision_of(client, graph_id) -> int:
+    return (await client.get(f"/api/v1/graphs/{graph_id}")).json()["revision"]
+
+
+async def test_delta_since_revision(client, auth_headers, graph_id):
+    first, second = await create_nodes(client, auth_headers, graph_id, "Vectors", "Matrices")
+    since = await revision_of(client, graph_id)
+
+    third, = await create_nodes(client, auth_headers, graph_id, "Determinants")
+    await client.post(
+        f"/api/v1/graphs/{graph_id}/edges", json={"source_node_id": second, "target_node_id": third}, headers=auth_headers
+    )
+    await client.patch(f"/api/v1/nodes/{first}", json={"position_x": 5, "position_y": 6}, headers=auth_headers)
+    assert (await client.delete(f"/api/v1/nodes/{second}", headers=auth_headers)).status_code == 204
+
+    response = await client.get(f"/api/v1/graphs/{graph_id}/changes", params={"since": since})
+    assert response.status_code == 200, response.text
+    delta = response.json()
+    assert delta["revision"] == await revision_of(client, graph_id) and not delta["full_resync"]
+    assert delta["removed_node_ids"] == [second]
+    # Ребро создано после since, но удалено вместе с узлом
+    assert len(delta["removed_edge_ids"]) == 1
+    nodes = {el["data"]["id"]: el for el in delta["elements"]}
+    assert set(nodes) == {first, third}
+    assert nodes[first]["position"] == {"x": 5, "y": 6}
+
+    # Клиент уже на текущей ревизии - пустая дельта
+    current = (await client.get(f"/api/v1/graphs/{graph_id}/changes", params={"since": delta["revision"]})).json()
+    assert current["elements"] == [] and current["removed_node_ids"] == [] and not current["full_resync"]
+
+
+async def test_full_resync_for_future_or_large_delta(client, auth_headers, graph_id, monkeypatch):
+    await create_nodes(client, auth_headers, graph_id, "A", "B", "C")
+    revision = await revision_of(client, graph_id)
+    async with AsyncSessionLocal() as db:
+        assert (await change_crud.get_changes_since(db, uuid.UUID(graph_id), revision + 1))["full_resync"]
+        monkeypatch.setattr(change_crud, "GRAPH_CHANGES_MAX_DELTA", 2)
+        assert (await change_crud.get_changes_since(db, uuid.UUID(graph_id), 0))["full_resync"]
+        assert not (await change_crud.get_changes_since(db, uuid.UUID(graph_id), revision - 1))["full_resync"]
+        assert await change_crud.get_changes_since(db, uuid.uuid4(), 0) is None
+
+
+async def test_compaction_keeps_latest_record_and_raises_floor(client, auth_headers, graph_id, monkeypatch):
+    node, _ = await create_nodes(client, auth_headers, graph_id, "Vectors", "Matrices")
+    for x in range(3):
+        # Изменение не только позиции пишется сразу, без буфера позиций
+        response = await client.patch(f"/api/v1/nodes/{node}", json={"name": f"Vectors {x}"}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+    revision = await revision_of(client, graph_id)
+
+    graph_uuid = uuid.UUID(graph_id)
+    count_rows = select(func.count()).select_from(GraphChange).where(GraphChange.graph_id == graph_uuid)
+    monkeypatch.setattr(change_crud, "GRAPH_CHANGES_RETENTION_REVISIONS", 2)
+    async with AsyncSessionLocal() as db:
+        assert (await db.execute(count_rows)).scalar_one() == 5
+        removed = await change_crud.compact_graph_changes(db, graph_uuid, revision)
+        await db.commit()
+        # Записи ревизий до revision - 2 удалены, из оставшихся - по одной на узел
+        assert removed == 4
+        assert (await db.execute(count_rows)).scalar_one() == 1
+
+        delta = await change_crud.get_changes_since(db, graph_uuid, revision - 2)
+        assert not delta["full_resync"]
+        assert [row.id for row in delta["nodes"]] == [uuid.UUID(node)]
+        # Клиенту ниже сжатой границы нужна полная загрузка
+        assert (await change_crud.get_changes_since(db, graph_uuid, revision - 3))["full_resync"]
+
+
+async def test_compact_all_changes(client, auth_headers, graph_id):
+    node, = await create_nodes(client, auth_headers, graph_id, "Vectors")
+    for x in range(2):
+        await client.patch(f"/api/v1/nodes/{node}", json={"name": f"Vectors {x}"}, headers=auth_headers)
+    async with AsyncSessionLocal() as db:
+        assert await change_crud.compact_all_changes(db) >= 2
+        graph_uuid = uuid.UUID(graph_id)
+        rows = await db.execute(select(GraphChange.op).where(GraphChange.graph_id == graph_uuid))
+        assert rows.scalars().all() == ["update"]
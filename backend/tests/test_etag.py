@@ -0,0 +1,106 @@
+# backend/tests/test_etag.py
+import pytest
+from starlette.requests import Request
+
+from backend.core.etag import etag_matches, make_etag
+from backend.tests.conftest import register_user
+
+
+def vary(response) -> set:
+    return {value.strip() for value in response.headers["Vary"].split(",")}
+
+
+def request_with(if_none_match: str) -> Request:
+    return Request({"type": "http", "headers": [(b"if-none-match", if_none_match.encode("latin-1"))]})
+
+
+def test_etag_matches_uses_weak_comparison():
+    etag = make_etag("graph", 1, 2)
+    assert etag.startswith('"') and etag.endswith('"') and etag == make_etag("graph", 1, 2)
+    assert etag_matches(request_with(etag), etag)
+    assert etag_matches(request_with(f"W/{etag}"), etag)
+    assert etag_matches(request_with(f'"other", W/{etag}'), etag)
+    assert etag_matches(request_with("*"), etag)
+    assert not etag_matches(request_with('"other"'), etag)
+    assert not etag_matches(Request({"type": "http", "headers": []}), etag)
+
+
+async def get_etag(client, url, headers=None) -> str:
+    response = await client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.headers["ETag"]
+
+
+async def assert_not_modified(client, url, etag, headers=None, if_none_match=None):
+    response = await client.get(url, headers={**(headers or {}), "If-None-Match": if_none_match or etag})
+    assert response.status_code == 304, response.text
+    assert response.content == b"" and response.headers["ETag"] == etag
+    return response
+
+
+@pytest.mark.anyio
+async def test_read_graph_etag(client, auth_headers, graph_id):
+    url = f"/api/v1/graphs/{graph_id}"
+    node_id = (await client.post(f"{url}/nodes", json={"name": "Vectors"}, headers=auth_headers)).json()["id"]
+    viewer = await register_user(client)
+
+    response = await client.get(url, headers=viewer)
+    etag = response.headers["ETag"]
+    assert "Authorization" in vary(response)
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    not_modified = await assert_not_modified(client, url, etag, viewer)
+    assert "Authorization" in vary(not_modified)
+    await assert_not_modified(client, url, etag, viewer, if_none_match=f'"stale", W/{etag}')
+
+    # Правка узла меняет ревизию графа
+    response = await client.patch(f"/api/v1/nodes/{node_id}", json={"name": "Vector spaces"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    response = await client.get(url, headers={**viewer, "If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    etag = response.headers["ETag"]
+
+    # Голос: my_vote входит в ключ, поэтому у проголосовавшего и у анонима разные версии
+    anonymous_before = await get_etag(client, url)
+    response = await client.post(f"{url}/rate", json={"value": 1}, headers=viewer)
+    assert response.status_code == 204, response.text
+    voted = await get_etag(client, url, viewer)
+    assert voted != etag
+    assert await get_etag(client, url) not in (anonymous_before, voted)
+
+    # Прогресс меняет версию только для самого пользователя
+    anonymous = await get_etag(client, url)
+    response = await client.post(f"/api/v1/nodes/{node_id}/progress", headers=viewer)
+    assert response.status_code == 204, response.text
+    learned = await get_etag(client, url, viewer)
+    assert learned != voted
+    assert await get_etag(client, url) == anonymous
+    await assert_not_modified(client, url, learned, viewer)
+
+
+@pytest.mark.anyio
+async def test_read_node_etag(client, auth_headers, graph_id):
+    node_id = (await client.post(
+        f"/api/v1/graphs/{graph_id}/nodes", json={"name": "Vectors"}, headers=auth_headers
+    )).json()["id"]
+    url = f"/api/v1/nodes/{node_id}"
+    etag = await get_etag(client, url)
+    await assert_not_modified(client, url, etag)
+
+    response = await client.patch(url, json={"content": "Basis"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert response.json()["content"] == "Basis"
+
+
+@pytest.mark.anyio
+async def test_read_graphs_etag(client, auth_headers):
+    url = "/api/v1/graphs/"
+    etag = await get_etag(client, url)
+    await assert_not_modified(client, url, etag)
+
+    response = await client.post(url, json={"name": "Newest graph"}, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert response.json()["graphs"][0]["name"] == "Newest graph"
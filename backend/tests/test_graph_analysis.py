@@ -0,0 +1,159 @@
+# backend/tests/test_graph_analysis.py
+import uuid
+from array import array
+
+import pytest
+
+from backend.core.graph_analysis import GraphTopology, is_acyclic
+from backend.core.progress_bitmap import NodeOrdinals, bitmap_from_flags
+
+
+def make_topology(node_count: int, edges):
+    ordinals = NodeOrdinals([uuid.uuid4() for _ in range(node_count)])
+    ids = ordinals.node_ids
+    return GraphTopology(ordinals, [(ids[source], ids[target]) for source, target in edges])
+
+
+@pytest.mark.parametrize("edges, acyclic", [
+    ([], True),
+    ([(0, 1), (1, 2), (0, 2)], True),
+    ([(0, 1), (1, 2), (2, 0)], False),
+    ([(3, 3)], False),
+])
+def test_is_acyclic(edges, acyclic):
+    sources, targets = array("l", [s for s, _ in edges]), array("l", [t for _, t in edges])
+    assert is_acyclic(4, sources, targets) is acyclic
+    assert (make_topology(4, edges).topological_order() is not None) is acyclic
+
+
+def test_would_create_cycle():
+    topology = make_topology(4, [(0, 1), (1, 2)])
+    assert topology.would_create_cycle(2, 0)
+    assert topology.would_create_cycle(1, 1)  # петля
+    assert not topology.would_create_cycle(0, 2)
+    assert not topology.would_create_cycle(3, 0)
+
+
+def test_learning_order_and_closures():
+    # 0 -> 1 -> 3, 0 -> 2 -> 3
+    topology = make_topology(4, [(2, 3), (0, 1), (1, 3), (0, 2)])
+    order = topology.topological_order()
+    assert order.index(0) < order.index(1) < order.index(3)
+    assert order.index(0) < order.index(2) < order.index(3)
+    assert set(topology.ancestors(3)) == {0, 1, 2} and topology.ancestors(3)[0] == 0
+    assert set(topology.descendants(0)) == {1, 2, 3} and topology.descendants(0)[-1] == 3
+
+
+def test_next_unlockable_reads_progress_bitmap():
+    topology = make_topology(4, [(0, 1), (1, 3), (0, 2), (2, 3)])
+    ids = topology.ordinals.node_ids
+    assert topology.next_unlockable(topology.ordinals.encode([])) == [0]
+    assert topology.next_unlockable(topology.ordinals.encode([ids[0]])) == [1, 2]
+    assert topology.next_unlockable(bitmap_from_flags([True, True, False, False])) == [2]
+    assert topology.next_unlockable(topology.ordinals.encode(ids)) == []
+
+
+def test_node_ordinals_bitmap():
+    ids = [uuid.uuid4() for _ in range(11)]
+    ordinals = NodeOrdinals(ids)
+    learned = [ids[0], ids[7], ids[8], ids[10], uuid.uuid4()]  # последний узел не из графа
+    bitmap = ordinals.encode(learned)
+    assert len(bitmap) == 2
+    assert bitmap == bitmap_from_flags(i in (0, 7, 8, 10) for i in range(11))
+    assert ordinals.decode_ordinals(bitmap) == [0, 7, 8, 10]
+    assert ordinals.decode(bitmap) == [ids[0], ids[7], ids[8], ids[10]]
+    # Лишние биты за последним узлом (карта от ревизии с большим числом узлов) не читаются
+    assert ordinals.decode_ordinals(b"\x00\xff") == [8, 9, 10]
+
+
+@pytest.mark.anyio
+async def test_api_rejects_cycle_and_builds_learning_path(client, auth_headers, graph_id):
+    node_ids = []
+    for name in ("Vectors", "Matrices", "Determinants"):
+        response = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": name}, headers=auth_headers)
+        node_ids.append(response.json()["id"])
+    for source, target in ((0, 1), (1, 2)):
+        response = await client.post(
+            f"/api/v1/graphs/{graph_id}/edges",
+            json={"source_node_id": node_ids[source], "target_node_id": node_ids[target]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201, response.text
+
+    response = await client.post(
+        f"/api/v1/graphs/{graph_id}/edges",
+        json={"source_node_id": node_ids[2], "target_node_id": node_ids[0]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 409, response.text
+
+    response = await client.get(f"/api/v1/graphs/{graph_id}/learning-path")
+    assert response.status_code == 200, response.text
+    assert response.json()["node_ids"] == node_ids
+
+
+async def _create_nodes(client, headers, graph_id, names):
+    node_ids = []
+    for name in names:
+        response = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": name}, headers=headers)
+        assert response.status_code == 201, response.text
+        node_ids.append(uuid.UUID(response.json()["id"]))
+    return node_ids
+
+
+@pytest.mark.anyio
+async def test_create_edge_for_graph_rejects_stale_revision(client, auth_headers, graph_id):
+    from sqlalchemy import func, select
+
+    from backend.crud import graph_crud
+    from backend.db.session import AsyncSessionLocal
+    from backend.models.graph_model import Edge
+    from backend.schemas.graph_schema import EdgeCreate
+
+    source, target = await _create_nodes(client, auth_headers, graph_id, ("A", "B"))
+    edge_in = EdgeCreate(source_node_id=source, target_node_id=target)
+    async with AsyncSessionLocal() as db:
+        revision = await graph_crud.get_graph_revision(db, uuid.UUID(graph_id))
+        assert await graph_crud.create_edge_for_graph(db, edge_in, uuid.UUID(graph_id), revision - 1) is None
+        edges = await db.scalar(select(func.count()).select_from(Edge).where(Edge.graph_id == uuid.UUID(graph_id)))
+        assert edges == 0
+        assert await graph_crud.get_graph_revision(db, uuid.UUID(graph_id)) == revision
+
+        db_edge = await graph_crud.create_edge_for_graph(db, edge_in, uuid.UUID(graph_id), revision)
+        assert db_edge is not None
+        assert await graph_crud.get_graph_revision(db, uuid.UUID(graph_id)) == revision + 1
+
+
+@pytest.mark.anyio
+async def test_concurrent_opposite_edges_do_not_close_cycle(client, auth_headers, graph_id, monkeypatch):
+    from backend.crud import analysis_crud, graph_crud
+    from backend.db.session import AsyncSessionLocal
+    from backend.schemas.graph_schema import EdgeCreate
+
+    a, b = await _create_nodes(client, auth_headers, graph_id, ("A", "B"))
+    original = analysis_crud.would_create_cycle
+    raced = []
+
+    async def racing_check(db, **kwargs):
+        # Проверка B -> A проходит, а между ней и вставкой другой запрос добавляет A -> B
+        result = await original(db, **kwargs)
+        if not raced:
+            raced.append(True)
+            async with AsyncSessionLocal() as other:
+                revision = await graph_crud.get_graph_revision(other, uuid.UUID(graph_id))
+                edge_in = EdgeCreate(source_node_id=a, target_node_id=b)
+                assert await graph_crud.create_edge_for_graph(other, edge_in, uuid.UUID(graph_id), revision)
+        return result
+
+    monkeypatch.setattr(analysis_crud, "would_create_cycle", racing_check)
+    response = await client.post(
+        f"/api/v1/graphs/{graph_id}/edges",
+        json={"source_node_id": str(b), "target_node_id": str(a)},
+        headers=auth_headers,
+    )
+    assert response.status_code == 409, response.text
+    assert response.json()["detail"] == "Edge would create a prerequisite cycle"
+
+    response = await client.get(f"/api/v1/graphs/{graph_id}")
+    edges = [el["data"] for el in response.json()["elements"] if el["group"] == "edges"]
+    assert [(e["source"], e["target"]) for e in edges] == [(str(a), str(b))]
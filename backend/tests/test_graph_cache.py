@@ -0,0 +1,60 @@
+# backend/tests/test_graph_cache.py
+import json
+import uuid
+from types import SimpleNamespace
+
+from backend.core.graph_cache import GraphStructureCache, encode_graph_elements, render_graph_detail
+
+
+def test_evicts_least_recently_used_over_byte_budget():
+    cache = GraphStructureCache(max_bytes=100, max_entries=10)
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    cache.put(first, 1, b"a" * 40)
+    cache.put(second, 1, b"b" * 40)
+    assert cache.get(first, 1) == b"a" * 40  # first становится самым свежим
+    cache.put(third, 1, b"c" * 40)
+
+    assert cache.get(second, 1) is None
+    assert cache.get(first, 1) == b"a" * 40 and cache.get(third, 1) == b"c" * 40
+    assert len(cache) == 2 and cache.current_bytes == 80
+
+    # Блоб больше всего бюджета не кэшируется и ничего не вытесняет
+    cache.put(uuid.uuid4(), 1, b"x" * 101)
+    assert len(cache) == 2 and cache.current_bytes == 80
+
+
+def test_evicts_over_entry_limit_and_replaces_own_entry():
+    cache = GraphStructureCache(max_bytes=1000, max_entries=2)
+    graph_ids = [uuid.uuid4() for _ in range(3)]
+    for graph_id in graph_ids:
+        cache.put(graph_id, 1, b"blob")
+    assert cache.get(graph_ids[0], 1) is None and len(cache) == 2
+
+    cache.put(graph_ids[1], 2, b"longer blob")
+    assert len(cache) == 2 and cache.current_bytes == len(b"blob") + len(b"longer blob")
+
+
+def test_new_revision_misses_and_drops_entry():
+    cache = GraphStructureCache(max_bytes=100, max_entries=10)
+    graph_id = uuid.uuid4()
+    cache.put(graph_id, 3, b"[]")
+    assert cache.get(graph_id, 3) == b"[]"
+    assert cache.get(graph_id, 4) is None
+    assert len(cache) == 0 and cache.current_bytes == 0
+    assert cache.get(graph_id, 3) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_rendered_detail_is_valid_json():
+    node = SimpleNamespace(id=uuid.uuid4(), name='Vectors "basics"', position_x=1.5, position_y=-2.0)
+    other = SimpleNamespace(id=uuid.uuid4(), name="Matrices", position_x=0.0, position_y=0.0)
+    edge = SimpleNamespace(id=uuid.uuid4(), source_node_id=node.id, target_node_id=other.id)
+    blob = encode_graph_elements([node, other], [edge])
+
+    body = json.loads(render_graph_detail({"id": uuid.uuid4(), "likes": 0, "my_vote": None}, blob))
+    assert body["likes"] == 0 and body["my_vote"] is None
+    assert body["elements"][0] == {
+        "group": "nodes", "data": {"id": str(node.id), "label": 'Vectors "basics"'},
+        "position": {"x": 1.5, "y": -2.0},
+    }
+    assert body["elements"][2]["data"] == {"id": str(edge.id), "source": str(node.id), "target": str(other.id)}
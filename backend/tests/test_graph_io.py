@@ -0,0 +1,95 @@
+# backend/tests/test_graph_io.py
+import json
+import uuid
+
+import pytest
+
+from backend.core.graph_io import (
+    BINARY_MAGIC, BinaryReader, GraphFormatError, JsonLinesReader, binary_header, encode_binary, encode_jsonl,
+    reader_for,
+)
+
+NODE_A, NODE_B = str(uuid.uuid4()), str(uuid.uuid4())
+RECORDS = [
+    {"type": "graph", "name": "Линейная алгебра", "description": None},
+    # Содержимое длиннее 127 байт: длина занимает несколько байт varint
+    {"type": "node", "id": NODE_A, "name": "Векторы", "content": "$$\\vec v$$ " * 40, "x": 1.5, "y": -2.0},
+    {"type": "node", "id": NODE_B, "name": "Matrices", "content": None, "x": None, "y": None},
+    {"type": "edge", "source": NODE_A, "target": NODE_B},
+]
+
+
+def read_all(reader, data: bytes, chunk_size: int):
+    records = []
+    for start in range(0, len(data), chunk_size):
+        records += reader.feed(data[start:start + chunk_size])
+    return records + reader.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_binary_round_trip(chunk_size):
+    data = binary_header() + b"".join(encode_binary(record) for record in RECORDS)
+    assert isinstance(reader_for(data[:8]), BinaryReader)
+    assert read_all(BinaryReader(), data, chunk_size) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 1 << 20])
+def test_jsonl_round_trip(chunk_size):
+    data = b"".join(encode_jsonl(record) for record in RECORDS)
+    assert isinstance(reader_for(data[:8]), JsonLinesReader)
+    assert read_all(JsonLinesReader(), data, chunk_size) == RECORDS
+
+
+@pytest.mark.parametrize("data", [
+    binary_header() + encode_binary(RECORDS[1])[:-3],  # обрезанная запись
+    BINARY_MAGIC + bytes([99]),  # неизвестная версия формата
+    BINARY_MAGIC,  # нет даже заголовка
+])
+def test_binary_rejects_broken_files(data):
+    with pytest.raises(GraphFormatError):
+        read_all(BinaryReader(), data, 1 << 20)
+
+
+def normalized_export(body: bytes) -> dict:
+    """Экспорт в JSON Lines без id узлов: при импорте узлы получают новые UUID."""
+    records = [json.loads(line) for line in body.splitlines()]
+    nodes = {r["id"]: r for r in records if r["type"] == "node"}
+    return {
+        "graph": next((r["name"], r["description"]) for r in records if r["type"] == "graph"),
+        "nodes": sorted((r["name"], r["content"], r["x"], r["y"]) for r in nodes.values()),
+        "edges": sorted(
+            (nodes[r["source"]]["name"], nodes[r["target"]]["name"]) for r in records if r["type"] == "edge"
+        ),
+    }
+
+
+@pytest.mark.anyio
+async def test_api_binary_export_import_round_trip(client, auth_headers, graph_id):
+    ids = []
+    for name, content in (("Vectors", "x" * 5000), ("Matrices", ""), ("Бинарные операции", "∑ a_i")):
+        response = await client.post(
+            f"/api/v1/graphs/{graph_id}/nodes", json={"name": name, "content": content}, headers=auth_headers
+        )
+        ids.append(response.json()["id"])
+    await client.post(
+        f"/api/v1/graphs/{graph_id}/edges", json={"source_node_id": ids[0], "target_node_id": ids[1]}, headers=auth_headers
+    )
+    await client.patch(f"/api/v1/nodes/{ids[2]}", json={"position_x": 12.5, "position_y": -3}, headers=auth_headers)
+
+    exported = await client.get(f"/api/v1/graphs/{graph_id}/export", params={"format": "binary"})
+    assert exported.status_code == 200
+    assert exported.content.startswith(BINARY_MAGIC)
+
+    imported = await client.post("/api/v1/graphs/import", content=exported.content, headers=auth_headers)
+    assert imported.status_code == 201, imported.text
+
+    original = (await client.get(f"/api/v1/graphs/{graph_id}/export")).content
+    copy = (await client.get(f"/api/v1/graphs/{imported.json()['id']}/export")).content
+    assert normalized_export(copy) == normalized_export(original)
+    assert (12.5, -3) in {(x, y) for _, _, x, y in normalized_export(copy)["nodes"]}
+
+
+@pytest.mark.anyio
+async def test_api_import_rejects_broken_file(client, auth_headers):
+    response = await client.post("/api/v1/graphs/import", content=binary_header() + b"\x02\x01", headers=auth_headers)
+    assert response.status_code == 400, response.text
@@ -0,0 +1,61 @@
+# backend/tests/test_indexes.py
+"""
+Основные запросы должны идти по индексам миграции 4 (и 5 для user_progress).
+Планы берутся у SQLite через EXPLAIN QUERY PLAN на базе, созданной миграциями.
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from backend.db.migrations import run_migrations
+
+GRAPH_ID = "00000000000000000000000000000001"
+USER_ID = "00000000000000000000000000000002"
+
+
+@pytest.fixture(scope="module")
+def connection(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('indexes') / 'plan.db'}")
+    with engine.begin() as conn:
+        run_migrations(conn)
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+def query_plan(connection, sql: str, params: tuple = ()) -> str:
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("sql, params, index", [
+    # Структура графа: узлы и ребра по graph_id
+    ("SELECT id, name, position_x, position_y FROM nodes WHERE graph_id = ?", (GRAPH_ID,), "ix_nodes_graph_id"),
+    ("SELECT id, source_node_id, target_node_id FROM edges WHERE graph_id = ?", (GRAPH_ID,), "ix_edges_graph_id"),
+    # Страница комментариев по курсору, новые сверху
+    (
+        "SELECT * FROM comments WHERE graph_id = ? AND (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT 20",
+        (GRAPH_ID, "2026-01-01 00:00:00", GRAPH_ID),
+        "ix_comments_graph_id_created_at_id",
+    ),
+    # Каталог по дате и по рейтингу
+    ("SELECT * FROM graphs ORDER BY created_at DESC, id DESC LIMIT 20", (), "ix_graphs_created_at_id"),
+    (
+        "SELECT * FROM graphs ORDER BY score DESC, created_at DESC, id DESC LIMIT 20",
+        (),
+        "ix_graphs_score_created_at_id",
+    ),
+    # Голоса за граф (пересчет счетчиков рейтинга)
+    ("SELECT count(*) FROM graph_ratings WHERE graph_id = ? AND value = 1", (GRAPH_ID,), "ix_graph_ratings_graph_id"),
+    # Изученные пользователем узлы графа
+    (
+        "SELECT node_id FROM user_progress WHERE user_id = ? AND graph_id = ?",
+        (USER_ID, GRAPH_ID),
+        "ix_user_progress_user_id_graph_id",
+    ),
+])
+def test_query_uses_index(connection, sql, params, index):
+    plan = query_plan(connection, sql, params)
+    assert f"INDEX {index}" in plan, plan
+    # Сортировка должна выполняться самим индексом, без временного B-дерева
+    assert "USE TEMP B-TREE" not in plan, plan
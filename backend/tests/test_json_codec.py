@@ -0,0 +1,87 @@
+# backend/tests/test_json_codec.py
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from backend.core import json_codec
+from backend.core.graph_cache import graph_cache
+from backend.tests.conftest import register_user
+
+# Режимы сериализации: (FAST_JSON, dumps, uuid_value). "fast-stdlib" проверяет
+# прямую сборку ответов из словарей и без установленного orjson.
+CODECS = {
+    "pydantic": (False, json_codec.stdlib_dumps, str),
+    "fast-stdlib": (True, json_codec.stdlib_dumps, str),
+    "fast-orjson": (True, json_codec.orjson_dumps, json_codec._same),
+}
+
+
+def use_codec(monkeypatch, name: str) -> None:
+    fast, dumps, uuid_value = CODECS[name]
+    monkeypatch.setattr(json_codec, "FAST_JSON", fast)
+    monkeypatch.setattr(json_codec, "dumps", dumps)
+    monkeypatch.setattr(json_codec, "uuid_value", uuid_value)
+    # Блоб элементов графа кэшируется уже сериализованным
+    graph_cache.clear()
+
+
+def test_dumps_implementations_agree():
+    if not json_codec.ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    value = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"), "missing": None, "name": "Векторы \"и\" матрицы",
+        "created_at": datetime(2026, 10, 17, 19, 9, 0, 123456), "whole": datetime(2026, 1, 1), "rank": 0.5,
+        "ids": [uuid.UUID(int=1)],
+    }
+    assert json_codec.orjson_dumps(value) == json_codec.stdlib_dumps(value)
+
+
+@pytest.mark.anyio
+async def test_fast_path_matches_pydantic_responses(client, monkeypatch):
+    owner, viewer = await register_user(client), await register_user(client)
+    word = f"parity{uuid.uuid4().hex[:10]}"
+    # Без описания: description = None должно кодироваться одинаково
+    graph_id = (await client.post("/api/v1/graphs/", json={"name": word}, headers=owner)).json()["id"]
+    node_ids = []
+    for name in ("Векторы", "Матрицы"):
+        response = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": name}, headers=owner)
+        node_ids.append(response.json()["id"])
+    await client.post(
+        f"/api/v1/graphs/{graph_id}/edges",
+        json={"source_node_id": node_ids[0], "target_node_id": node_ids[1]}, headers=owner,
+    )
+    await client.post(f"/api/v1/nodes/{node_ids[0]}/progress", headers=viewer)
+    await client.post(f"/api/v1/graphs/{graph_id}/rate", json={"value": 1}, headers=viewer)
+
+    requests = {
+        "graph_viewer": (f"/api/v1/graphs/{graph_id}", viewer, None),
+        "graph_anonymous": (f"/api/v1/graphs/{graph_id}", {}, None),
+        "catalog": ("/api/v1/graphs/", {}, {"search": word}),
+        "profile_owner": ("/api/v1/users/me/profile", owner, None),
+        "profile_viewer": ("/api/v1/users/me/profile", viewer, None),
+    }
+    bodies = {}
+    for codec in CODECS:
+        if codec == "fast-orjson" and not json_codec.ORJSON_AVAILABLE:
+            continue
+        use_codec(monkeypatch, codec)
+        bodies[codec] = {}
+        for key, (url, headers, params) in requests.items():
+            response = await client.get(url, headers=headers, params=params)
+            assert response.status_code == 200, (codec, key, response.text)
+            bodies[codec][key] = json.loads(response.content)
+
+    expected = bodies.pop("pydantic")
+    for codec, rendered in bodies.items():
+        for key in requests:
+            assert rendered[key] == expected[key], (codec, key)
+
+    catalog = expected["catalog"]["graphs"]
+    assert [graph["id"] for graph in catalog] == [graph_id]
+    assert catalog[0]["description"] is None and isinstance(catalog[0]["created_at"], str)
+    assert expected["graph_viewer"]["learned_node_ids"] == [node_ids[0]]
+    assert expected["graph_viewer"]["my_vote"] == 1 and expected["graph_anonymous"]["my_vote"] == 0
+    assert [graph["id"] for graph in expected["profile_viewer"]["learning_graphs"]] == [graph_id]
+    assert expected["profile_owner"]["total_likes"] == 1
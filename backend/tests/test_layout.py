@@ -0,0 +1,70 @@
+# backend/tests/test_layout.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from backend.core import layout
+from backend.core.layout import LayoutPool, layered_layout
+
+pytestmark = pytest.mark.anyio
+
+
+def test_layered_layout_puts_prerequisites_above():
+    xs, ys = layered_layout(4, [0, 0, 1, 2], [1, 2, 3, 3])
+    assert ys[0] < ys[1] == ys[2] < ys[3]
+    assert xs[1] != xs[2]
+
+
+async def test_pool_rejects_requests_over_max_pending(monkeypatch):
+    # Расчет в потоке вместо процесса: подмененный алгоритм виден исполнителю
+    release = threading.Event()
+
+    def slow_layout(node_count, sources, targets):
+        release.wait(5)
+        return [0.0], [0.0]
+
+    monkeypatch.setitem(layout.LAYOUTS, "slow", slow_layout)
+    pool = LayoutPool(max_workers=1, max_pending=1)
+    pool._executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        running = asyncio.create_task(pool.run("slow", 1, [], []))
+        while pool.pending == 0:
+            await asyncio.sleep(0.01)
+
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run("slow", 1, [], [])
+        assert rejected.value.status_code == 429
+        assert rejected.value.headers["Retry-After"]
+
+        release.set()
+        assert await running == ([0.0], [0.0])
+        assert pool.pending == 0
+        # Место в очереди освободилось
+        assert await pool.run("slow", 1, [], []) == ([0.0], [0.0])
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+async def test_api_layout_saves_positions(client, auth_headers, graph_id):
+    node_ids = []
+    for name in ("Vectors", "Matrices"):
+        response = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": name}, headers=auth_headers)
+        node_ids.append(response.json()["id"])
+    await client.post(
+        f"/api/v1/graphs/{graph_id}/edges",
+        json={"source_node_id": node_ids[0], "target_node_id": node_ids[1]},
+        headers=auth_headers,
+    )
+
+    response = await client.post(f"/api/v1/graphs/{graph_id}/layout", json={"algorithm": "layered"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    positions = {p["id"]: (p["x"], p["y"]) for p in response.json()["positions"]}
+    assert positions[node_ids[0]][1] < positions[node_ids[1]][1]
+
+    elements = (await client.get(f"/api/v1/graphs/{graph_id}")).json()["elements"]
+    saved = {el["data"]["id"]: el["position"] for el in elements if "position" in el}
+    assert saved[node_ids[1]] == {"x": positions[node_ids[1]][0], "y": positions[node_ids[1]][1]}
@@ -0,0 +1,104 @@
+# backend/tests/test_live.py
+import uuid
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.core.live import ChangeLogBroker, LiveHub, edge_delta, node_delta
+
+
+def make_subscriber(max_pending: int = 100):
+    hub = LiveHub(max_pending=max_pending, coalesce_ms=0)
+    return hub, hub.subscribe(uuid.uuid4())
+
+
+def test_pushes_for_one_node_merge_into_one_entry():
+    _, subscriber = make_subscriber()
+    node_id = uuid.uuid4()
+    subscriber.push(3, nodes=[node_delta(node_id, {"name": "Vectors", "position_x": 0.0, "position_y": 0.0})])
+    subscriber.push(4, nodes=[node_delta(node_id, {"position_x": 10.0, "position_y": 5.0})])
+    subscriber.push(5, nodes=[node_delta(node_id, {"position_x": 12.0})])
+    message = subscriber.take()
+    assert message["type"] == "delta" and message["revision"] == 5
+    assert message["nodes"] == [{"id": node_id, "label": "Vectors", "x": 12.0, "y": 5.0}]
+    assert subscriber.take() is None
+
+
+def test_created_then_removed_node_is_only_removed():
+    _, subscriber = make_subscriber()
+    node_id, edge_id, other_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    subscriber.push(1, nodes=[node_delta(node_id, {"name": "Draft"})], edges=[edge_delta(edge_id, node_id, other_id)])
+    subscriber.push(2, removed_nodes=[node_id], removed_edges=[edge_id])
+    message = subscriber.take()
+    assert message["nodes"] == [] and message["edges"] == []
+    assert message["removed_nodes"] == [node_id] and message["removed_edges"] == [edge_id]
+
+
+def test_overflow_becomes_single_resync():
+    hub, subscriber = make_subscriber(max_pending=3)
+    subscriber.push(7, nodes=[node_delta(uuid.uuid4(), {"name": str(i)}) for i in range(3)])
+    subscriber.push(9, nodes=[node_delta(uuid.uuid4(), {"name": "overflow"})])
+    subscriber.push(8, nodes=[node_delta(uuid.uuid4(), {"name": "late"})])
+    assert subscriber.take() == {"type": "resync", "revision": 9}
+    assert subscriber.take() is None
+    assert hub.resyncs == 1
+
+
+@pytest.mark.anyio
+async def test_changelog_broker_poll_delivers_edit(client, auth_headers, graph_id):
+    hub = LiveHub(coalesce_ms=0)
+    broker = ChangeLogBroker(hub, interval_seconds=60)
+    graph_uuid = uuid.UUID(graph_id)
+    subscriber = hub.subscribe(graph_uuid)
+    revision = (await client.get(f"/api/v1/graphs/{graph_id}")).json()["revision"]
+    broker.watch(graph_uuid, revision)
+
+    await broker.poll()
+    assert subscriber.take() is None
+
+    response = await client.post(
+        f"/api/v1/graphs/{graph_id}/nodes", json={"name": "Vectors", "position_x": 1.5}, headers=auth_headers
+    )
+    node_id = uuid.UUID(response.json()["id"])
+    await broker.poll()
+    message = subscriber.take()
+    assert message["type"] == "delta" and message["revision"] == revision + 1
+    assert message["nodes"] == [{"id": node_id, "label": "Vectors", "x": 1.5, "y": 0.0}]
+
+    # Повторный опрос без новых правок ничего не доставляет
+    await broker.poll()
+    assert subscriber.take() is None
+
+
+def without_lifespan(app):
+    """Приложение без lifespan: он уже запущен фикстурой app на всю сессию тестов."""
+    async def asgi(scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await app(scope, receive, send)
+        while True:
+            message = await receive()
+            await send({"type": message["type"] + ".complete"})
+            if message["type"] == "lifespan.shutdown":
+                return
+    return asgi
+
+
+@pytest.mark.anyio
+async def test_websocket_sends_hello_then_delta(app, auth_headers, graph_id):
+    def scenario():
+        # Запросы и WebSocket идут через один TestClient: у них общий цикл событий
+        with TestClient(without_lifespan(app)) as test_client:
+            revision = test_client.get(f"/api/v1/graphs/{graph_id}").json()["revision"]
+            with test_client.websocket_connect(f"/api/v1/graphs/{graph_id}/live") as websocket:
+                assert websocket.receive_json() == {"type": "hello", "revision": revision}
+                response = test_client.post(
+                    f"/api/v1/graphs/{graph_id}/nodes", json={"name": "Vectors"}, headers=auth_headers
+                )
+                assert response.status_code == 201, response.text
+                message = websocket.receive_json()
+        assert message["type"] == "delta" and message["revision"] == revision + 1
+        assert message["nodes"] == [{"id": response.json()["id"], "label": "Vectors", "x": 0.0, "y": 0.0}]
+        assert message["edges"] == [] and message["removed_nodes"] == []
+
+    await anyio.to_thread.run_sync(scenario)
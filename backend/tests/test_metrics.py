@@ -0,0 +1,71 @@
+# backend/tests/test_metrics.py
+import re
+import uuid
+
+import pytest
+
+from backend.core.metrics import Counter, Histogram, Registry
+from backend.core.progress_bitmap import NodeOrdinals, ProgressCache
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "read_graph")
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="read_graph",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="read_graph",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="read_graph",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="read_graph"} 4' in lines
+
+
+def test_registry_renders_counters_and_collectors():
+    registry = Registry()
+    counter = registry.register(Counter("requests_total", "Requests.", ("status",)))
+    counter.inc("200")
+    counter.inc("200")
+    registry.add_collector("queue_depth", "gauge", "Queue depth.", ("pool",), lambda: [(("layout",), 3)])
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{status="200"} 2' in text
+    assert 'queue_depth{pool="layout"} 3' in text
+
+
+def sample(text: str, name: str, labels: str) -> float:
+    match = re.search(rf"^{re.escape(name + labels)} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_counts_requests_and_queries(client, graph_id):
+    before = (await client.get("/metrics")).text
+    response = await client.get(f"/api/v1/graphs/{graph_id}")
+    assert response.status_code == 200
+    after = (await client.get("/metrics")).text
+
+    labels = '{route="read_graph",method="GET",status="200"}'
+    assert sample(after, "http_requests_total", labels) == sample(before, "http_requests_total", labels) + 1
+    # Запросы к БД учитываются по маршруту
+    route = '{route="read_graph"}'
+    assert sample(after, "db_queries_per_request_sum", route) > sample(before, "db_queries_per_request_sum", route)
+    assert "cache_hits_total" in after and "position_buffer_pending" in after
+
+
+def test_progress_cache_stats():
+    cache = ProgressCache(ttl_seconds=60, max_entries=10, max_graphs=10)
+    graph_id, user_id = uuid.uuid4(), uuid.uuid4()
+    assert cache.get_ordinals(graph_id, 1) is None
+    cache.put_ordinals(graph_id, 1, NodeOrdinals([]))
+    assert cache.get_ordinals(graph_id, 1) is not None
+    cache.put_bitmap(user_id, graph_id, 1, b"\x01")
+    assert cache.ordinals_stats() == {"hits": 1, "misses": 1, "entries": 1}
+    assert cache.bitmap_stats()["entries"] == 1
+
+
+@pytest.mark.anyio
+async def test_progress_caches_are_exported(client, graph_id):
+    await client.get(f"/api/v1/graphs/{graph_id}")
+    text = (await client.get("/metrics")).text
+    for name in ("node_ordinals", "progress_bitmap"):
+        assert re.search(rf'^cache_entries{{cache="{name}"}} \d+', text, re.M), name
+        assert f'cache_hits_total{{cache="{name}"}}' in text
@@ -0,0 +1,79 @@
+# backend/tests/test_node_content.py
+import hashlib
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+from backend.core import node_content
+from backend.core.node_content import ZLIB, decode_content, encode_content
+from backend.db import migrations
+from backend.db.migrations import run_migrations, schema_migrations
+from backend.models.graph_model import Graph, Node, NodeContent
+
+
+def test_short_text_is_stored_as_is():
+    values = encode_content("Векторы")
+    assert values["compression"] is None
+    assert values["body"] == "Векторы".encode("utf-8")
+    assert values["size"] == len("Векторы".encode("utf-8"))
+    assert values["sha256"] == hashlib.sha256("Векторы".encode("utf-8")).hexdigest()
+    assert decode_content(values["body"], values["compression"]) == "Векторы"
+
+
+def test_long_text_is_compressed():
+    text_ = "$$\\int_0^1 f(x)\\,dx$$ и немного пояснений. " * 200
+    values = encode_content(text_)
+    assert values["compression"] == ZLIB
+    assert len(values["body"]) < values["size"] == len(text_.encode("utf-8"))
+    assert decode_content(values["body"], values["compression"]) == text_
+
+
+def test_text_is_not_compressed_when_it_does_not_help(monkeypatch):
+    # Уровень 0 - zlib без сжатия: результат длиннее исходного, хранится текст как есть
+    monkeypatch.setattr(node_content, "NODE_CONTENT_COMPRESS_LEVEL", 0)
+    assert encode_content("a" * 10000)["compression"] is None
+    monkeypatch.undo()
+    monkeypatch.setattr(node_content, "NODE_CONTENT_COMPRESS_MIN_BYTES", 0)
+    assert encode_content("a" * 10000)["compression"] is None
+
+
+def test_empty_and_unknown_compression():
+    assert encode_content(None) == encode_content("")
+    assert decode_content(b"", None) == ""
+    with pytest.raises(ValueError):
+        decode_content(b"data", "lz4")
+
+
+def test_migration_moves_content_into_side_table(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        run_migrations(conn)
+        # База до миграции 7: тексты в колонке nodes.content, node_contents пуста
+        conn.execute(text("ALTER TABLE nodes ADD COLUMN content TEXT"))
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.version == 7))
+        graph_id = uuid.uuid4()
+        conn.execute(Graph.__table__.insert().values(id=graph_id, name="Legacy", owner_id=uuid.uuid4()))
+        contents = {"short": "Векторы", "long": "матрица " * 1000, "empty": "", "null": None, "tail": "x"}
+        node_ids = {}
+        for name, content in contents.items():
+            node_ids[name] = uuid.uuid4()
+            conn.execute(Node.__table__.insert().values(id=node_ids[name], name=name, graph_id=graph_id))
+            conn.execute(text("UPDATE nodes SET content = :content WHERE name = :name"), {"content": content, "name": name})
+
+    # Несколько пачек переноса
+    monkeypatch.setattr(migrations, "_CONTENT_MIGRATION_BATCH", 2)
+    with engine.begin() as conn:
+        run_migrations(conn)
+
+    with engine.connect() as conn:
+        assert "content" not in {column["name"] for column in inspect(conn).get_columns("nodes")}
+        assert 7 in conn.execute(select(schema_migrations.c.version)).scalars().all()
+        rows = conn.execute(select(NodeContent.node_id, NodeContent.body, NodeContent.compression, NodeContent.size)).all()
+        # Ссылки на узлы читаются обратно как UUID тех же узлов
+        moved = {row.node_id: decode_content(row.body, row.compression) for row in rows}
+        assert moved == {node_ids[name]: contents[name] for name in ("short", "long", "tail")}
+        compression = {row.node_id: row.compression for row in rows}
+        assert compression[node_ids["long"]] == ZLIB and compression[node_ids["short"]] is None
+        assert conn.execute(select(Node.id).join(NodeContent, NodeContent.node_id == Node.id)).scalars().all()
+    engine.dispose()
@@ -0,0 +1,53 @@
+# backend/tests/test_pagination.py
+import uuid
+from datetime import datetime
+
+import pytest
+
+from backend.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    values = [datetime(2026, 1, 2, 3, 4, 5), uuid.uuid4()]
+    assert decode_cursor(encode_cursor("comments", values), "comments", [datetime, uuid.UUID]) == values
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("date_desc", [1, 2])])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "comments", [datetime, uuid.UUID])
+
+
+@pytest.mark.anyio
+async def test_catalog_pages_by_cursor(client, auth_headers):
+    for number in range(5):
+        response = await client.post("/api/v1/graphs/", json={"name": f"Paging {number}"}, headers=auth_headers)
+        assert response.status_code == 201
+
+    seen, cursor = [], None
+    for _ in range(3):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/api/v1/graphs/", params=params)).json()
+        seen += [graph["id"] for graph in page["graphs"]]
+        cursor = page["next_cursor"]
+    assert len(seen) == len(set(seen)) == 6
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path, params", [
+    ("/api/v1/graphs/", {"cursor": "garbage"}),
+    # Курсор другой сортировки
+    ("/api/v1/graphs/", {"cursor": encode_cursor("date_desc", [datetime.now(), uuid.uuid4()]), "sort_by": "rating_desc"}),
+    # Для сортировки по релевантности курсоров нет: он не должен молча игнорироваться
+    ("/api/v1/graphs/", {"cursor": encode_cursor("date_desc", [datetime.now(), uuid.uuid4()]),
+                         "sort_by": "relevance", "search": "paging"}),
+])
+async def test_catalog_rejects_cursor(client, path, params):
+    response = await client.get(path, params=params)
+    assert response.status_code == 400, response.text
+
+
+@pytest.mark.anyio
+async def test_comments_reject_invalid_cursor(client, graph_id):
+    response = await client.get(f"/api/v1/graphs/{graph_id}/comments", params={"cursor": "garbage"})
+    assert response.status_code == 400, response.text
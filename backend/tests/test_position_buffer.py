@@ -0,0 +1,101 @@
+# backend/tests/test_position_buffer.py
+import asyncio
+import uuid
+
+import pytest
+
+from backend.crud import node_crud
+from backend.core.position_buffer import PositionBuffer
+
+pytestmark = pytest.mark.anyio
+
+GRAPH = uuid.uuid4()
+NODE, OTHER = uuid.uuid4(), uuid.uuid4()
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Пачки, переданные в node_crud.flush_node_positions (вместо записи в БД)."""
+    batches = []
+
+    async def flush_node_positions(db, positions):
+        batches.append(positions)
+        return {}
+
+    monkeypatch.setattr(node_crud, "flush_node_positions", flush_node_positions)
+    return batches
+
+
+async def test_positions_of_one_node_are_coalesced(writes):
+    buffer = PositionBuffer(enabled=True, flush_ms=10_000, max_pending=100)
+    buffer.add(GRAPH, NODE, {"position_x": 1})
+    buffer.add(GRAPH, NODE, {"position_y": 2})
+    buffer.add(GRAPH, NODE, {"position_x": 3})
+    buffer.add(GRAPH, OTHER, {"position_x": 0, "position_y": 0})
+    assert buffer.pending == 2
+    assert buffer.get(NODE) == {"position_x": 3, "position_y": 2}
+
+    assert await buffer.flush() == 2
+    assert writes == [{GRAPH: {NODE: {"position_x": 3, "position_y": 2}, OTHER: {"position_x": 0, "position_y": 0}}}]
+    assert buffer.pending == 0 and buffer.get(NODE) == {}
+    assert (buffer.flushes, buffer.flushed_nodes) == (1, 2)
+    # Пустой буфер ничего не пишет
+    assert await buffer.flush() == 0 and len(writes) == 1
+
+
+async def test_failed_batch_is_requeued_behind_newer_positions(monkeypatch, writes):
+    buffer = PositionBuffer(enabled=True, flush_ms=10_000, max_pending=100)
+    buffer.add(GRAPH, NODE, {"position_x": 1, "position_y": 1})
+    recording_flush = node_crud.flush_node_positions
+
+    async def failing_flush(db, positions):
+        # Пока пачка пишется, узел успели передвинуть еще раз
+        buffer.add(GRAPH, NODE, {"position_x": 9})
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(node_crud, "flush_node_positions", failing_flush)
+    with pytest.raises(RuntimeError):
+        await buffer.flush()
+    assert buffer.failures == 1 and buffer.flushes == 0
+    assert buffer.get(NODE) == {"position_x": 9, "position_y": 1}
+
+    monkeypatch.setattr(node_crud, "flush_node_positions", recording_flush)
+    await buffer.flush_graph(GRAPH)
+    assert writes == [{GRAPH: {NODE: {"position_x": 9, "position_y": 1}}}]
+
+
+async def test_stop_flushes_what_is_left(writes):
+    buffer = PositionBuffer(enabled=True, flush_ms=10_000, max_pending=100)
+    await buffer.start()
+    assert buffer.running
+    buffer.add(GRAPH, NODE, {"position_x": 4, "position_y": 5})
+    await buffer.stop()
+    assert not buffer.running
+    assert writes == [{GRAPH: {NODE: {"position_x": 4, "position_y": 5}}}]
+
+
+async def test_full_buffer_is_flushed_without_waiting(writes):
+    buffer = PositionBuffer(enabled=True, flush_ms=10_000, max_pending=2)
+    await buffer.start()
+    try:
+        buffer.add(GRAPH, NODE, {"position_x": 1})
+        buffer.add(GRAPH, OTHER, {"position_x": 2})
+        for _ in range(100):
+            if writes:
+                break
+            await asyncio.sleep(0.01)
+        assert writes == [{GRAPH: {NODE: {"position_x": 1}, OTHER: {"position_x": 2}}}]
+    finally:
+        await buffer.stop()
+
+
+async def test_api_position_patch_is_visible_before_flush(client, auth_headers, graph_id):
+    response = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": "Vectors"}, headers=auth_headers)
+    node_id = response.json()["id"]
+
+    response = await client.patch(f"/api/v1/nodes/{node_id}", json={"position_x": 7, "position_y": 8}, headers=auth_headers)
+    assert response.status_code == 202, response.text
+    assert (response.json()["position_x"], response.json()["position_y"]) == (7, 8)
+
+    node = (await client.get(f"/api/v1/nodes/{node_id}")).json()
+    assert (node["position_x"], node["position_y"]) == (7, 8)
@@ -0,0 +1,62 @@
+# backend/tests/test_ratings.py
+import uuid
+
+import pytest
+from sqlalchemy import select, update
+
+from backend.crud.rating_crud import reconcile_graph_ratings
+from backend.db.session import AsyncSessionLocal
+from backend.models.graph_model import Graph
+from backend.tests.conftest import register_user
+
+
+async def rating(client, graph_id, headers) -> tuple:
+    """(likes, dislikes, score, my_vote): счетчики из GET /graphs/{id}, score - из таблицы graphs."""
+    body = (await client.get(f"/api/v1/graphs/{graph_id}", headers=headers)).json()
+    async with AsyncSessionLocal() as db:
+        score = await db.scalar(select(Graph.score).where(Graph.id == uuid.UUID(graph_id)))
+    return body["likes"], body["dislikes"], score, body["my_vote"]
+
+
+async def vote(client, graph_id, headers, value: int) -> None:
+    response = await client.post(f"/api/v1/graphs/{graph_id}/rate", json={"value": value}, headers=headers)
+    assert response.status_code == 204, response.text
+
+
+@pytest.mark.anyio
+async def test_vote_flip_and_toggle_update_counters(client, auth_headers, graph_id):
+    voter, other = await register_user(client), await register_user(client)
+    assert await rating(client, graph_id, voter) == (0, 0, 0, 0)
+
+    await vote(client, graph_id, voter, 1)
+    assert await rating(client, graph_id, voter) == (1, 0, 1, 1)
+    await vote(client, graph_id, other, 1)
+    assert await rating(client, graph_id, voter) == (2, 0, 2, 1)
+
+    # Лайк -> дизлайк и обратно
+    await vote(client, graph_id, voter, -1)
+    assert await rating(client, graph_id, voter) == (1, 1, 0, -1)
+    await vote(client, graph_id, voter, 1)
+    assert await rating(client, graph_id, voter) == (2, 0, 2, 1)
+
+    # Повторный лайк снимает голос
+    await vote(client, graph_id, voter, 1)
+    assert await rating(client, graph_id, voter) == (1, 0, 1, 0)
+    assert await rating(client, graph_id, other) == (1, 0, 1, 1)
+
+    response = await client.post(f"/api/v1/graphs/{graph_id}/rate", json={"value": 1}, headers=auth_headers)
+    assert response.status_code == 403, response.text
+
+
+@pytest.mark.anyio
+async def test_reconcile_restores_counters(client, graph_id):
+    voter, other = await register_user(client), await register_user(client)
+    await vote(client, graph_id, voter, 1)
+    await vote(client, graph_id, other, -1)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Graph).where(Graph.id == uuid.UUID(graph_id)).values(likes=7, dislikes=0, score=42))
+        await db.commit()
+        assert await reconcile_graph_ratings(db) >= 1
+        graph = await db.scalar(select(Graph).where(Graph.id == uuid.UUID(graph_id)))
+        assert (graph.likes, graph.dislikes, graph.score) == (1, 1, 0)
@@ -0,0 +1,111 @@
+# backend/tests/test_reachability.py
+import random
+import uuid
+
+import pytest
+
+from backend.core.graph_analysis import GraphTopology
+from backend.core.progress_bitmap import NodeOrdinals
+from backend.core.reachability import ReachabilityCache, ReachabilityIndex, iter_bits
+
+
+def make_topology(node_count: int, edges) -> GraphTopology:
+    ordinals = NodeOrdinals([uuid.uuid4() for _ in range(node_count)])
+    ids = ordinals.node_ids
+    return GraphTopology(ordinals, [(ids[source], ids[target]) for source, target in edges])
+
+
+def closure(index: ReachabilityIndex, node_count: int):
+    return [[index.is_reachable(s, t) for t in range(node_count)] for s in range(node_count)]
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b1010_0001)) == [0, 5, 7]
+    assert list(iter_bits(1 << 200)) == [200]
+
+
+def test_build_matches_traversal():
+    topology = make_topology(5, [(0, 1), (1, 2), (3, 2)])
+    index = ReachabilityIndex.build(topology)
+    for source in range(5):
+        for target in range(5):
+            expected = source != target and topology.reaches(source, target)
+            assert index.is_reachable(source, target) is expected
+    assert list(iter_bits(index.descendants[0])) == [1, 2]
+    assert list(iter_bits(index.ancestors[2])) == [0, 1, 3]
+
+
+def test_cycle_component_reaches_itself():
+    # Старые графы могут содержать цикл 0 -> 1 -> 2 -> 0
+    index = ReachabilityIndex.build(make_topology(4, [(0, 1), (1, 2), (2, 0), (2, 3)]))
+    for node in range(3):
+        assert index.is_reachable(node, node)
+        assert index.is_reachable(node, 3)
+    assert not index.is_reachable(3, 0) and not index.is_reachable(3, 3)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_with_edge_matches_rebuild(seed):
+    rng = random.Random(seed)
+    node_count = 30
+    edges = [(s, t) for s in range(node_count) for t in range(s + 1, node_count) if rng.random() < 0.05]
+    index = ReachabilityIndex.build(make_topology(node_count, edges))
+    for _ in range(10):
+        source, target = sorted(rng.sample(range(node_count), 2))
+        edges.append((source, target))
+        index = index.with_edge(source, target)
+        assert closure(index, node_count) == closure(ReachabilityIndex.build(make_topology(node_count, edges)), node_count)
+
+
+def test_with_edge_leaves_original_unchanged():
+    index = ReachabilityIndex.build(make_topology(3, [(0, 1)]))
+    extended = index.with_edge(1, 2)
+    assert extended.is_reachable(0, 2)
+    assert not index.is_reachable(0, 2)
+
+
+def test_cache_is_keyed_by_revision_and_bounded():
+    graph_id = uuid.uuid4()
+    index = ReachabilityIndex.build(make_topology(3, [(0, 1)]))
+    cache = ReachabilityCache(max_bytes=index.memory_bytes * 2, max_nodes=100)
+    cache.put(graph_id, 1, index)
+    assert cache.get(graph_id, 1) is index
+    # Другая ревизия - промах, и устаревший индекс сразу освобождается
+    assert cache.get(graph_id, 2) is None
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+    for _ in range(3):
+        cache.put(uuid.uuid4(), 1, index)
+    assert len(cache) == 2 and cache.current_bytes <= cache.max_bytes
+
+
+@pytest.mark.anyio
+async def test_api_reachability_after_new_edge(client, auth_headers, graph_id):
+    node_ids = []
+    for name in ("A", "B", "C"):
+        response = await client.post(f"/api/v1/graphs/{graph_id}/nodes", json={"name": name}, headers=auth_headers)
+        node_ids.append(response.json()["id"])
+
+    async def reachable(source, target):
+        response = await client.get(
+            f"/api/v1/graphs/{graph_id}/reachability",
+            params={"source": node_ids[source], "target": node_ids[target]},
+        )
+        assert response.status_code == 200, response.text
+        return response.json()["reachable"]
+
+    async def add_edge(source, target):
+        response = await client.post(
+            f"/api/v1/graphs/{graph_id}/edges",
+            json={"source_node_id": node_ids[source], "target_node_id": node_ids[target]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201, response.text
+
+    await add_edge(0, 1)
+    # Индекс построен и закэширован; следующие ребра дополняют его через with_edge
+    assert await reachable(0, 1) and not await reachable(0, 2)
+    await add_edge(1, 2)
+    assert await reachable(0, 2)
+    assert not await reachable(2, 0)
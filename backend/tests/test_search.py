@@ -0,0 +1,102 @@
+# backend/tests/test_search.py
+import uuid
+
+import pytest
+
+from backend.db.search import tokenize_query
+
+
+def unique_word(prefix: str) -> str:
+    # База общая для всех тестов: слова запроса уникальны для каждого теста
+    return f"{prefix}{uuid.uuid4().hex[:10]}"
+
+
+async def create_node(client, headers, graph_id, name, content=""):
+    response = await client.post(
+        f"/api/v1/graphs/{graph_id}/nodes", json={"name": name, "content": content}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def node_hits(client, query, **params):
+    response = await client.get("/api/v1/nodes/search", params={"q": query, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_tokenize_query_drops_search_syntax():
+    assert tokenize_query('"Linear" alg* NEAR(a b) -x OR y:z') == [
+        "linear", "alg", "near", "a", "b", "x", "or", "y", "z"
+    ]
+    assert tokenize_query('"*-:^()') == []
+
+
+@pytest.mark.anyio
+async def test_catalog_search_by_name_and_description(client, auth_headers):
+    word = unique_word("eigen")
+    by_name = (await client.post(
+        "/api/v1/graphs/", json={"name": f"{word} basics", "description": "Intro"}, headers=auth_headers
+    )).json()["id"]
+    by_description = (await client.post(
+        "/api/v1/graphs/", json={"name": "Spectral theory", "description": f"Uses {word} values"}, headers=auth_headers
+    )).json()["id"]
+
+    response = await client.get("/api/v1/graphs/", params={"search": word, "sort_by": "relevance"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["total"] == 2
+    # Совпадение в названии весит больше, чем в описании
+    assert [graph["id"] for graph in body["graphs"]] == [by_name, by_description]
+
+    # Слова ищутся по префиксу
+    response = await client.get("/api/v1/graphs/", params={"search": word[:-3]})
+    assert {graph["id"] for graph in response.json()["graphs"]} == {by_name, by_description}
+
+
+@pytest.mark.anyio
+async def test_node_search_hits_and_graph_filter(client, auth_headers, graph_id):
+    word = unique_word("tensor")
+    in_name = await create_node(client, auth_headers, graph_id, f"{word} product")
+    in_content = await create_node(client, auth_headers, graph_id, "Outer product", f"Defined via the {word} rule")
+    await create_node(client, auth_headers, graph_id, "Unrelated")
+    other_graph = (await client.post("/api/v1/graphs/", json={"name": "Other"}, headers=auth_headers)).json()["id"]
+    elsewhere = await create_node(client, auth_headers, other_graph, f"{word} elsewhere")
+
+    hits = await node_hits(client, word)
+    assert {hit["id"] for hit in hits} == {in_name, in_content, elsewhere}
+    hit = next(hit for hit in hits if hit["id"] == in_content)
+    assert hit["graph_id"] == graph_id and hit["graph_name"] == "Linear algebra"
+    assert f"**{word}**" in hit["snippet"]
+
+    hits = await node_hits(client, word, graph_id=graph_id)
+    assert {hit["id"] for hit in hits} == {in_name, in_content}
+
+
+@pytest.mark.anyio
+async def test_renamed_node_is_reindexed(client, auth_headers, graph_id):
+    old_word, new_word = unique_word("old"), unique_word("new")
+    node_id = await create_node(client, auth_headers, graph_id, old_word)
+    assert [hit["id"] for hit in await node_hits(client, old_word)] == [node_id]
+
+    response = await client.patch(f"/api/v1/nodes/{node_id}", json={"name": new_word}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert await node_hits(client, old_word) == []
+    assert [hit["id"] for hit in await node_hits(client, new_word)] == [node_id]
+
+    response = await client.delete(f"/api/v1/nodes/{node_id}", headers=auth_headers)
+    assert response.status_code == 204, response.text
+    assert await node_hits(client, new_word) == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("query", [
+    '""', '"""', '"unbalanced', "vec*", "*vec", "NEAR(vectors matrices)", "vectors NEAR matrices",
+    "-vectors", "vectors -matrices", "a OR b", "AND", "NOT x", "title:vectors", "^start", "(((", "--",
+])
+async def test_search_syntax_in_query_is_not_an_error(client, query):
+    response = await client.get("/api/v1/nodes/search", params={"q": query})
+    assert response.status_code == 200, response.text
+    if len(query) >= 3:
+        response = await client.get("/api/v1/graphs/", params={"search": query})
+        assert response.status_code == 200, response.text
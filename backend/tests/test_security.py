@@ -0,0 +1,133 @@
+# backend/tests/test_security.py
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from backend.core import security
+from backend.crud import user_crud
+from backend.db.session import AsyncSessionLocal
+from backend.models.user_model import User
+
+
+async def stored_hash(username: str) -> str:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(User.password_hash).where(User.username == username))
+
+
+async def stored_user(username: str) -> User:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(User).where(User.username == username))
+
+
+async def register(client, password: str = "secret1") -> str:
+    username = f"user_{uuid.uuid4().hex[:12]}"
+    response = await client.post("/api/v1/users/register", json={"username": username, "password": password})
+    assert response.status_code == 201, response.text
+    return username
+
+
+@pytest.mark.anyio
+async def test_login_returns_429_when_hash_pool_is_full(client, monkeypatch):
+    username = await register(client)
+    monkeypatch.setattr(security.password_hash_pool, "max_pending", 0)
+    response = await client.post("/api/v1/users/login/token", data={"username": username, "password": "secret1"})
+    assert response.status_code == 429, response.text
+    assert response.headers["Retry-After"] == "1"
+
+    monkeypatch.undo()
+    response = await client.post("/api/v1/users/login/token", data={"username": username, "password": "secret1"})
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.anyio
+async def test_login_rehashes_outdated_hash(client, monkeypatch):
+    username = await register(client)
+    old_hash = await stored_hash(username)
+    assert old_hash.startswith("$2b$04$")
+
+    # Сервер перешел на больший cost factor: старый хэш устарел
+    monkeypatch.setattr(
+        security, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)
+    )
+    response = await client.post("/api/v1/users/login/token", data={"username": username, "password": "secret1"})
+    assert response.status_code == 200, response.text
+    new_hash = await stored_hash(username)
+    assert new_hash != old_hash and new_hash.startswith("$2b$05$")
+    assert security.pwd_context.verify("secret1", new_hash)
+
+    # Актуальный хэш при следующем входе не пересчитывается
+    response = await client.post("/api/v1/users/login/token", data={"username": username, "password": "secret1"})
+    assert response.status_code == 200, response.text
+    assert await stored_hash(username) == new_hash
+
+
+@pytest.mark.anyio
+async def test_login_with_wrong_password_keeps_hash(client):
+    username = await register(client)
+    old_hash = await stored_hash(username)
+    response = await client.post("/api/v1/users/login/token", data={"username": username, "password": "wrong"})
+    assert response.status_code == 401, response.text
+    assert await stored_hash(username) == old_hash
+
+
+def token_for(username: str, user_id) -> dict:
+    token = security.create_access_token({"sub": username, "user_id": str(user_id)})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.anyio
+async def test_principal_cache_checks_token_subject(client):
+    alice, bob = await register(client), await register(client)
+    alice_id = (await stored_user(alice)).id
+    # Запрос Алисы кладет ее принципал в кэш
+    response = await client.post("/api/v1/graphs/", json={"name": "Alice"}, headers=token_for(alice, alice_id))
+    assert response.status_code == 201, response.text
+    assert security.principal_cache.get(alice_id) == (alice_id, alice)
+
+    # Токен с user_id Алисы, но чужим sub, не обслуживается из кэша и отклоняется
+    response = await client.post("/api/v1/graphs/", json={"name": "Bob"}, headers=token_for(bob, alice_id))
+    assert response.status_code == 401, response.text
+
+
+@pytest.mark.anyio
+async def test_update_password_hash_invalidates_principal(client):
+    username = await register(client)
+    user_id = (await stored_user(username)).id
+    response = await client.post("/api/v1/graphs/", json={"name": "Cached"}, headers=token_for(username, user_id))
+    assert response.status_code == 201, response.text
+    assert security.principal_cache.get(user_id) is not None
+
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        await user_crud.update_password_hash(db, user, security.get_password_hash("secret2"))
+    assert security.principal_cache.get(user_id) is None
+
+
+@pytest.mark.anyio
+async def test_read_only_dependency_reads_db_unless_claims_trusted(app, monkeypatch):
+    lookups = []
+    get_user_by_username = user_crud.get_user_by_username
+
+    async def counting_lookup(db, username):
+        lookups.append(username)
+        return await get_user_by_username(db, username=username)
+
+    monkeypatch.setattr(user_crud, "get_user_by_username", counting_lookup)
+    # Пользователя с такими claims нет в БД (например, он удален)
+    token = security.create_access_token({"sub": "ghost", "user_id": str(uuid.uuid4())})
+
+    monkeypatch.setattr(security, "TRUST_TOKEN_CLAIMS", False)
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(HTTPException) as error:
+            await security.get_current_user_read_only(token=token, db=db)
+    assert error.value.status_code == 401
+    assert lookups == ["ghost"]
+
+    monkeypatch.setattr(security, "TRUST_TOKEN_CLAIMS", True)
+    async with AsyncSessionLocal() as db:
+        principal = await security.get_current_user_read_only(token=token, db=db)
+    assert principal.username == "ghost"
+    assert lookups == ["ghost"]
@@ -0,0 +1,45 @@
+# backend/tests/test_session.py
+"""Профили движка БД из create_engine_for_url: PRAGMA SQLite и пул Postgres."""
+import pytest
+from sqlalchemy import text
+
+from backend.db import session
+from backend.core.config import (
+    SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KB, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_PRE_PING
+)
+
+
+@pytest.mark.anyio
+async def test_sqlite_pragmas_on_new_connection(tmp_path):
+    engine = session.create_engine_for_url(f"sqlite+aiosqlite:///{tmp_path / 'pragmas.db'}")
+    try:
+        async with engine.connect() as conn:
+            pragmas = {
+                name: (await conn.execute(text(f"PRAGMA {name}"))).scalar_one()
+                for name in ("journal_mode", "synchronous", "mmap_size", "cache_size")
+            }
+    finally:
+        await engine.dispose()
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == 1  # NORMAL
+    assert pragmas["mmap_size"] == SQLITE_MMAP_SIZE > 0
+    # Отрицательный cache_size - размер в KiB
+    assert pragmas["cache_size"] == -SQLITE_CACHE_SIZE_KB != 0
+
+
+@pytest.mark.parametrize("database_url", [
+    "postgresql://user:password@db:5432/taideteos",
+    "postgresql+asyncpg://user:password@db:5432/taideteos",
+])
+def test_postgres_profile(monkeypatch, database_url):
+    # Драйвер asyncpg - необязательная зависимость, поэтому движок не создается
+    calls = []
+    monkeypatch.setattr(session, "create_async_engine", lambda url, **kwargs: calls.append((url, kwargs)))
+    session.create_engine_for_url(database_url)
+
+    (url, kwargs), = calls
+    assert url.drivername == "postgresql+asyncpg"
+    assert url.database == "taideteos"
+    assert kwargs["pool_size"] == DB_POOL_SIZE
+    assert kwargs["max_overflow"] == DB_MAX_OVERFLOW
+    assert kwargs["pool_pre_ping"] is DB_POOL_PRE_PING
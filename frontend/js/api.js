@@ -103,6 +103,25 @@ export const api = {
         return request(`/graphs/${graphId}`);
     },
 
+    /**
+     * Изменения графа после ревизии since (для догоняющей синхронизации).
+     * @param {string} graphId - UUID графа.
+     * @param {number} since - Ревизия, которая уже есть у клиента.
+     * @returns {Promise<Object>} - { revision, full_resync, elements, removed_node_ids, removed_edge_ids }.
+     */
+    getGraphChanges: (graphId, since) => {
+        return request(`/graphs/${graphId}/changes?since=${since}`);
+    },
+
+    /**
+     * Открывает живой канал графа: сообщения hello, delta и resync (см. backend/core/live.py).
+     * @param {string} graphId - UUID графа.
+     * @returns {WebSocket}
+     */
+    openGraphLive: (graphId) => {
+        return new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/graphs/${graphId}/live`);
+    },
+
     // Добавление узла и ребра 
     addNodeToGraph: (graphId, nodeData) => {
         return request(`/graphs/${graphId}/nodes`, {
@@ -118,6 +137,32 @@ export const api = {
         });
     },
 
+    /**
+     * Применяет пачку операций над узлами и ребрами графа одним запросом.
+     * @param {string} graphId - UUID графа.
+     * @param {Array<Object>} operations - Операции вида { op: 'update_node', id, position_x, ... }.
+     * @returns {Promise<Object>} - { created_nodes, created_edges, revision }.
+     */
+    applyGraphBatch: (graphId, operations) => {
+        return request(`/graphs/${graphId}/batch`, {
+            method: 'POST',
+            body: JSON.stringify({ operations }),
+        });
+    },
+
+    /**
+     * Запускает авторасстановку узлов на сервере и сохраняет новые позиции.
+     * @param {string} graphId - UUID графа.
+     * @param {string} algorithm - 'layered' (по слоям пререквизитов) или 'force'.
+     * @returns {Promise<Object>} - { revision, positions: [{ id, x, y }] }.
+     */
+    layoutGraph: (graphId, algorithm = 'layered') => {
+        return request(`/graphs/${graphId}/layout`, {
+            method: 'POST',
+            body: JSON.stringify({ algorithm }),
+        });
+    },
+
     getNodeDetails: (nodeId) => {
         return request(`/nodes/${nodeId}`);
     },
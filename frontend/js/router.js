@@ -7,6 +7,8 @@ const navAuthLinks = document.getElementById('nav-auth-links');
 let currentCommentsPage = 1;
 const COMMENTS_PER_PAGE = 5;
 const GRAPHS_PER_PAGE = 10;
+// Живой канал открытого графа: закрывается при переходе на другую страницу
+let activeLiveChannel = null;
 
 // Карта маршрутов
 const routes = [
@@ -33,6 +35,7 @@ export async function navigateTo(path) {
         return;
     }
 
+    closeLiveChannel();
     const potentialMatch = routes.find(route => route.path.test(pathname));
     const match = potentialMatch || { view: '/pages/not_found.html' };
     
@@ -64,6 +67,75 @@ function afterPageLoad(path, match) {
     else if (match && path.startsWith('/graphs/')) { renderGraphView(match[1]); }
 }
 
+// --- Живое обновление графа: дельты по WebSocket, догоняющая синхронизация через /changes ---
+function closeLiveChannel() {
+    const socket = activeLiveChannel;
+    activeLiveChannel = null;
+    if (socket) socket.close();
+}
+
+function subscribeToGraph(graphId, cy, revision, onNodeAdded = () => {}) {
+    let currentRevision = revision ?? 0;
+
+    function applyDelta(delta) {
+        cy.batch(() => {
+            delta.removed_edges.forEach(id => cy.getElementById(id).remove());
+            delta.removed_nodes.forEach(id => cy.getElementById(id).remove());
+            delta.nodes.forEach(node => {
+                const existing = cy.getElementById(node.id);
+                if (existing.empty()) {
+                    onNodeAdded(cy.add({ group: 'nodes', data: { id: node.id, label: node.label }, position: { x: node.x ?? 0, y: node.y ?? 0 } }));
+                    return;
+                }
+                if (node.label !== undefined) existing.data('label', node.label);
+                // Узел, который сейчас тащит пользователь, не дергаем
+                if ((node.x !== undefined || node.y !== undefined) && !existing.grabbed()) {
+                    const pos = existing.position();
+                    existing.position({ x: node.x ?? pos.x, y: node.y ?? pos.y });
+                }
+            });
+            delta.edges.forEach(edge => {
+                if (cy.getElementById(edge.id).empty()) cy.add({ group: 'edges', data: { id: edge.id, source: edge.source, target: edge.target } });
+            });
+        });
+        currentRevision = Math.max(currentRevision, delta.revision);
+    }
+
+    async function catchUp() {
+        const changes = await api.getGraphChanges(graphId, currentRevision);
+        if (changes.full_resync) {
+            navigateTo(window.location.pathname);
+            return;
+        }
+        applyDelta({
+            revision: changes.revision,
+            nodes: changes.elements.filter(el => el.group === 'nodes').map(el => ({ id: el.data.id, label: el.data.label, ...el.position })),
+            edges: changes.elements.filter(el => el.group === 'edges').map(el => el.data),
+            removed_nodes: changes.removed_node_ids,
+            removed_edges: changes.removed_edge_ids,
+        });
+    }
+
+    function connect() {
+        const socket = api.openGraphLive(graphId);
+        socket.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            if (message.type === 'delta') {
+                applyDelta(message);
+            } else if (message.revision > currentRevision) {
+                // hello после (пере)подключения или resync: догоняем пропущенное
+                catchUp().catch(error => console.error("Ошибка синхронизации графа:", error));
+            }
+        };
+        // При обрыве переподключаемся, если пользователь все еще на этой странице
+        socket.onclose = () => setTimeout(() => { if (activeLiveChannel === socket) activeLiveChannel = connect(); }, 3000);
+        return socket;
+    }
+
+    closeLiveChannel();
+    activeLiveChannel = connect();
+}
+
 // --- ФУНКЦИЯ для редактора графа ---
 async function renderGraphEditor(graphId) {
     try {
@@ -79,6 +151,9 @@ async function renderGraphEditor(graphId) {
             layout: { name: 'preset' },
         });
 
+        // Правки соавторов приходят по живому каналу
+        subscribeToGraph(graphId, cy, graphData.revision);
+
         cy.style()
             .selector('node.edge-mode').style({ 'border-color': '#28a745', 'border-width': 4, 'border-style': 'dashed' })
             .selector('node.edge-source').style({ 'background-color': '#ffc107', 'border-color': '#e83e8c', 'border-width': 4, 'border-style': 'solid' })
@@ -92,12 +167,33 @@ async function renderGraphEditor(graphId) {
         cy.maxZoom(3.0);
 
         // --- Логика редактирования (перетаскивание) ---
-        cy.on('dragfreeon', 'node', async (e) => {
+        // При перетаскивании выделения dragfreeon приходит для каждого узла,
+        // поэтому собираем позиции и отправляем их одной пачкой.
+        let pendingPositions = new Map();
+        let positionsFlushTimer = null;
+        cy.on('dragfreeon', 'node', (e) => {
             const node = e.target;
+            pendingPositions.set(node.id(), { ...node.position() });
+            clearTimeout(positionsFlushTimer);
+            positionsFlushTimer = setTimeout(async () => {
+                const operations = [...pendingPositions].map(([id, pos]) => ({ op: 'update_node', id, position_x: pos.x, position_y: pos.y }));
+                pendingPositions = new Map();
+                try {
+                    await api.applyGraphBatch(graphId, operations);
+                } catch (error) {
+                    console.error("Ошибка обновления позиции:", error);
+                }
+            }, 50);
+        });
+
+        // --- Авторасстановка (считается на сервере) ---
+        document.getElementById('auto-layout-btn').addEventListener('click', async () => {
             try {
-                await api.updateNode(node.id(), { position_x: node.position().x, position_y: node.position().y });
+                const result = await api.layoutGraph(graphId, 'layered');
+                result.positions.forEach(({ id, x, y }) => cy.getElementById(id).position({ x, y }));
+                cy.fit();
             } catch (error) {
-                console.error("Ошибка обновления позиции:", error);
+                alert(`Ошибка авторасстановки: ${error.message}`);
             }
         });
 
@@ -282,6 +378,7 @@ async function renderGraphView(graphId) {
         document.getElementById('zoom-out-btn').addEventListener('click', () => cy.zoom(cy.zoom() * 0.8));
         document.getElementById('fit-btn').addEventListener('click', () => cy.fit());
         cy.minZoom(0.1); cy.maxZoom(3.0); cy.nodes().ungrabify();
+        subscribeToGraph(graphId, cy, graphData.revision, node => node.ungrabify());
 
         const nodeActionModal = new bootstrap.Modal(document.getElementById('viewNodeActionModal'));
         const modalTitle = document.getElementById('viewNodeActionModalTitle');